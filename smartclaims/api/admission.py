@@ -0,0 +1,251 @@
+import base64
+import functools
+import itertools
+import json
+import math
+import time
+
+import frappe
+from frappe.utils import cint, flt
+
+# Every running call holds a slot in two Redis sorted sets: one per endpoint and
+# one per endpoint and client (API key, or user for session logins). Slots are
+# scored with their start time and expire once no request could still be
+# running (the HTTP timeout after which gunicorn kills the worker, plus a
+# margin), so those of a killed worker fall out instead of leaking. Calls that
+# find no free slot wait in a bounded per-endpoint queue; a full queue or an
+# expired wait is answered with 429.
+SLOTS_KEY_PREFIX = "smartclaims_admission_slots|"
+WAITING_KEY_PREFIX = "smartclaims_admission_waiting|"
+METRICS_KEY_PREFIX = "smartclaims_admission|"
+METRICS_ENDPOINTS_KEY = "smartclaims_admission_endpoints"
+DEFAULT_HTTP_TIMEOUT = 120
+SLOT_TTL_MARGIN = 60
+POLL_INTERVALS = (0.01, 0.02, 0.05, 0.1)
+
+# Takes both slots or neither, so a call never holds a client slot while it
+# waits for the endpoint
+ACQUIRE_SCRIPT = """
+local endpoint_cap, client_cap = tonumber(ARGV[4]), tonumber(ARGV[5])
+redis.call('zremrangebyscore', KEYS[1], '-inf', ARGV[3])
+redis.call('zremrangebyscore', KEYS[2], '-inf', ARGV[3])
+if endpoint_cap > 0 and redis.call('zcard', KEYS[1]) >= endpoint_cap then return 0 end
+if client_cap > 0 and redis.call('zcard', KEYS[2]) >= client_cap then return 0 end
+redis.call('zadd', KEYS[1], ARGV[2], ARGV[1])
+redis.call('zadd', KEYS[2], ARGV[2], ARGV[1])
+redis.call('expire', KEYS[1], ARGV[6])
+redis.call('expire', KEYS[2], ARGV[6])
+return 1
+"""
+
+
+def admission_controlled(fn):
+    """Cap how many calls of a create endpoint run at once, per endpoint and per client.
+
+    Caps, queue length and wait come from Smartclaims Settings; with both caps
+    at 0 the endpoint is not limited. Background runs of async calls were
+    admitted when they were queued and are not limited again.
+    """
+
+    @functools.wraps(fn)
+    def wrapper(**kwargs):
+        settings = frappe.get_cached_doc("Smartclaims Settings")
+        endpoint_cap = cint(settings.max_concurrent_per_endpoint)
+        client_cap = cint(settings.max_concurrent_per_client)
+        if not (endpoint_cap or client_cap) or not getattr(frappe.local, "request", None):
+            return fn(**kwargs)
+
+        slot = AdmissionSlot(fn.__name__, _get_client(), endpoint_cap, client_cap)
+        max_wait = cint(settings.max_admission_wait_ms) / 1000
+        if not slot.acquire(cint(settings.max_admission_queue), max_wait):
+            return _reject(fn.__name__, max_wait)
+
+        try:
+            return fn(**kwargs)
+        finally:
+            slot.release()
+
+    return wrapper
+
+
+class AdmissionSlot:
+    def __init__(self, endpoint, client, endpoint_cap, client_cap):
+        self.endpoint = endpoint
+        self.client = client
+        self.endpoint_cap = endpoint_cap
+        self.client_cap = client_cap
+        self.token = frappe.generate_hash(length=12)
+        self.keys = [
+            _key(SLOTS_KEY_PREFIX + endpoint),
+            _key(f"{SLOTS_KEY_PREFIX}{endpoint}|{client}")
+        ]
+        self.acquired = False
+
+    def acquire(self, max_queue, max_wait):
+        try:
+            if self._try_acquire():
+                _count(self.endpoint, "admitted")
+                return True
+
+            if max_queue and max_wait:
+                start = time.monotonic()
+                self.acquired = self._wait(max_queue, start + max_wait)
+                _count(self.endpoint, "waited", wait_seconds=time.monotonic() - start)
+        except Exception:
+            # Without Redis there is nothing to coordinate on, let the call through
+            return True
+
+        _count(self.endpoint, "admitted" if self.acquired else "rejected")
+        return self.acquired
+
+    def release(self):
+        if not self.acquired:
+            return
+
+        try:
+            pipeline = frappe.cache.pipeline(transaction=False)
+            for key in self.keys:
+                pipeline.zrem(key, self.token)
+            pipeline.execute()
+        except Exception:
+            # The slot expires after get_slot_ttl()
+            pass
+
+    def _try_acquire(self):
+        now, ttl = time.time(), get_slot_ttl()
+        self.acquired = bool(_get_acquire_script()(
+            keys=self.keys,
+            args=[self.token, now, now - ttl, self.endpoint_cap, self.client_cap, ttl]
+        ))
+        return self.acquired
+
+    def _wait(self, max_queue, deadline):
+        waiting_key = _key(WAITING_KEY_PREFIX + self.endpoint)
+        now, ttl = time.time(), get_slot_ttl()
+
+        pipeline = frappe.cache.pipeline()
+        pipeline.zremrangebyscore(waiting_key, "-inf", now - ttl)
+        pipeline.zadd(waiting_key, {self.token: now})
+        pipeline.expire(waiting_key, ttl)
+        pipeline.zcard(waiting_key)
+        if pipeline.execute()[-1] > max_queue:
+            frappe.cache.zrem(waiting_key, self.token)
+            return False
+
+        try:
+            for attempt in itertools.count():
+                pause = POLL_INTERVALS[min(attempt, len(POLL_INTERVALS) - 1)]
+                if time.monotonic() + pause > deadline:
+                    return False
+
+                time.sleep(pause)
+                if self._try_acquire():
+                    return True
+        finally:
+            frappe.cache.zrem(waiting_key, self.token)
+
+
+def get_slot_ttl():
+    """Seconds after which a slot is stale: no request outlives the HTTP worker timeout."""
+    return (cint(frappe.conf.get("http_timeout")) or DEFAULT_HTTP_TIMEOUT) + SLOT_TTL_MARGIN
+
+
+def get_admission_metrics():
+    """Prometheus lines for ``get_metrics``: calls admitted / rejected, time waited, in flight and waiting."""
+    endpoints = sorted(value.decode() for value in frappe.cache.smembers(_key(METRICS_ENDPOINTS_KEY)))
+    pipeline = frappe.cache.pipeline()
+    for endpoint in endpoints:
+        pipeline.hgetall(_key(METRICS_KEY_PREFIX + endpoint))
+        pipeline.zcard(_key(SLOTS_KEY_PREFIX + endpoint))
+        pipeline.zcard(_key(WAITING_KEY_PREFIX + endpoint))
+    results = pipeline.execute()
+
+    series = {
+        "smartclaims_admission_calls_total": [],
+        "smartclaims_admission_waits_total": [],
+        "smartclaims_admission_wait_seconds_total": [],
+        "smartclaims_admission_in_flight": [],
+        "smartclaims_admission_queue_depth": []
+    }
+    for position, endpoint in enumerate(endpoints):
+        values, in_flight, waiting = results[3 * position: 3 * position + 3]
+        values = {key.decode(): value.decode() for key, value in values.items()}
+        for outcome in ("admitted", "rejected"):
+            series["smartclaims_admission_calls_total"].append(
+                f'{{endpoint="{endpoint}",outcome="{outcome}"}} {values.get(outcome, 0)}'
+            )
+        series["smartclaims_admission_waits_total"].append(f'{{endpoint="{endpoint}"}} {values.get("waited", 0)}')
+        series["smartclaims_admission_wait_seconds_total"].append(
+            f'{{endpoint="{endpoint}"}} {values.get("wait_seconds", 0)}'
+        )
+        series["smartclaims_admission_in_flight"].append(f'{{endpoint="{endpoint}"}} {in_flight}')
+        series["smartclaims_admission_queue_depth"].append(f'{{endpoint="{endpoint}"}} {waiting}')
+
+    lines = []
+    for name, kind, help_text in (
+        ("smartclaims_admission_calls_total", "counter", "Create calls admitted or rejected by admission control."),
+        ("smartclaims_admission_waits_total", "counter", "Create calls that had to wait for a free slot."),
+        ("smartclaims_admission_wait_seconds_total", "counter", "Time create calls spent waiting for a slot."),
+        ("smartclaims_admission_in_flight", "gauge", "Create calls holding a slot."),
+        ("smartclaims_admission_queue_depth", "gauge", "Create calls waiting for a slot."),
+    ):
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        lines += [name + sample for sample in series[name]]
+
+    return lines
+
+
+def _reject(endpoint, max_wait):
+    from werkzeug.wrappers import Response
+
+    retry_after = max(1, math.ceil(max_wait))
+    frappe.local.response["http_status_code"] = 429
+    return Response(
+        json.dumps({
+            "status": "failed",
+            "error": f"Too many concurrent {endpoint} calls, retry in {retry_after}s",
+            "retry_after": retry_after
+        }),
+        status=429,
+        headers={"Retry-After": str(retry_after)},
+        mimetype="application/json"
+    )
+
+
+def _get_client():
+    # "token <key>:<secret>" or "Basic base64(<key>:<secret>)"; the key names the client
+    authorization = frappe.get_request_header("Authorization") or ""
+    scheme, _, credentials = authorization.partition(" ")
+    try:
+        if scheme.lower() == "basic":
+            credentials = base64.b64decode(credentials).decode()
+        if scheme.lower() in ("token", "basic") and ":" in credentials:
+            return credentials.split(":", 1)[0]
+    except ValueError:
+        pass
+
+    return frappe.session.user
+
+
+def _count(endpoint, outcome, wait_seconds=None):
+    try:
+        key = _key(METRICS_KEY_PREFIX + endpoint)
+        pipeline = frappe.cache.pipeline(transaction=False)
+        pipeline.sadd(_key(METRICS_ENDPOINTS_KEY), endpoint)
+        pipeline.hincrby(key, outcome, 1)
+        if wait_seconds is not None:
+            pipeline.hincrbyfloat(key, "wait_seconds", flt(wait_seconds, 3))
+        pipeline.execute()
+    except Exception:
+        # Metrics must never fail the call
+        pass
+
+
+def _get_acquire_script():
+    if not hasattr(frappe.local, "smartclaims_admission_script"):
+        frappe.local.smartclaims_admission_script = frappe.cache.register_script(ACQUIRE_SCRIPT)
+    return frappe.local.smartclaims_admission_script
+
+
+def _key(name):
+    return frappe.cache.make_key(name)
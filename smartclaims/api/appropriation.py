@@ -0,0 +1,133 @@
+import frappe
+import numpy as np
+from frappe.utils import cint, flt, get_field_precision
+
+# Received premium is split over the plans of each invoice in proportion to the
+# plan premiums, then over the plan's members. All amounts are worked in
+# integer minor units (cents) and the leftover units go to the largest
+# remainders, so every invoice and every plan adds up exactly.
+BREAKDOWN_DOCTYPE = "Invoice Breakdown for Appropriaton"
+
+
+def allocate(totals, weights, groups):
+    """Split ``totals[g]`` over the rows of group ``g`` in proportion to ``weights``.
+
+    ``totals`` are integer minor units, one per group; ``groups`` gives the
+    group of every row. Returns integer minor units per row that sum exactly to
+    each group's total. Groups whose weights are all zero are split evenly.
+    """
+    totals = np.asarray(totals, dtype=np.int64)
+    weights = np.asarray(weights, dtype=np.float64)
+    groups = np.asarray(groups, dtype=np.intp)
+
+    counts = np.bincount(groups, minlength=len(totals))
+    weight_sums = np.bincount(groups, weights=weights, minlength=len(totals))
+    unweighted = weight_sums == 0
+    weights = np.where(unweighted[groups], 1.0, weights)
+    weight_sums = np.where(unweighted, counts, weight_sums)
+
+    exact = totals[groups] * (weights / weight_sums[groups])
+    base = np.floor(exact).astype(np.int64)
+    leftover = totals - np.bincount(groups, weights=base, minlength=len(totals)).astype(np.int64)
+
+    # Rank the rows of every group by remainder, largest first; the top
+    # `leftover` rows of the group get one more unit
+    order = np.lexsort((-(exact - base), groups))
+    sorted_groups = groups[order]
+    rank = np.arange(len(order)) - np.searchsorted(sorted_groups, sorted_groups, side="left")
+    extra = np.zeros(len(groups), dtype=np.int64)
+    extra[order] = rank < leftover[sorted_groups]
+
+    return base + extra
+
+
+def appropriate_invoices(sales_invoices, amounts=None):
+    """Appropriate the received premium of many Sales Invoices over their breakdown rows.
+
+    ``amounts`` maps invoice name to the amount to appropriate; invoices not in
+    it use what has been received so far (grand total less outstanding).
+    Returns ``{invoice: appropriated total}``.
+    """
+    amounts = amounts or {}
+    rows = frappe.get_all(
+        BREAKDOWN_DOCTYPE,
+        filters={"sales_invoice": ["in", list(sales_invoices)]},
+        fields=["name", "sales_invoice", "number_of_members_per_plan", "premium_amount_per_plan"],
+        order_by="sales_invoice asc, creation asc, name asc"
+    )
+    if not rows:
+        return {}
+
+    invoices = list(dict.fromkeys(row.sales_invoice for row in rows))
+    pending = [invoice for invoice in invoices if invoice not in amounts]
+    received = {
+        d.name: flt(d.grand_total) - flt(d.outstanding_amount)
+        for d in frappe.get_all(
+            "Sales Invoice",
+            filters={"name": ["in", pending]},
+            fields=["name", "grand_total", "outstanding_amount"]
+        )
+    } if pending else {}
+
+    scale = 10 ** (get_field_precision(frappe.get_meta(BREAKDOWN_DOCTYPE).get_field("appropriated_amount")) or 2)
+    invoice_index = {invoice: index for index, invoice in enumerate(invoices)}
+    totals = np.rint(
+        np.array([flt(amounts.get(invoice, received.get(invoice))) for invoice in invoices]) * scale
+    ).astype(np.int64)
+
+    groups = np.array([invoice_index[row.sales_invoice] for row in rows])
+    premiums = np.array([flt(row.premium_amount_per_plan) for row in rows])
+    members = np.array([cint(row.number_of_members_per_plan) for row in rows], dtype=np.int64)
+
+    plan_units = allocate(totals, premiums, groups)
+    per_member, members_with_extra = np.divmod(plan_units, np.maximum(members, 1))
+
+    frappe.db.bulk_update(BREAKDOWN_DOCTYPE, {
+        row.name: {
+            "appropriated_amount": plan_units[i] / scale,
+            "amount_per_member": per_member[i] / scale if members[i] else 0,
+            "members_with_extra_cent": int(members_with_extra[i]) if members[i] else 0
+        }
+        for i, row in enumerate(rows)
+    })
+
+    return {invoice: totals[index] / scale for invoice, index in invoice_index.items()}
+
+
+# Appropriate received premium over the plans and members of Sales Invoices
+# api/method/smartclaims.api.appropriation.appropriate_premiums
+@frappe.whitelist()
+def appropriate_premiums(sales_invoices, amounts=None):
+    """
+    Dummy JSON Input:
+    {
+        "sales_invoices": ["ACC-SINV-2025-00014", "ACC-SINV-2025-00015"],
+        "amounts": {"ACC-SINV-2025-00014": 12500}
+    }
+    """
+    try:
+        if isinstance(sales_invoices, str):
+            sales_invoices = frappe.parse_json(sales_invoices) if sales_invoices.lstrip().startswith("[") \
+                else sales_invoices.split(",")
+        if isinstance(amounts, str):
+            amounts = frappe.parse_json(amounts)
+
+        sales_invoices = [name.strip() for name in sales_invoices or [] if name and name.strip()]
+        if not sales_invoices:
+            frappe.local.response["http_status_code"] = 400
+            return {"status": "failed", "error": "No Sales Invoices provided"}
+
+        appropriated = appropriate_invoices(sales_invoices, amounts)
+        frappe.db.commit()
+
+        frappe.local.response["http_status_code"] = 200
+        return {
+            "status": "success",
+            "appropriated": appropriated,
+            "missing": [name for name in sales_invoices if name not in appropriated]
+        }
+
+    except Exception as e:
+        frappe.log_error(frappe.get_traceback(), "appropriate_premiums error")
+        frappe.local.response["http_status_code"] = 500
+        return {"status": "failed", "error": str(e)}
@@ -0,0 +1,69 @@
+import frappe
+from frappe.utils import flt
+
+# custom_account_balance on Journal Entry Account is the balance of the row's
+# account (and party, on party rows) after that row, as debit minus credit
+# like the ledger; payables show as negative.
+
+
+def set_running_balances(doc, method=None):
+    """doc_events hook for Journal Entry before_submit.
+
+    Opening balances for every (account, party) of the journal come from one
+    grouped GL Entry query; each row then adds its own amount, so a party that
+    appears on many lines carries its balance from one line to the next.
+    """
+    if not doc.get("custom_type") or not doc.accounts:
+        return
+
+    balances = get_opening_balances(doc)
+    for row in doc.accounts:
+        key = _get_balance_key(row)
+        balances[key] = balances.get(key, 0) + flt(row.debit) - flt(row.credit)
+        row.custom_account_balance = flt(balances[key], row.precision("custom_account_balance"))
+
+
+def get_opening_balances(doc):
+    """Return ``{(account, party_type, party): balance}`` up to the journal's posting date.
+
+    Rows without a party are keyed ``(account, None, None)`` and get the whole
+    account's balance.
+    """
+    party_accounts, parties, accounts = set(), set(), set()
+    for row in doc.accounts:
+        if row.party:
+            party_accounts.add(row.account)
+            parties.add(row.party)
+        else:
+            accounts.add(row.account)
+
+    gl_balances = frappe.db.sql("""
+        select account, party_type, party, sum(debit) - sum(credit) as balance
+        from `tabGL Entry`
+        where company = %(company)s and is_cancelled = 0 and posting_date <= %(posting_date)s
+            and ((account in %(party_accounts)s and party in %(parties)s) or account in %(accounts)s)
+        group by account, party_type, party
+    """, {
+        "company": doc.company,
+        "posting_date": doc.posting_date,
+        # "in ()" is not valid SQL, an empty string matches no account or party
+        "party_accounts": tuple(party_accounts) or ("",),
+        "parties": tuple(parties) or ("",),
+        "accounts": tuple(accounts) or ("",)
+    }, as_dict=True)
+
+    balances = {}
+    for row in gl_balances:
+        if row.account in accounts:
+            key = (row.account, None, None)
+            balances[key] = balances.get(key, 0) + flt(row.balance)
+        if row.party and row.party in parties and row.account in party_accounts:
+            balances[(row.account, row.party_type, row.party)] = flt(row.balance)
+
+    return balances
+
+
+def _get_balance_key(row):
+    if row.party:
+        return (row.account, row.party_type, row.party)
+    return (row.account, None, None)
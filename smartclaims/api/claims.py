@@ -0,0 +1,213 @@
+import base64
+import json
+
+import frappe
+from frappe.desk.reportview import get_match_cond
+from frappe.query_builder.functions import Count, Sum
+from frappe.utils import cint
+from pypika.terms import LiteralValue
+
+DEFAULT_CLAIMS_LIMIT = 50
+MAX_CLAIMS_LIMIT = 500
+
+# Request parameter -> field it filters on
+FILTER_FIELDS = {
+    "member_number": "custom_member_number",
+    "policy_number": "custom_member_policy_number",
+    "provider": "supplier",
+    "claim_month": "custom_claim_monthyear",
+    "invoice_type": "custom_invoice_type",
+    "refund_id": "custom_refund_id"
+}
+
+CLAIM_FIELDS = ("name", "posting_date", "supplier", "custom_invoice_type", "custom_claim_monthyear", "bill_no",
+                "custom_refund_id", "custom_member_number", "grand_total", "outstanding_amount", "status", "docstatus")
+
+# Every view filters on the leading columns of one index and pages on the
+# columns that follow them (then name, which InnoDB keeps in every index), so
+# a page is a single index range read whatever the offset. User permissions and
+# permission query conditions of Purchase Invoice apply to every view.
+CLAIM_VIEWS = {
+    "member": {
+        "doctype": "Purchase Invoice",
+        "filters": ("member_number",),
+        "order": ("posting_date", "name"),
+        "fields": (*CLAIM_FIELDS, "custom_member_name")
+    },
+    "policy": {
+        "doctype": "Purchase Invoice",
+        "filters": ("policy_number",),
+        "order": ("posting_date", "name"),
+        "fields": (*CLAIM_FIELDS, "custom_member_name", "custom_member_policy_number")
+    },
+    "provider": {
+        "doctype": "Purchase Invoice",
+        "filters": ("provider",),
+        "optional": ("claim_month",),
+        "order": ("posting_date", "name"),
+        "fields": (*CLAIM_FIELDS, "custom_consolidated", "custom_claim_count")
+    },
+    "month": {
+        "doctype": "Purchase Invoice",
+        "filters": ("claim_month",),
+        "optional": ("invoice_type",),
+        "order": ("custom_invoice_type", "name"),
+        "fields": CLAIM_FIELDS
+    },
+    "refund": {
+        "doctype": "Purchase Invoice",
+        "filters": ("refund_id",),
+        "order": ("name",),
+        "fields": (*CLAIM_FIELDS, "custom_member_name")
+    },
+    # Claims that were consolidated into a provider's monthly invoice
+    "member_lines": {
+        "doctype": "Purchase Invoice Item",
+        "filters": ("member_number",),
+        "order": ("name",),
+        "fields": ("name", "parent", "custom_claim_number", "custom_member_number", "item_code", "qty", "rate",
+                   "amount", "docstatus"),
+        "totals": ("amount",)
+    }
+}
+
+
+# Look up claims by member, policy, provider, claim month or refund id
+# api/method/smartclaims.api.claims.get_claims
+@frappe.whitelist()
+def get_claims(view, member_number=None, policy_number=None, provider=None, claim_month=None,
+               invoice_type=None, refund_id=None, cursor=None, limit=None, with_totals=0):
+    """
+    Dummy JSON Input:
+    {
+        "view": "provider",
+        "provider": "01-02-00269 SUNYANI MUNICIPAL HOSPITAL",
+        "claim_month": "09-2025",
+        "limit": 50,
+        "with_totals": 1
+    }
+
+    Rows come newest first in the order of the view; pass the returned
+    next_cursor to get the following page. Cancelled claims are left out.
+    """
+    try:
+        spec = CLAIM_VIEWS.get(view)
+        if not spec:
+            frappe.local.response["http_status_code"] = 400
+            return {"status": "failed", "error": f"Unknown view '{view}', use one of {', '.join(CLAIM_VIEWS)}"}
+
+        params = {
+            "member_number": member_number,
+            "policy_number": policy_number,
+            "provider": provider,
+            "claim_month": claim_month,
+            "invoice_type": invoice_type,
+            "refund_id": refund_id
+        }
+        missing = [param for param in spec["filters"] if not params[param]]
+        if missing:
+            frappe.local.response["http_status_code"] = 400
+            return {"status": "failed", "error": f"The {view} view needs {', '.join(missing)}"}
+
+        if not frappe.has_permission("Purchase Invoice", "read"):
+            frappe.local.response["http_status_code"] = 403
+            return {"status": "failed", "error": "Not permitted to read Purchase Invoice"}
+
+        filters = {
+            FILTER_FIELDS[param]: params[param]
+            for param in (*spec["filters"], *spec.get("optional", ()))
+            if params[param]
+        }
+        limit = min(cint(limit) or DEFAULT_CLAIMS_LIMIT, MAX_CLAIMS_LIMIT)
+
+        rows = get_claim_rows(spec, filters, decode_cursor(cursor, len(spec["order"])), limit)
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        response = {
+            "status": "success",
+            "view": view,
+            "rows": rows,
+            "next_cursor": encode_cursor(rows[-1], spec["order"]) if has_more else None,
+            "has_more": has_more
+        }
+        if cint(with_totals):
+            response["totals"] = get_claim_totals(spec, filters)
+
+        frappe.local.response["http_status_code"] = 200
+        return response
+
+    except frappe.ValidationError as e:
+        frappe.local.response["http_status_code"] = 400
+        return {"status": "failed", "error": str(e)}
+
+    except Exception as e:
+        frappe.log_error(frappe.get_traceback(), "get_claims error")
+        frappe.local.response["http_status_code"] = 500
+        return {"status": "failed", "error": str(e)}
+
+
+def get_claim_rows(spec, filters, cursor, limit):
+    """Keyset page in descending view order; reads one row past the page to tell if there is more."""
+    table = frappe.qb.DocType(spec["doctype"])
+    query = _filter(frappe.qb.from_(table), table, spec, filters).select(*[table[field] for field in spec["fields"]])
+
+    for field in spec["order"]:
+        query = query.orderby(table[field], order=frappe.qb.desc)
+
+    if cursor:
+        query = query.where(_before(table, spec["order"], cursor))
+
+    return query.limit(limit + 1).run(as_dict=True)
+
+
+def get_claim_totals(spec, filters):
+    table = frappe.qb.DocType(spec["doctype"])
+    amount_fields = spec.get("totals", ("grand_total", "outstanding_amount"))
+    query = _filter(frappe.qb.from_(table), table, spec, filters).select(
+        Count("*").as_("count"), *[Sum(table[field]).as_(field) for field in amount_fields]
+    )
+    return query.run(as_dict=True)[0]
+
+
+def encode_cursor(row, order):
+    return base64.urlsafe_b64encode(json.dumps([str(row[field]) for field in order]).encode()).decode()
+
+
+def decode_cursor(cursor, length):
+    if not cursor:
+        return None
+
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        assert isinstance(values, list) and len(values) == length
+    except Exception:
+        frappe.throw(f"Invalid cursor: {cursor}")
+
+    return values
+
+
+def _filter(query, table, spec, filters):
+    for field, value in filters.items():
+        query = query.where(table[field] == value)
+
+    if spec["doctype"] == "Purchase Invoice Item":
+        query = query.where(table.parenttype == "Purchase Invoice")
+
+    # " and (...)" on `tabPurchase Invoice` columns, empty when nothing restricts the user
+    match_conditions = get_match_cond("Purchase Invoice")
+    if match_conditions:
+        if spec["doctype"] == "Purchase Invoice Item":
+            parent = frappe.qb.DocType("Purchase Invoice")
+            query = query.join(parent).on(parent.name == table.parent)
+        query = query.where(LiteralValue(match_conditions.removeprefix(" and ")))
+
+    return query.where(table.docstatus < 2)
+
+
+def _before(table, order, values):
+    """Rows sorting after the cursor in descending order: (a, b) < (x, y)."""
+    field, value = table[order[0]], values[0]
+    if len(order) == 1:
+        return field < value
+    return (field < value) | ((field == value) & _before(table, order[1:], values[1:]))
@@ -0,0 +1,251 @@
+import csv
+import json
+import os
+from itertools import islice
+
+import frappe
+from frappe.utils import cint, flt
+
+from smartclaims.api.create import (
+    BULK_CHUNK_SIZE,
+    get_purchase_invoice_payload_error,
+    insert_purchase_invoice_chunk,
+)
+
+# Claim files are streamed through a chain of generators (read -> parse ->
+# validate -> chunk), so only one chunk of rows is held in memory at a time.
+# Rejected rows go straight to an error CSV next to the import. Each chunk is
+# committed together with the processed-row count, so a failed import resumes
+# after the last committed chunk instead of inserting its claims again.
+ERROR_FILE_COLUMNS = ["row", "status", "error", "payload"]
+
+
+def enqueue_claims_import(claims_import, resume=False):
+    claims_import.db_set({"status": "Queued", "error": None})
+    frappe.enqueue(
+        "smartclaims.api.claims_import.run_claims_import",
+        queue="long",
+        timeout=6 * 60 * 60,
+        claims_import=claims_import.name,
+        resume=resume,
+        enqueue_after_commit=True
+    )
+
+
+# Start a claims file import
+# api/method/smartclaims.api.claims_import.start_claims_import
+@frappe.whitelist()
+def start_claims_import(file_url, file_format=None, default_invoice_type=None, chunk_size=None):
+    try:
+        if not frappe.has_permission("Purchase Invoice", "create"):
+            frappe.local.response["http_status_code"] = 403
+            return {"status": "failed", "error": "Not permitted to create Purchase Invoice"}
+
+        file_name = frappe.db.get_value("File", {"file_url": file_url})
+        if not file_name:
+            frappe.local.response["http_status_code"] = 400
+            return {"status": "failed", "error": f"File {file_url} not found"}
+
+        if not frappe.has_permission("File", "read", file_name):
+            frappe.local.response["http_status_code"] = 403
+            return {"status": "failed", "error": f"Not permitted to read {file_url}"}
+
+        if not file_format:
+            file_format = "NDJSON" if file_url.lower().endswith((".ndjson", ".jsonl")) else "CSV"
+
+        claims_import = frappe.get_doc({
+            "doctype": "Claims Import",
+            "import_file": file_url,
+            "file_format": file_format,
+            "default_invoice_type": default_invoice_type,
+            "chunk_size": cint(chunk_size) or BULK_CHUNK_SIZE
+        })
+        claims_import.insert(ignore_permissions=True)
+        enqueue_claims_import(claims_import)
+        frappe.db.commit()
+
+        frappe.local.response["http_status_code"] = 202
+        return {"status": "queued", "name": claims_import.name}
+
+    except Exception as e:
+        frappe.log_error(frappe.get_traceback(), "start_claims_import error")
+        frappe.local.response["http_status_code"] = 500
+        return {"status": "failed", "error": str(e)}
+
+
+def run_claims_import(claims_import, resume=False):
+    """Background job: stream the import file into Purchase Invoices.
+
+    With ``resume``, the rows counted as processed by an earlier run are skipped.
+    """
+    claims_import = frappe.get_doc("Claims Import", claims_import)
+    if not resume:
+        claims_import.db_set({"processed_rows": 0, "imported_rows": 0, "failed_rows": 0})
+    claims_import.db_set("status", "In Progress")
+    frappe.db.commit()
+
+    try:
+        path = frappe.get_doc("File", {"file_url": claims_import.import_file}).get_full_path()
+        progress = ImportProgress(os.path.getsize(path))
+        progress.update(cint(claims_import.processed_rows), cint(claims_import.imported_rows))
+        error_path = frappe.get_site_path("private", "files", f"claims-import-{claims_import.name}-errors.csv")
+        resume_errors = resume and os.path.exists(error_path)
+
+        with open(error_path, "a" if resume_errors else "w", newline="", encoding="utf-8") as error_file:
+            errors = csv.writer(error_file)
+            if not resume_errors:
+                errors.writerow(ERROR_FILE_COLUMNS)
+
+            rows = read_rows(path, claims_import.file_format, progress)
+            rows = islice(validate_rows(rows, claims_import.default_invoice_type), progress.processed_rows, None)
+            for chunk in chunked(rows, cint(claims_import.chunk_size) or BULK_CHUNK_SIZE):
+                valid = [(row, claim) for row, claim, error in chunk if not error]
+                failed = [[row, 400, error, _dump(claim)] for row, claim, error in chunk if error]
+
+                results = insert_purchase_invoice_chunk([claim for row, claim in valid])
+
+                imported = 0
+                for result, (row, claim) in zip(results, valid, strict=True):
+                    if result["status"] == 201:
+                        imported += 1
+                    else:
+                        failed.append([row, result["status"], result["error"], _dump(claim)])
+
+                progress.update(len(chunk), imported)
+                # Commits the chunk's claims along with the count that skips them on resume;
+                # its error rows are written only then, so a resumed chunk doesn't repeat them
+                _publish_progress(claims_import, progress)
+                errors.writerows(sorted(failed))
+                error_file.flush()
+
+        if progress.failed_rows:
+            _attach_error_file(claims_import, error_path)
+        else:
+            os.remove(error_path)
+
+        claims_import.db_set("status", "Completed" if not progress.failed_rows
+                             else "Partially Completed" if progress.imported_rows else "Failed")
+
+    except Exception:
+        frappe.db.rollback()
+        frappe.log_error(frappe.get_traceback(), "Claims Import Error")
+        claims_import.db_set({"status": "Failed", "error": frappe.get_traceback()})
+
+    frappe.db.commit()
+    frappe.publish_realtime(
+        "claims_import_progress",
+        {"name": claims_import.name, "progress": 100, "done": True,
+         "processed_rows": claims_import.processed_rows, "failed_rows": claims_import.failed_rows},
+        doctype="Claims Import",
+        docname=claims_import.name
+    )
+
+
+class ImportProgress:
+    def __init__(self, file_size):
+        self.file_size = file_size
+        self.bytes_read = 0
+        self.processed_rows = 0
+        self.imported_rows = 0
+
+    @property
+    def failed_rows(self):
+        return self.processed_rows - self.imported_rows
+
+    @property
+    def percent(self):
+        return flt(self.bytes_read * 100 / self.file_size, 1) if self.file_size else 100
+
+    def update(self, processed, imported):
+        self.processed_rows += processed
+        self.imported_rows += imported
+
+
+def read_rows(path, file_format, progress=None):
+    """Yield ``(row number, claim dict or None, parse error)`` from a CSV or NDJSON file."""
+    lines = _read_lines(path, progress)
+    if file_format == "NDJSON":
+        for row, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                claim = json.loads(line)
+            except ValueError as e:
+                yield row, {"line": line.strip()}, f"Invalid JSON: {e}"
+                continue
+
+            if isinstance(claim, dict):
+                yield row, claim, None
+            else:
+                yield row, {"line": line.strip()}, "Each line must be a JSON object"
+    else:
+        # Row 1 is the header; empty cells are dropped so endpoint defaults apply
+        for row, record in enumerate(csv.DictReader(lines), 2):
+            claim = {key.strip(): value.strip() for key, value in record.items() if key and value and value.strip()}
+            if isinstance(claim.get("items"), str):
+                try:
+                    claim["items"] = json.loads(claim["items"])
+                except ValueError:
+                    yield row, claim, "items must be a JSON list"
+                    continue
+            yield row, claim, None
+
+
+def validate_rows(rows, default_invoice_type=None):
+    for row, claim, error in rows:
+        if not error:
+            if default_invoice_type and not claim.get("custom_invoice_type"):
+                claim["custom_invoice_type"] = default_invoice_type
+            error = get_purchase_invoice_payload_error(claim)
+        yield row, claim, error
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _read_lines(path, progress):
+    # Read bytes so progress can follow the file position
+    with open(path, "rb") as f:
+        for raw in f:
+            if progress:
+                progress.bytes_read += len(raw)
+            yield raw.decode("utf-8-sig")
+
+
+def _publish_progress(claims_import, progress):
+    claims_import.db_set({
+        "processed_rows": progress.processed_rows,
+        "imported_rows": progress.imported_rows,
+        "failed_rows": progress.failed_rows
+    }, update_modified=False)
+    frappe.db.commit()
+
+    frappe.publish_realtime(
+        "claims_import_progress",
+        {"name": claims_import.name, "progress": progress.percent,
+         "processed_rows": progress.processed_rows, "failed_rows": progress.failed_rows},
+        doctype="Claims Import",
+        docname=claims_import.name
+    )
+
+
+def _attach_error_file(claims_import, error_path):
+    file_name = os.path.basename(error_path)
+    error_file = frappe.get_doc({
+        "doctype": "File",
+        "file_name": file_name,
+        "file_url": f"/private/files/{file_name}",
+        "is_private": 1,
+        "attached_to_doctype": "Claims Import",
+        "attached_to_name": claims_import.name,
+        "attached_to_field": "error_file"
+    })
+    error_file.insert(ignore_permissions=True)
+    claims_import.db_set("error_file", error_file.file_url)
+
+
+def _dump(claim):
+    return json.dumps(claim, default=str)
@@ -0,0 +1,145 @@
+import frappe
+from frappe.utils import cint, flt, now
+
+from smartclaims.api.member_history import add_consolidated_claim
+
+# In consolidation mode a provider's claims for a claim month are added as item
+# lines to one draft Purchase Invoice, each line carrying its claim and member
+# number. Claims after the first are appended to the draft directly, and the
+# drafts are validated and submitted by the month-end close.
+CLAIM_HEADER_FIELDS = (
+    "bill_no", "custom_member_number", "custom_member_name", "custom_member_policy_number",
+    "custom_claim_fingerprint", "custom_duplicate_of"
+)
+# Set on lines and moved on the draft's header when a claim is appended
+LINE_AMOUNT_FIELDS = ("amount", "base_amount", "net_amount", "base_net_amount")
+HEADER_TOTAL_FIELDS = (
+    "total", "base_total", "net_total", "base_net_total", "grand_total", "base_grand_total", "outstanding_amount"
+)
+
+
+def should_consolidate(kwargs):
+    """Consolidate Claims that have a claim month; ``consolidate`` overrides the setting."""
+    if kwargs.get("custom_invoice_type") != "Claims" or not kwargs.get("custom_claim_monthyear"):
+        return False
+
+    if kwargs.get("consolidate") not in (None, ""):
+        return bool(cint(kwargs.get("consolidate")))
+
+    return bool(cint(frappe.get_cached_doc("Smartclaims Settings").consolidate_claims))
+
+
+def add_claim_to_invoice(kwargs, values, items):
+    """Append the claim's items to the provider's open invoice for its month, starting one if needed.
+
+    Returns the invoice name.
+    """
+    supplier = values["supplier"]
+    claim_month = values["custom_claim_monthyear"]
+    max_lines = cint(frappe.get_cached_doc("Smartclaims Settings").max_lines_per_invoice) or 200
+
+    # Claims of one provider are added one at a time; the lock is held until commit
+    frappe.db.sql("select name from `tabSupplier` where name = %s for update", supplier)
+
+    invoice = frappe.db.get_value(
+        "Purchase Invoice",
+        {"supplier": supplier, "custom_claim_monthyear": claim_month, "custom_consolidated": 1, "docstatus": 0},
+        ["name", "posting_date", "status"],
+        as_dict=True,
+        order_by="creation desc"
+    )
+    line_count = last_idx = 0
+    if invoice:
+        line_count, last_idx = frappe.db.sql("""
+            select count(*), ifnull(max(idx), 0) from `tabPurchase Invoice Item`
+            where parent = %s and parenttype = 'Purchase Invoice'
+        """, invoice.name)[0]
+
+    claim_number = kwargs.get("claim_number") or kwargs.get("supplier_invoice_no")
+    lines = [
+        {
+            **item,
+            "custom_claim_number": claim_number,
+            "custom_member_number": kwargs.get("custom_member_number"),
+            "custom_claim_fingerprint": values.get("custom_claim_fingerprint"),
+            "custom_duplicate_of": values.get("custom_duplicate_of")
+        }
+        for item in items
+    ]
+
+    if not invoice or line_count + len(lines) > max_lines:
+        pi_doc = frappe.get_doc({
+            "doctype": "Purchase Invoice",
+            **{key: value for key, value in values.items() if key not in CLAIM_HEADER_FIELDS},
+            "bill_no": "",
+            "custom_consolidated": 1,
+            "custom_claim_count": 1,
+            "items": lines
+        })
+        pi_doc.insert(ignore_permissions=True)
+        invoice = frappe._dict(name=pi_doc.name, posting_date=pi_doc.posting_date, status=pi_doc.status)
+    else:
+        append_claim_lines(invoice.name, last_idx, lines)
+
+    add_consolidated_claim(
+        invoice, values, claim_number, sum(flt(line.get("qty")) * flt(line.get("rate")) for line in lines)
+    )
+    return invoice.name
+
+
+def append_claim_lines(invoice, last_idx, lines):
+    """Insert a claim's lines into a draft without loading or saving the invoice.
+
+    Saving recomputes every line, so appending claim by claim would grow with
+    the invoice. The draft's totals are moved by the claim's amount instead;
+    the month-end submit validates the lines and recomputes the totals.
+    """
+    item_codes = {line["item_code"] for line in lines}
+    missing = item_codes - set(frappe.get_all("Item", filters={"name": ["in", list(item_codes)]}, pluck="name"))
+    if missing:
+        frappe.throw(f"Item {', '.join(sorted(missing))} not found", frappe.LinkValidationError)
+
+    total_qty = amount = 0
+    for idx, line in enumerate(lines, last_idx + 1):
+        line_amount = flt(flt(line.get("qty")) * flt(line.get("rate")), 2)
+        frappe.get_doc({
+            "doctype": "Purchase Invoice Item",
+            **line,
+            "parent": invoice,
+            "parenttype": "Purchase Invoice",
+            "parentfield": "items",
+            "idx": idx,
+            **{field: line_amount for field in LINE_AMOUNT_FIELDS}
+        }).db_insert()
+        total_qty += flt(line.get("qty"))
+        amount += line_amount
+
+    frappe.db.sql(f"""
+        update `tabPurchase Invoice`
+        set custom_claim_count = custom_claim_count + 1, total_qty = total_qty + %(total_qty)s,
+            {", ".join(f"{field} = {field} + %(amount)s" for field in HEADER_TOTAL_FIELDS)},
+            modified = %(modified)s, modified_by = %(user)s
+        where name = %(name)s
+    """, {"name": invoice, "total_qty": total_qty, "amount": amount, "modified": now(), "user": frappe.session.user})
+
+
+def submit_consolidated_invoices(claim_month):
+    """Submit the month's consolidated drafts, one commit each. Returns ``(submitted, failed)``."""
+    submitted = failed = 0
+    for name in frappe.get_all(
+        "Purchase Invoice",
+        filters={"custom_consolidated": 1, "custom_claim_monthyear": claim_month, "docstatus": 0},
+        pluck="name"
+    ):
+        try:
+            frappe.get_doc("Purchase Invoice", name).submit()
+            frappe.db.commit()
+            submitted += 1
+        except Exception:
+            frappe.db.rollback()
+            frappe.log_error(frappe.get_traceback(), "Consolidated Invoice Submission Error")
+            failed += 1
+        finally:
+            frappe.clear_messages()
+
+    return submitted, failed
@@ -1,9 +1,41 @@
 import frappe
-from frappe.utils import getdate
+from frappe.utils import cint, getdate
+
+from smartclaims.api.admission import admission_controlled
+from smartclaims.api.consolidation import add_claim_to_invoice, should_consolidate
+from smartclaims.api.duplicates import DuplicateClaimError, get_claim_month, parse_claim_month, screen_claim
+from smartclaims.api.idempotency import idempotent
+from smartclaims.api.instrumentation import instrumented, record_phase
+from smartclaims.api.jobs import async_capable
+from smartclaims.api.journal_batch import (
+    DEFAULT_JOURNAL_CHUNK_ROWS,
+    enqueue_journal_batch,
+    get_journal_chunk_rows,
+)
+from smartclaims.api.mapping import get_mapping_plan
+from smartclaims.api.month_close import stage_pending_adjustments
+from smartclaims.api.resolver import resolve_invoice_number
+from smartclaims.api.submission import queue_for_submission
+from smartclaims.api.sync import get_content_hash
+
+# Rows per commit for bulk claim ingestion
+BULK_CHUNK_SIZE = 200
+CLAIM_ROW_SAVEPOINT = "claim_row"
+
+WITHHOLDING_ACCOUNT = "04-04-003 - Withholding Taxes - NMICL"
+
+# Keys used to reference the Purchase Invoice and the party in journal entries
+JOURNAL_REFERENCE_KEYS = {
+    "Claims": ("invoice_number", "provider_id"),
+    "Refund": ("refund_id", "member_number")
+}
 
 # Create customer
 # api/method/smartclaims.api.create.create_company 
 @frappe.whitelist()
+@instrumented
+@admission_controlled
+@async_capable
 def create_company(**kwargs):
     try:
         company_id = kwargs.get("company_id")
@@ -16,24 +48,22 @@ def create_company(**kwargs):
         if existing:
             frappe.local.response["http_status_code"] = 409  
             return {"status": "failed", "error": f"Customer '{company_id}' already exists"}
+        record_phase("duplicate_check")
 
-        # Build customer doc with mandatory field
+        # Build customer doc, company_id maps to the mandatory customer_name
+        values = get_mapping_plan("Customer").map(kwargs)
         customer_doc = frappe.get_doc({
             "doctype": "Customer",
-            "customer_name": company_id  
+            **values,
+            "custom_content_hash": get_content_hash(values)
         })
-
-        # Map other fields from JSON
-        meta = frappe.get_meta("Customer")
-        for key, value in kwargs.items():
-            if key == "company_id":
-                continue 
-            if meta.has_field(key):
-                customer_doc.set(key, value)
+        record_phase("map")
 
         # Insert doc
         customer_doc.insert(ignore_permissions=True)
+        record_phase("insert")
         frappe.db.commit()
+        record_phase("commit")
 
         frappe.local.response["http_status_code"] = 201  
         return {"status": "success", "name": customer_doc.name}
@@ -50,6 +80,9 @@ def create_company(**kwargs):
 # Create Supplier 
 # api/method/smartclaims.api.create.create_provider
 @frappe.whitelist()
+@instrumented
+@admission_controlled
+@async_capable
 def create_provider(**kwargs):
     try:
         # Use custom_provider_id as supplier_name
@@ -63,24 +96,22 @@ def create_provider(**kwargs):
         if existing:
             frappe.local.response["http_status_code"] = 409  # Conflict
             return {"status": "failed", "error": f"Provider '{supplier_name}' already exists"}
+        record_phase("duplicate_check")
 
-        # Build supplier doc with mandatory fields
+        # Build supplier doc, custom_provider_id maps to the mandatory supplier_name
+        values = get_mapping_plan("Supplier").map(kwargs)
         supplier_doc = frappe.get_doc({
             "doctype": "Supplier",
-            "supplier_name": supplier_name
+            **values,
+            "custom_content_hash": get_content_hash(values)
         })
-
-        # Map other fields from JSON
-        meta = frappe.get_meta("Supplier")
-        for key, value in kwargs.items():
-            if key in ("supplier_name", "custom_provider_id"):
-                continue  
-            if meta.has_field(key):
-                supplier_doc.set(key, value)
+        record_phase("map")
 
         # Insert doc
         supplier_doc.insert(ignore_permissions=True)
+        record_phase("insert")
         frappe.db.commit()
+        record_phase("commit")
 
         frappe.local.response["http_status_code"] = 201  # Created
         return {"status": "success", "name": supplier_doc.name}
@@ -97,71 +128,31 @@ def create_provider(**kwargs):
 # Create Purchase Invoice
 # api/method/smartclaims.api.create.create_purchase_invoice
 @frappe.whitelist()
+@instrumented
+@admission_controlled
+@idempotent
+@async_capable
 def create_purchase_invoice(**kwargs):
     try:
         # Mandatory fields
-        invoice_type = kwargs.get("custom_invoice_type")
-        if invoice_type == "Claims":
-            supplier = kwargs.get("provider_id")
-            custom_refund_id = None
-            posting_date = kwargs.get("invoice_date")
-            if not supplier or not posting_date:
-                frappe.local.response["http_status_code"] = 400
-                return {"status": "failed", "error": "Supplier and Invoice Date are required"}
-        else:
-            supplier = kwargs.get("refund_id")  
-            custom_refund_id = kwargs.get("refund_id")
-            posting_date = kwargs.get("request_date")
-            if not custom_refund_id or not posting_date:
-                frappe.local.response["http_status_code"] = 400
-                return {"status": "failed", "error": "Refund ID and Request Date are required"}
-
-        # Create Purchase Invoice doc
-        pi_doc = frappe.get_doc({
-            "doctype": "Purchase Invoice",
-            "supplier": supplier,
-            "custom_refund_id":custom_refund_id,
-            "posting_date": posting_date,
-            "bill_no": kwargs.get("supplier_invoice_no", ""),
-            "items": []
-        })
-
-        # Add items with calculated rate if provided
-        total_qty = float(kwargs.get("total_qty", 0))
-        total_amount = float(kwargs.get("total_amount", 0))
-        default_rate = total_amount / total_qty if total_qty else 0
-        items = kwargs.get("items", [])
-        if items:
-            for item in items:
-                if "item_code" in item:
-                    pi_doc.append("items", {
-                        "item_code": item["item_code"],
-                        "qty": item.get("qty", total_qty),
-                        "rate": item.get("rate", default_rate)
-                    })
-        else:
-            # Single item if none provided
-            pi_doc.append("items", {
-                "item_code": kwargs.get("default_item_code", "Item-Default"),
-                "qty": total_qty,
-                "rate": default_rate
-            })
-
-        # Map all other fields dynamically
-        meta = frappe.get_meta("Purchase Invoice")
-        skip_fields = ("provider_id", "invoice_date", "supplier_invoice_no", "items", "total_amount", "default_item_code")
-        for key, value in kwargs.items():
-            if key in skip_fields:
-                continue
-            if meta.has_field(key):
-                pi_doc.set(key, value)
+        error = get_purchase_invoice_payload_error(kwargs)
+        if error:
+            frappe.local.response["http_status_code"] = 400
+            return {"status": "failed", "error": error}
+        record_phase("validate")
 
-        # Insert doc
-        pi_doc.insert(ignore_permissions=True)
+        # Insert doc, or add it to the provider's consolidated invoice
+        name = _insert_purchase_invoice(kwargs)
+        record_phase("insert")
         frappe.db.commit()
+        record_phase("commit")
 
         frappe.local.response["http_status_code"] = 201
-        return {"status": "success", "name": pi_doc.name}
+        return {"status": "success", "name": name}
+
+    except DuplicateClaimError as e:
+        frappe.local.response["http_status_code"] = 409
+        return {"status": "failed", "error": str(e)}
 
     except frappe.PermissionError as e:
         frappe.local.response["http_status_code"] = 403
@@ -172,9 +163,212 @@ def create_purchase_invoice(**kwargs):
         frappe.local.response["http_status_code"] = 500
         return {"status": "failed", "error": str(e)}
 
+# Create Purchase Invoices in bulk
+# api/method/smartclaims.api.create.create_purchase_invoice_bulk
+@frappe.whitelist()
+@instrumented
+@admission_controlled
+@idempotent
+@async_capable(queue="long")
+def create_purchase_invoice_bulk(**kwargs):
+    """
+    Dummy JSON Input:
+    {
+        "chunk_size": 200,
+        "claims": [
+            {
+                "custom_invoice_type": "Claims",
+                "provider_id": "01-02-00269 SUNYANI MUNICIPAL HOSPITAL",
+                "invoice_date": "2025-09-17",
+                "supplier_invoice_no": "CLM-0001",
+                "total_qty": 1,
+                "total_amount": 900
+            }
+        ]
+    }
+
+    Every claim uses the same field mapping as create_purchase_invoice. Rows are
+    inserted under their own savepoint and committed once per chunk, so a bad row
+    is reported in "results" without rolling back the rest of the batch.
+    """
+    try:
+        claims = kwargs.get("claims")
+        if isinstance(claims, str):
+            claims = frappe.parse_json(claims)
+
+        if not claims or not isinstance(claims, list):
+            frappe.local.response["http_status_code"] = 400
+            return {"status": "failed", "error": "Invalid JSON : No claims provided"}
+
+        chunk_size = cint(kwargs.get("chunk_size")) or BULK_CHUNK_SIZE
+
+        results, fingerprints = [], {}
+        for start in range(0, len(claims), chunk_size):
+            results.extend(insert_purchase_invoice_chunk(claims[start:start + chunk_size], start, fingerprints))
+            record_phase("insert")
+            frappe.db.commit()
+            record_phase("commit")
+
+        failed = sum(1 for row in results if row["status"] != 201)
+        frappe.local.response["http_status_code"] = 207 if failed else 201
+        return {
+            "status": "partial" if failed else "success",
+            "created": len(results) - failed,
+            "failed": failed,
+            "results": results
+        }
+
+    except frappe.PermissionError as e:
+        frappe.local.response["http_status_code"] = 403
+        return {"status": "failed", "error": str(e)}
+
+    except Exception as e:
+        frappe.log_error(frappe.get_traceback(), "create_purchase_invoice_bulk error")
+        frappe.local.response["http_status_code"] = 500
+        return {"status": "failed", "error": str(e)}
+
+
+def insert_purchase_invoice_chunk(claims, start=0, fingerprints=None):
+    """Insert a chunk of claim payloads, one savepoint per row, without committing.
+
+    Returns one result dict per row: ``row`` (position in the whole batch),
+    ``status`` (HTTP-style code) and either ``name`` or ``error``. Pass the same
+    ``fingerprints`` dict for every chunk of a batch to catch duplicates across
+    chunks without a lookup.
+    """
+    results = []
+    if fingerprints is None:
+        fingerprints = {}
+    for row, claim in enumerate(claims, start):
+        frappe.db.savepoint(CLAIM_ROW_SAVEPOINT)
+        try:
+            error = get_purchase_invoice_payload_error(claim)
+            if error:
+                results.append({"row": row, "status": 400, "error": error})
+                continue
+
+            name = _insert_purchase_invoice(claim, fingerprints)
+            results.append({"row": row, "status": 201, "name": name})
+
+        except DuplicateClaimError as e:
+            frappe.db.rollback(save_point=CLAIM_ROW_SAVEPOINT)
+            results.append({"row": row, "status": 409, "error": str(e)})
+
+        except frappe.PermissionError as e:
+            frappe.db.rollback(save_point=CLAIM_ROW_SAVEPOINT)
+            results.append({"row": row, "status": 403, "error": str(e)})
+
+        except frappe.ValidationError as e:
+            frappe.db.rollback(save_point=CLAIM_ROW_SAVEPOINT)
+            results.append({"row": row, "status": 400, "error": str(e)})
+
+        except Exception as e:
+            frappe.db.rollback(save_point=CLAIM_ROW_SAVEPOINT)
+            frappe.log_error(frappe.get_traceback(), "create_purchase_invoice_bulk row error")
+            results.append({"row": row, "status": 500, "error": str(e)})
+
+        finally:
+            # Don't let per-row validation messages pile up in the batch response
+            frappe.clear_messages()
+
+    return results
+
+
+def get_purchase_invoice_payload_error(kwargs):
+    if kwargs.get("custom_invoice_type") == "Claims":
+        if not kwargs.get("provider_id") or not kwargs.get("invoice_date"):
+            return "Supplier and Invoice Date are required"
+    elif not kwargs.get("refund_id") or not kwargs.get("request_date"):
+        return "Refund ID and Request Date are required"
+
+    if kwargs.get("custom_claim_monthyear") and not parse_claim_month(kwargs["custom_claim_monthyear"]):
+        return f"Invalid claim month {kwargs['custom_claim_monthyear']!r}, expected MM-YYYY"
+
+
+def _insert_purchase_invoice(kwargs, fingerprints=None):
+    """Insert the claim as its own invoice, or add it to its provider's open consolidated invoice.
+
+    ``fingerprints`` collects the fingerprints of the claims inserted by a bulk call.
+    Returns the invoice name.
+    """
+    values, items = _get_purchase_invoice_values(kwargs), get_claim_items(kwargs)
+    values.update(screen_claim(values, items, kwargs, fingerprints))
+    record_phase("duplicate_check")
+
+    if should_consolidate(kwargs):
+        name = add_claim_to_invoice(kwargs, values, items)
+    else:
+        pi_doc = _build_purchase_invoice(values, items)
+        record_phase("map")
+        pi_doc.insert(ignore_permissions=True)
+        name = pi_doc.name
+
+    if fingerprints is not None and values.get("custom_claim_fingerprint"):
+        fingerprints.setdefault(values["custom_claim_fingerprint"], name)
+    return name
+
+
+def _build_purchase_invoice(values, items):
+    # Create Purchase Invoice doc
+    pi_doc = frappe.get_doc({
+        "doctype": "Purchase Invoice",
+        "bill_no": "",
+        **values,
+        "items": []
+    })
+
+    for item in items:
+        pi_doc.append("items", item)
+
+    return pi_doc
+
+
+def _get_purchase_invoice_values(kwargs):
+    # Claims are billed to the provider, medical refunds to the refund id
+    if kwargs.get("custom_invoice_type") == "Claims":
+        values = get_mapping_plan("Claim").map(kwargs)
+        values["custom_refund_id"] = None
+    else:
+        values = get_mapping_plan("Medical Refund").map(kwargs)
+
+    # Stored as MM-YYYY, so claims of a month are found whatever format was sent
+    if values.get("custom_claim_monthyear"):
+        values["custom_claim_monthyear"] = get_claim_month(values)
+
+    return values
+
+
+def get_claim_items(kwargs):
+    # Add items with calculated rate if provided
+    total_qty = float(kwargs.get("total_qty", 0))
+    total_amount = float(kwargs.get("total_amount", 0))
+    default_rate = total_amount / total_qty if total_qty else 0
+    items = kwargs.get("items", [])
+    if items:
+        return [
+            {
+                "item_code": item["item_code"],
+                "qty": item.get("qty", total_qty),
+                "rate": item.get("rate", default_rate)
+            }
+            for item in items
+            if "item_code" in item
+        ]
+
+    # Single item if none provided
+    return [{
+        "item_code": kwargs.get("default_item_code", "Item-Default"),
+        "qty": total_qty,
+        "rate": default_rate
+    }]
+
 # Create Sales Invoice
 # api/method/smartclaims.api.create.create_sales_invoice
 @frappe.whitelist()
+@instrumented
+@admission_controlled
+@idempotent
+@async_capable
 def create_sales_invoice(**kwargs):
     try:
         # Mandatory fields
@@ -233,14 +427,21 @@ def create_sales_invoice(**kwargs):
 
         # Set total manually if needed
         si_doc.set("custom_current_invoice_amount", kwargs.get("current_invoice_amount", 0))
+        record_phase("map")
 
-        # Insert doc
+        # Insert doc, submit now or leave it to the batch submitter
         si_doc.insert(ignore_permissions=True)
-        si_doc.submit()
+        record_phase("insert")
+        if cint(kwargs.get("defer_submit")):
+            queue_for_submission(si_doc)
+        else:
+            si_doc.submit()
+        record_phase("submit")
         frappe.db.commit()
+        record_phase("commit")
 
         frappe.local.response["http_status_code"] = 201
-        return {"status": "success", "name": si_doc.name}
+        return {"status": "success", "name": si_doc.name, "docstatus": si_doc.docstatus}
 
     except frappe.PermissionError as e:
         frappe.local.response["http_status_code"] = 403
@@ -254,6 +455,10 @@ def create_sales_invoice(**kwargs):
 # Create Credit Note
 # api/method/smartclaims.api.create.create_credit_note
 @frappe.whitelist()
+@instrumented
+@admission_controlled
+@idempotent
+@async_capable
 def create_credit_note(**kwargs):
     try:
         invoice_number = kwargs.get("invoice_number")
@@ -264,37 +469,34 @@ def create_credit_note(**kwargs):
             frappe.local.response["http_status_code"] = 400
             return {"status": "failed", "error": "Invoice Number and Insurance Type are required"}
 
-        # 🔹 Check for duplicates
-        # sales_invoice = frappe.get_all(
-        #     "Sales Invoice",
-        #     filters={"name": invoice_number},  # or use custom_invoice_number if that's your field
-        #     pluck="name"
-        # )
-        sales_invoice = frappe.get_all(
-            "Sales Invoice",
-            filters={"custom_invoice_number": invoice_number}, 
-            pluck="custom_invoice_number"
-        )
+        # 🔹 Resolve the Sales Invoice the credit note is raised against
+        sales_invoice = resolve_invoice_number(invoice_number)
         if not sales_invoice:
             frappe.local.response["http_status_code"] = 404
             return {"status": "failed", "error": f"Invoice Number '{invoice_number}' not found"}
+        record_phase("resolve")
 
-        # 🔹 Build Credit Note doc
-        credit_note_doc = frappe.get_doc({"doctype": "Credit Note"})
-        meta = frappe.get_meta("Credit Note")
-
-        # Map only valid fields from kwargs
-        for key, value in kwargs.items():
-            if meta.has_field(key):
-                credit_note_doc.set(key, value)
+        # 🔹 Build Credit Note doc, mapping only valid fields from kwargs
+        credit_note_doc = frappe.get_doc({
+            "doctype": "Credit Note",
+            **get_mapping_plan("Credit Note").map(kwargs),
+            "sales_invoice": sales_invoice.name
+        })
+        record_phase("map")
 
-        # 🔹 Insert doc
+        # 🔹 Insert doc, submit now or leave it to the batch submitter
         credit_note_doc.insert(ignore_permissions=True)
-        credit_note_doc.submit()
+        record_phase("insert")
+        if cint(kwargs.get("defer_submit")):
+            queue_for_submission(credit_note_doc)
+        else:
+            credit_note_doc.submit()
+        record_phase("submit")
         frappe.db.commit()
+        record_phase("commit")
 
         frappe.local.response["http_status_code"] = 201
-        return {"status": "success", "name": credit_note_doc.name}
+        return {"status": "success", "name": credit_note_doc.name, "docstatus": credit_note_doc.docstatus}
 
     except frappe.PermissionError as e:
         frappe.local.response["http_status_code"] = 403
@@ -308,6 +510,10 @@ def create_credit_note(**kwargs):
 
 
 @frappe.whitelist()
+@instrumented
+@admission_controlled
+@idempotent
+@async_capable(queue="long")
 def create_rejected_journal_entry(**kwargs):
     """
     Dummy JSON Input:
@@ -325,77 +531,14 @@ def create_rejected_journal_entry(**kwargs):
         ]
     }
     """
-    try:
-        # Parse entries JSON string if passed as string
-        entries = kwargs.get("accounts")
-        if isinstance(entries, str):
-            entries = frappe.parse_json(entries)
+    return _create_journal_entry(kwargs, "Rejection Journal", "Claims", "Rejection Journal Entry API Error")
 
-        if not entries:
-            frappe.local.response["http_status_code"] = 400
-            return {"success": False, "message": "Invalid JSON : No entries provided"}
 
-        # Create parent Journal Entry
-        je = frappe.new_doc("Journal Entry")
-        je.posting_date = getdate(kwargs.get("approval_date"))
-        je.custom_type =  "Rejection Journal"
-        je.custom_journal_number = kwargs.get("journal_number")
-        je.voucher_type = "Journal Entry"
-        je.custom_journal_type = "Claims" 
-
-        # Add child rows
-        for entry in entries:
-            pi_account = frappe.get_doc("Purchase Invoice", entry.get("invoice_number"))
-            if not pi_account.credit_to:
-                frappe.local.response["http_status_code"] = 400
-                return {"success": False, "message": f"Purchase Invoice {entry.get('provider_id')} has no account set"}    
-                
-
-            je.append("accounts", {
-                "account": pi_account.credit_to,
-                "party_type": "Supplier",
-                "party": entry.get("provider_id"),
-                "reference_type": "Purchase Invoice",
-                "reference_name": entry.get("invoice_number"),
-                "debit_in_account_currency": entry.get("debit", 0),
-                "credit_in_account_currency": 0
-            })
-
-            # --- Credit row (Expense account from Purchase Invoice) ---
-            if entry.get("invoice_number"):
-                try:
-                    pi_doc = frappe.get_doc("Purchase Invoice", entry.get("invoice_number"))
-                    expense_account = None
-                    if pi_doc.get("items"):
-                        expense_account = pi_doc.items[0].get("expense_account")
-                    
-                    if not expense_account:
-                        frappe.local.response["http_status_code"] = 400
-                        return {"success": False, "message": f"Purchase Invoice {entry.get('invoice_number')} has no expense account set"}  
-                    
-                    je.append("accounts", {
-                        "account": expense_account or "",
-                        "debit_in_account_currency": 0,
-                        "credit_in_account_currency": entry.get("credit", 0)
-                    })
-
-                except frappe.DoesNotExistError:
-                    frappe.local.response["http_status_code"] = 404
-                    return {"success": False, "message": f"Purchase Invoice {entry.get('invoice_number')} not found"}
-
-        je.insert(ignore_permissions=True)
-        je.submit()
-        frappe.db.commit()
-
-        frappe.local.response["http_status_code"] = 201
-        return {"success": True, "message": "Journal Entry created Successfully", "Journal Entry":je.as_dict()}
-
-    except Exception as e:
-        frappe.log_error(frappe.get_traceback(), "Rejection Journal Entry API Error")
-        frappe.local.response["http_status_code"] = 500
-        return {"success": False, "message": str(e)}
-    
 @frappe.whitelist()
+@instrumented
+@admission_controlled
+@idempotent
+@async_capable(queue="long")
 def create_withholding_journal_entry(**kwargs):
     """
     Dummy JSON Input:
@@ -413,64 +556,14 @@ def create_withholding_journal_entry(**kwargs):
         ]
     }
     """
-    try:
-        # Parse entries JSON string if passed as string
-        entries = kwargs.get("accounts")
-        if isinstance(entries, str):
-            entries = frappe.parse_json(entries)
+    return _create_journal_entry(kwargs, "Withholding Journal", "Claims", "Withholding Journal Entry API Error")
 
-        if not entries:
-            frappe.local.response["http_status_code"] = 400
-            return {"success": False, "message": "Invalid JSON : No entries provided"}
-
-        # Create parent Journal Entry
-        je = frappe.new_doc("Journal Entry")
-        je.posting_date = getdate(kwargs.get("approval_date"))
-        je.custom_type =  "Withholding Journal"
-        je.custom_journal_number = kwargs.get("journal_number")
-        je.voucher_type = "Journal Entry"
-        je.custom_journal_type = "Claims" 
 
-        # Add child rows
-        for entry in entries:
-            pi_account = frappe.get_doc("Purchase Invoice", entry.get("invoice_number"))
-            if not pi_account.credit_to:
-                frappe.local.response["http_status_code"] = 400
-                return {"success": False, "message": f"Purchase Invoice {entry.get('provider_id')} has no account set"}    
-                
-
-            je.append("accounts", {
-                "account": pi_account.credit_to,
-                "party_type": "Supplier",
-                "party": entry.get("provider_id"),
-                "reference_type": "Purchase Invoice",
-                "reference_name": entry.get("invoice_number"),
-                "debit_in_account_currency": entry.get("debit", 0),
-                "credit_in_account_currency": 0
-            })
-
-            # Withholding Account
-            je.append("accounts", {
-                        "account": "04-04-003 - Withholding Taxes - NMICL" or "",
-                        "debit_in_account_currency": 0,
-                        "credit_in_account_currency": entry.get("credit", 0)
-                    })
-                        
-        je.insert(ignore_permissions=True)
-        je.submit()
-        frappe.db.commit()
-
-        frappe.local.response["http_status_code"] = 201
-        return {"success": True, "message": "Journal Entry created Successfully", "Journal Entry":je.as_dict()}
-
-    except Exception as e:
-        frappe.log_error(frappe.get_traceback(), "Withholding Journal Entry API Error")
-        frappe.local.response["http_status_code"] = 500
-        return {"success": False, "message": str(e)}
-    
-    
-    
 @frappe.whitelist()
+@instrumented
+@admission_controlled
+@idempotent
+@async_capable(queue="long")
 def create_adjustment_journal_entry(**kwargs):
     """
     Dummy JSON Input:
@@ -488,79 +581,14 @@ def create_adjustment_journal_entry(**kwargs):
         ]
     }
     """
-    try:
-        # Parse entries JSON string if passed as string
-        entries = kwargs.get("accounts")
-        if isinstance(entries, str):
-            entries = frappe.parse_json(entries)
-
-        if not entries:
-            frappe.local.response["http_status_code"] = 400
-            return {"success": False, "message": "Invalid JSON : No entries provided"}
-
-        # Create parent Journal Entry
-        je = frappe.new_doc("Journal Entry")
-        je.posting_date = getdate(kwargs.get("approval_date"))
-        je.custom_type =  "Adjustment Journal"
-        je.custom_journal_number = kwargs.get("journal_number")
-        je.voucher_type = "Journal Entry"
-        je.custom_journal_type = "Claims" 
-
-        # Add child rows
-        for entry in entries:
-            pi_account = frappe.get_doc("Purchase Invoice", entry.get("invoice_number"))
-            if not pi_account.credit_to:
-                frappe.local.response["http_status_code"] = 400
-                return {"success": False, "message": f"Purchase Invoice {entry.get('provider_id')} has no account set"}    
-                
-
-            je.append("accounts", {
-                "account": pi_account.credit_to,
-                "party_type": "Supplier",
-                "party": entry.get("provider_id"),
-                "reference_type": "Purchase Invoice",
-                "reference_name": entry.get("invoice_number"),
-                "credit_in_account_currency": entry.get("credit", 0),
-                "debit_in_account_currency": 0
-            })
-
-           # --- Credit row (Expense account from Purchase Invoice) ---
-            if entry.get("invoice_number"):
-                try:
-                    pi_doc = frappe.get_doc("Purchase Invoice", entry.get("invoice_number"))
-                    expense_account = None
-                    if pi_doc.get("items"):
-                        expense_account = pi_doc.items[0].get("expense_account")
-                    
-                    if not expense_account:
-                        frappe.local.response["http_status_code"] = 400
-                        return {"success": False, "message": f"Purchase Invoice {entry.get('invoice_number')} has no expense account set"}  
-                    
-                    je.append("accounts", {
-                        "account": expense_account or "",
-                        "credit_in_account_currency": 0,
-                        "debit_in_account_currency": entry.get("debit", 0)
-                    })
-
-                except frappe.DoesNotExistError:
-                    frappe.local.response["http_status_code"] = 404
-                    return {"success": False, "message": f"Purchase Invoice {entry.get('invoice_number')} not found"}
-                
-                
-        je.insert(ignore_permissions=True)
-        je.submit()
-        frappe.db.commit()
-
-        frappe.local.response["http_status_code"] = 201
-        return {"success": True, "message": "Journal Entry created Successfully", "Journal Entry":je.as_dict()}
-
-    except Exception as e:
-        frappe.log_error(frappe.get_traceback(), "Adjustment Journal Entry API Error")
-        frappe.local.response["http_status_code"] = 500
-        return {"success": False, "message": str(e)}
+    return _create_journal_entry(kwargs, "Adjustment Journal", "Claims", "Adjustment Journal Entry API Error")
 
 
 @frappe.whitelist()
+@instrumented
+@admission_controlled
+@idempotent
+@async_capable(queue="long")
 def create_refund_rejected_journal_entry(**kwargs):
     """
     Dummy JSON Input:
@@ -578,79 +606,14 @@ def create_refund_rejected_journal_entry(**kwargs):
         ]
     }
     """
-    try:
-        # Parse entries JSON string if passed as string
-        entries = kwargs.get("accounts")
-        if isinstance(entries, str):
-            entries = frappe.parse_json(entries)
+    return _create_journal_entry(kwargs, "Rejection Journal", "Refund", "Rejection Refund Journal Entry API Error")
 
-        if not entries:
-            frappe.local.response["http_status_code"] = 400
-            return {"success": False, "message": "Invalid JSON : No entries provided"}
-
-        # Create parent Journal Entry
-        je = frappe.new_doc("Journal Entry")
-        je.posting_date = getdate(kwargs.get("approval_date"))
-        je.custom_type =  "Rejection Journal"
-        je.custom_journal_number = kwargs.get("journal_number")
-        je.voucher_type = "Journal Entry"   
-        je.custom_journal_type = "Refund" 
-
-
-        # Add child rows
-        for entry in entries:
-            pi_account = frappe.get_doc("Purchase Invoice", entry.get("refund_id"))
-            if not pi_account.credit_to:
-                frappe.local.response["http_status_code"] = 400
-                return {"success": False, "message": f"Purchase Invoice {entry.get('member_number')} has no account set"}    
-                
-
-            je.append("accounts", {
-                "account": pi_account.credit_to,
-                "party_type": "Supplier",
-                "party": entry.get("member_number"),
-                "reference_type": "Purchase Invoice",
-                "reference_name": entry.get("refund_id"),
-                "debit_in_account_currency": entry.get("debit", 0),
-                "credit_in_account_currency": 0
-            })
-
-            # --- Credit row (Expense account from Purchase Invoice) ---
-            if entry.get("refund_id"):
-                try:
-                    pi_doc = frappe.get_doc("Purchase Invoice", entry.get("refund_id"))
-                    expense_account = None
-                    if pi_doc.get("items"):
-                        expense_account = pi_doc.items[0].get("expense_account")
-                    
-                    if not expense_account:
-                        frappe.local.response["http_status_code"] = 400
-                        return {"success": False, "message": f"Purchase Invoice {entry.get('refund_id')} has no expense account set"}  
-                    
-                    je.append("accounts", {
-                        "account": expense_account or "",
-                        "debit_in_account_currency": 0,
-                        "credit_in_account_currency": entry.get("credit", 0)
-                    })
-
-                except frappe.DoesNotExistError:
-                    frappe.local.response["http_status_code"] = 404
-                    return {"success": False, "message": f"Purchase Invoice {entry.get('refund_id')} not found"}
-
-        je.insert(ignore_permissions=True)
-        je.submit()
-        frappe.db.commit()
-
-        frappe.local.response["http_status_code"] = 201
-        return {"success": True, "message": "Journal Entry created Successfully", "Journal Entry":je.as_dict()}
-
-    except Exception as e:
-        frappe.log_error(frappe.get_traceback(), "Rejection Refund Journal Entry API Error")
-        frappe.local.response["http_status_code"] = 500
-        return {"success": False, "message": str(e)}
-    
 
 @frappe.whitelist()
+@instrumented
+@admission_controlled
+@idempotent
+@async_capable(queue="long")
 def create_refund_withholding_journal_entry(**kwargs):
     """
     Dummy JSON Input:
@@ -668,63 +631,14 @@ def create_refund_withholding_journal_entry(**kwargs):
         ]
     }
     """
-    try:
-        # Parse entries JSON string if passed as string
-        entries = kwargs.get("accounts")
-        if isinstance(entries, str):
-            entries = frappe.parse_json(entries)
+    return _create_journal_entry(kwargs, "Withholding Journal", "Refund", "Withholding Journal Entry API Error")
 
-        if not entries:
-            frappe.local.response["http_status_code"] = 400
-            return {"success": False, "message": "Invalid JSON : No entries provided"}
-
-        # Create parent Journal Entry
-        je = frappe.new_doc("Journal Entry")
-        je.posting_date = getdate(kwargs.get("approval_date"))
-        je.custom_type =  "Withholding Journal"
-        je.custom_journal_number = kwargs.get("journal_number")
-        je.voucher_type = "Journal Entry"
-        je.custom_journal_type = "Refund" 
-
-        # Add child rows
-        for entry in entries:
-            pi_account = frappe.get_doc("Purchase Invoice", entry.get("refund_id"))
-            if not pi_account.credit_to:
-                frappe.local.response["http_status_code"] = 400
-                return {"success": False, "message": f"Purchase Invoice {entry.get('member_number')} has no account set"}    
-                
-
-            je.append("accounts", {
-                "account": pi_account.credit_to,
-                "party_type": "Supplier",
-                "party": entry.get("member_number"),
-                "reference_type": "Purchase Invoice",
-                "reference_name": entry.get("refund_id"),
-                "debit_in_account_currency": entry.get("debit", 0),
-                "credit_in_account_currency": 0
-            })
-
-            # Withholding Account
-            je.append("accounts", {
-                        "account": "04-04-003 - Withholding Taxes - NMICL" or "",
-                        "debit_in_account_currency": 0,
-                        "credit_in_account_currency": entry.get("credit", 0)
-                    })
-                        
-        je.insert(ignore_permissions=True)
-        je.submit()
-        frappe.db.commit()
-
-        frappe.local.response["http_status_code"] = 201
-        return {"success": True, "message": "Journal Entry created Successfully", "Journal Entry":je.as_dict()}
 
-    except Exception as e:
-        frappe.log_error(frappe.get_traceback(), "Withholding Journal Entry API Error")
-        frappe.local.response["http_status_code"] = 500
-        return {"success": False, "message": str(e)}
-    
-    
 @frappe.whitelist()
+@instrumented
+@admission_controlled
+@idempotent
+@async_capable(queue="long")
 def create_refund_adjustment_journal_entry(**kwargs):
     """
     Dummy JSON Input:
@@ -742,6 +656,10 @@ def create_refund_adjustment_journal_entry(**kwargs):
         ]
     }
     """
+    return _create_journal_entry(kwargs, "Adjustment Journal", "Refund", "Adjustment Journal Entry API Error")
+
+
+def _create_journal_entry(kwargs, custom_type, journal_type, error_title):
     try:
         # Parse entries JSON string if passed as string
         entries = kwargs.get("accounts")
@@ -752,63 +670,159 @@ def create_refund_adjustment_journal_entry(**kwargs):
             frappe.local.response["http_status_code"] = 400
             return {"success": False, "message": "Invalid JSON : No entries provided"}
 
+        account_pairs, errors = get_journal_account_rows(entries, custom_type, journal_type)
+        if errors:
+            frappe.local.response["http_status_code"] = 400
+            return {
+                "success": False,
+                "message": f"{len(errors)} journal row(s) reference invalid Purchase Invoices",
+                "errors": errors
+            }
+        record_phase("resolve")
+
+        # Staged for the month-end close instead of posting a Journal Entry now
+        if kwargs.get("mode") == "pending":
+            staged, errors = stage_pending_adjustments(kwargs, custom_type, journal_type, account_pairs)
+            if errors:
+                frappe.local.response["http_status_code"] = 400
+                return {"success": False, "message": f"{len(errors)} journal row(s) have no claim month", "errors": errors}
+            frappe.db.commit()
+
+            frappe.local.response["http_status_code"] = 202
+            return {"success": True, "message": f"{staged} adjustment(s) staged for the month-end close", "staged": staged}
+
+        # Opt-in: split=1, or a Max Rows per Journal Entry setting the journal is over,
+        # splits it into balanced chunks posted in the background
+        chunk_rows = get_journal_chunk_rows()
+        if cint(kwargs.get("split")) or (chunk_rows and len(account_pairs) * 2 > chunk_rows):
+            batch = enqueue_journal_batch(
+                kwargs, custom_type, journal_type, account_pairs, chunk_rows or DEFAULT_JOURNAL_CHUNK_ROWS
+            )
+            frappe.db.commit()
+
+            frappe.local.response["http_status_code"] = 202
+            return {
+                "success": True,
+                "message": f"Journal split into {batch.chunk_count} Journal Entries queued for posting",
+                "batch": batch.name,
+                "chunks": batch.chunk_count
+            }
+
         # Create parent Journal Entry
         je = frappe.new_doc("Journal Entry")
         je.posting_date = getdate(kwargs.get("approval_date"))
-        je.custom_type =  "Adjustment Journal"
+        je.custom_type = custom_type
         je.custom_journal_number = kwargs.get("journal_number")
         je.voucher_type = "Journal Entry"
-        je.custom_journal_type = "Refund" 
+        je.custom_journal_type = journal_type
 
         # Add child rows
-        for entry in entries:
-            pi_account = frappe.get_doc("Purchase Invoice", entry.get("refund_id"))
-            if not pi_account.credit_to:
-                frappe.local.response["http_status_code"] = 400
-                return {"success": False, "message": f"Purchase Invoice {entry.get('member_number')} has no account set"}    
-                
-
-            je.append("accounts", {
-                "account": pi_account.credit_to,
-                "party_type": "Supplier",
-                "party": entry.get("member_number"),
-                "reference_type": "Purchase Invoice",
-                "reference_name": entry.get("refund_id"),
-                "credit_in_account_currency": entry.get("credit", 0),
-                "debit_in_account_currency": 0
-            })
-
-           # --- Credit row (Expense account from Purchase Invoice) ---
-            if entry.get("refund_id"):
-                try:
-                    pi_doc = frappe.get_doc("Purchase Invoice", entry.get("refund_id"))
-                    expense_account = None
-                    if pi_doc.get("items"):
-                        expense_account = pi_doc.items[0].get("expense_account")
-                    
-                    if not expense_account:
-                        frappe.local.response["http_status_code"] = 400
-                        return {"success": False, "message": f"Purchase Invoice {entry.get('refund_id')} has no expense account set"}  
-                    
-                    je.append("accounts", {
-                        "account": expense_account or "",
-                        "credit_in_account_currency": 0,
-                        "debit_in_account_currency": entry.get("debit", 0)
-                    })
-
-                except frappe.DoesNotExistError:
-                    frappe.local.response["http_status_code"] = 404
-                    return {"success": False, "message": f"Purchase Invoice {entry.get('refund_id')} not found"}
-                
-                
+        for party_row, counter_row in account_pairs:
+            je.append("accounts", party_row)
+            je.append("accounts", counter_row)
+        record_phase("map")
+
         je.insert(ignore_permissions=True)
+        record_phase("insert")
         je.submit()
+        record_phase("submit")
         frappe.db.commit()
+        record_phase("commit")
 
         frappe.local.response["http_status_code"] = 201
         return {"success": True, "message": "Journal Entry created Successfully", "Journal Entry":je.as_dict()}
 
     except Exception as e:
-        frappe.log_error(frappe.get_traceback(), "Adjustment Journal Entry API Error")
+        frappe.log_error(frappe.get_traceback(), error_title)
         frappe.local.response["http_status_code"] = 500
         return {"success": False, "message": str(e)}
+
+
+def get_journal_account_rows(entries, custom_type, journal_type):
+    """Build the balanced (party row, counter row) pair for every journal entry.
+
+    All referenced Purchase Invoices are resolved up front, so the whole journal
+    costs two queries instead of one or two document loads per entry. Returns
+    ``(pairs, errors)``; ``errors`` lists every row that could not be resolved.
+    """
+    invoice_key, party_key = JOURNAL_REFERENCE_KEYS[journal_type]
+    needs_expense_account = custom_type != "Withholding Journal"
+
+    invoice_names = {entry.get(invoice_key) for entry in entries if entry.get(invoice_key)}
+    accounts = get_purchase_invoice_accounts(invoice_names, needs_expense_account)
+
+    pairs, errors = [], []
+    for row, entry in enumerate(entries, 1):
+        invoice_number = entry.get(invoice_key)
+        error = None
+        if not invoice_number:
+            error = f"Row {row} has no {invoice_key}"
+        elif invoice_number not in accounts:
+            error = f"Purchase Invoice {invoice_number} not found"
+        elif not accounts[invoice_number].credit_to:
+            error = f"Purchase Invoice {invoice_number} has no account set"
+        elif needs_expense_account and not accounts[invoice_number].expense_account:
+            error = f"Purchase Invoice {invoice_number} has no expense account set"
+
+        if error:
+            errors.append({"row": row, invoice_key: invoice_number, "error": error})
+            continue
+
+        pi_account = accounts[invoice_number]
+        debit = entry.get("debit", 0)
+        credit = entry.get("credit", 0)
+
+        party_row = {
+            "account": pi_account.credit_to,
+            "party_type": "Supplier",
+            "party": entry.get(party_key),
+            "reference_type": "Purchase Invoice",
+            "reference_name": invoice_number
+        }
+        counter_row = {
+            # Withholding goes to the withholding tax account, everything else
+            # against the expense account of the invoice's first item
+            "account": pi_account.expense_account if needs_expense_account else WITHHOLDING_ACCOUNT
+        }
+
+        # Adjustments increase the payable, rejections and withholdings reduce it
+        if custom_type == "Adjustment Journal":
+            party_row.update({"credit_in_account_currency": credit, "debit_in_account_currency": 0})
+            counter_row.update({"credit_in_account_currency": 0, "debit_in_account_currency": debit})
+        else:
+            party_row.update({"debit_in_account_currency": debit, "credit_in_account_currency": 0})
+            counter_row.update({"debit_in_account_currency": 0, "credit_in_account_currency": credit})
+
+        pairs.append((party_row, counter_row))
+
+    return pairs, errors
+
+
+def get_purchase_invoice_accounts(invoice_names, with_expense_account=True):
+    """Return ``{invoice name: {credit_to, expense_account}}`` for the given invoices.
+
+    ``expense_account`` is taken from the first item row, same as ``pi_doc.items[0]``.
+    """
+    invoice_names = list(invoice_names)
+    if not invoice_names:
+        return {}
+
+    accounts = {
+        d.name: frappe._dict(credit_to=d.credit_to, expense_account=None)
+        for d in frappe.get_all(
+            "Purchase Invoice",
+            filters={"name": ["in", invoice_names]},
+            fields=["name", "credit_to"]
+        )
+    }
+
+    if with_expense_account and accounts:
+        for item in frappe.get_all(
+            "Purchase Invoice Item",
+            filters={"parenttype": "Purchase Invoice", "parent": ["in", list(accounts)], "idx": 1},
+            fields=["parent", "expense_account"],
+            parent_doctype="Purchase Invoice"
+        ):
+            accounts[item.parent].expense_account = item.expense_account
+
+    return accounts
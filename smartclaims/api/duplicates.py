@@ -0,0 +1,234 @@
+import hashlib
+import re
+from collections import defaultdict
+
+import frappe
+from frappe.utils import add_months, flt, getdate, now, nowdate
+
+# Every claim gets a fingerprint at insert time: a hash of the normalised member
+# number, provider, claim month, amount and (optionally) its diagnosis/service
+# codes. It is stored in an indexed column on the invoice, or on the item lines
+# of a consolidated invoice, so an exact resubmission is found with one index
+# lookup. Claims that differ slightly are left to the near-duplicate scan.
+CANDIDATE_DOCTYPE = "Duplicate Claim Candidate"
+CANDIDATE_FIELDS = (
+    "name", "pair_key", "claim_month", "member_number", "match_type", "status",
+    "purchase_invoice", "claim_number", "supplier", "amount",
+    "duplicate_of", "duplicate_claim_number", "duplicate_supplier", "duplicate_amount"
+)
+
+
+class DuplicateClaimError(frappe.ValidationError):
+    http_status_code = 409
+
+
+def screen_claim(values, items, kwargs, batch=None):
+    """Fingerprint a claim and look for an earlier claim with the same fingerprint.
+
+    ``batch`` maps fingerprints to the invoices already inserted by the current
+    bulk call. Returns the fields to set on the claim, or raises
+    DuplicateClaimError when the settings say to reject duplicates.
+    """
+    fingerprint = get_claim_fingerprint(values, items, _get_service_codes(kwargs))
+    if not fingerprint:
+        return {}
+
+    duplicate_of = (batch or {}).get(fingerprint) or find_claim_by_fingerprint(fingerprint)
+    if duplicate_of and frappe.get_cached_doc("Smartclaims Settings").duplicate_claim_action == "Reject":
+        raise DuplicateClaimError(f"Duplicate of claim {duplicate_of}")
+
+    return {"custom_claim_fingerprint": fingerprint, "custom_duplicate_of": duplicate_of}
+
+
+def get_claim_fingerprint(values, items, service_codes=None):
+    """Fingerprint of mapped Purchase Invoice values; None without a member number."""
+    member_number = _normalize_code(values.get("custom_member_number"))
+    if not member_number or not values.get("supplier"):
+        return None
+
+    amount = sum(flt(item.get("qty")) * flt(item.get("rate")) for item in items)
+    parts = (
+        member_number,
+        " ".join(values["supplier"].split()).casefold(),
+        get_claim_month(values),
+        f"{flt(amount, 2):.2f}",
+        ",".join(sorted({_normalize_code(code) for code in service_codes or ()} - {""}))
+    )
+    return hashlib.sha256("|".join(parts).encode()).hexdigest()
+
+
+def get_claim_month(values):
+    """Claim month as MM-YYYY, from custom_claim_monthyear or, when it is empty, the posting date.
+
+    Raises ValidationError for a claim month that is set but can't be parsed.
+    """
+    claim_month = (values.get("custom_claim_monthyear") or "").strip()
+    if not claim_month:
+        return getdate(values.get("posting_date") or nowdate()).strftime("%m-%Y")
+
+    if normalized := parse_claim_month(claim_month):
+        return normalized
+    frappe.throw(f"Invalid claim month {claim_month!r}, expected MM-YYYY")
+
+
+def parse_claim_month(claim_month):
+    """Return ``claim_month`` (MM-YYYY, M/YYYY, YYYY-MM, ...) as MM-YYYY, or None if it isn't a month."""
+    claim_month = (claim_month or "").strip()
+    if match := re.fullmatch(r"(\d{1,2})\D+(\d{4})", claim_month):
+        month, year = match.groups()
+    elif match := re.fullmatch(r"(\d{4})\D+(\d{1,2})", claim_month):
+        year, month = match.groups()
+    else:
+        return None
+
+    return f"{int(month):02d}-{year}" if 1 <= int(month) <= 12 else None
+
+
+def find_claim_by_fingerprint(fingerprint):
+    # Standalone claims carry the fingerprint on the invoice, consolidated ones on their lines
+    rows = frappe.db.sql("""
+        (select name from `tabPurchase Invoice`
+        where custom_claim_fingerprint = %(fingerprint)s and docstatus < 2
+        limit 1)
+        union all
+        (select parent from `tabPurchase Invoice Item`
+        where custom_claim_fingerprint = %(fingerprint)s and docstatus < 2 and parenttype = 'Purchase Invoice'
+        limit 1)
+        limit 1
+    """, {"fingerprint": fingerprint})
+    return rows[0][0] if rows else None
+
+
+# Scan a claim month for possible duplicate claims
+# api/method/smartclaims.api.duplicates.scan_duplicate_claims
+@frappe.whitelist()
+def scan_duplicate_claims(claim_month):
+    """
+    Dummy JSON Input:
+    {
+        "claim_month": "09-2025"
+    }
+    """
+    try:
+        frappe.only_for("System Manager")
+
+        claim_month = get_claim_month({"custom_claim_monthyear": claim_month})
+        frappe.enqueue(
+            "smartclaims.api.duplicates.find_duplicate_claims",
+            queue="long",
+            job_id=f"smartclaims_duplicate_scan|{claim_month}",
+            deduplicate=True,
+            claim_month=claim_month
+        )
+
+        frappe.local.response["http_status_code"] = 202
+        return {"status": "queued", "claim_month": claim_month}
+
+    except frappe.PermissionError as e:
+        frappe.local.response["http_status_code"] = 403
+        return {"status": "failed", "error": str(e)}
+
+    except frappe.ValidationError as e:
+        frappe.local.response["http_status_code"] = 400
+        return {"status": "failed", "error": str(e)}
+
+    except Exception as e:
+        frappe.log_error(frappe.get_traceback(), "scan_duplicate_claims error")
+        frappe.local.response["http_status_code"] = 500
+        return {"status": "failed", "error": str(e)}
+
+
+def scan_recent_duplicate_claims():
+    """Scheduler job: scan the current and the previous claim month."""
+    for months in (0, -1):
+        find_duplicate_claims(getdate(add_months(nowdate(), months)).strftime("%m-%Y"))
+
+
+def find_duplicate_claims(claim_month):
+    """Record pairs of a month's claims that look like duplicates as Duplicate Claim Candidates.
+
+    Claims are blocked by member and invoice type, and each block is sorted by
+    amount, so only neighbours within the amount tolerance are compared instead
+    of every pair of the month. Pairs already recorded are skipped.
+    """
+    tolerance = flt(frappe.get_cached_doc("Smartclaims Settings").near_duplicate_tolerance) / 100
+    blocks = defaultdict(list)
+    for claim in get_month_claims(claim_month):
+        blocks[(claim.member_number, claim.invoice_type)].append(claim)
+
+    candidates = []
+    for block in blocks.values():
+        block.sort(key=lambda claim: flt(claim.amount))
+        for position, claim in enumerate(block):
+            for other in block[position + 1:]:
+                amount, other_amount = flt(claim.amount), flt(other.amount)
+                if other_amount - amount > tolerance * max(abs(amount), abs(other_amount)):
+                    break
+                candidates.append(_get_candidate(claim_month, claim, other))
+
+    timestamp, user = now(), frappe.session.user
+    for start in range(0, len(candidates), 1000):
+        frappe.db.bulk_insert(
+            CANDIDATE_DOCTYPE,
+            fields=[*CANDIDATE_FIELDS, "creation", "modified", "owner", "modified_by"],
+            values=[(*candidate, timestamp, timestamp, user, user) for candidate in candidates[start:start + 1000]],
+            ignore_duplicates=True
+        )
+    frappe.db.commit()
+
+    return len(candidates)
+
+
+def get_month_claims(claim_month):
+    # One row per claim: standalone invoices, and the claims inside consolidated ones
+    return frappe.db.sql("""
+        select name as purchase_invoice, bill_no as claim_number, custom_member_number as member_number,
+            supplier, custom_invoice_type as invoice_type, grand_total as amount,
+            custom_claim_fingerprint as fingerprint
+        from `tabPurchase Invoice`
+        where custom_claim_monthyear = %(claim_month)s and docstatus < 2 and custom_consolidated = 0
+            and ifnull(custom_member_number, '') != ''
+        union all
+        select item.parent, item.custom_claim_number, item.custom_member_number,
+            pi.supplier, pi.custom_invoice_type, sum(item.amount), max(item.custom_claim_fingerprint)
+        from `tabPurchase Invoice Item` item
+        join `tabPurchase Invoice` pi on pi.name = item.parent
+        where pi.custom_claim_monthyear = %(claim_month)s and pi.docstatus < 2 and pi.custom_consolidated = 1
+            and ifnull(item.custom_member_number, '') != ''
+        group by item.parent, item.custom_claim_number, item.custom_member_number
+    """, {"claim_month": claim_month}, as_dict=True)
+
+
+def _get_candidate(claim_month, claim, other):
+    # The earlier invoice is the one the other claim may duplicate
+    first, second = sorted((claim, other), key=lambda row: (row.purchase_invoice, row.claim_number or ""))
+    pair_key = hashlib.md5(
+        f"{first.purchase_invoice}|{first.claim_number}|{second.purchase_invoice}|{second.claim_number}".encode()
+    ).hexdigest()
+
+    if first.fingerprint and first.fingerprint == second.fingerprint:
+        match_type = "Exact"
+    elif first.supplier == second.supplier:
+        match_type = "Same Provider"
+    else:
+        match_type = "Other Provider"
+
+    return (
+        pair_key, pair_key, claim_month, second.member_number, match_type, "Open",
+        second.purchase_invoice, second.claim_number, second.supplier, flt(second.amount),
+        first.purchase_invoice, first.claim_number, first.supplier, flt(first.amount)
+    )
+
+
+def _get_service_codes(kwargs):
+    codes = []
+    for key in ("diagnosis_codes", "service_codes"):
+        value = kwargs.get(key)
+        if isinstance(value, str):
+            value = value.split(",")
+        codes.extend(value or ())
+    return codes
+
+
+def _normalize_code(value):
+    return re.sub(r"[^0-9A-Za-z]", "", str(value or "")).upper()
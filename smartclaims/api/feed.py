@@ -0,0 +1,144 @@
+import base64
+import json
+
+import frappe
+from frappe.model import default_fields, no_value_fields, table_fields
+from frappe.utils import add_to_date, cint, now_datetime
+from werkzeug.wrappers import Response
+
+DEFAULT_FEED_LIMIT = 500
+MAX_FEED_LIMIT = 5000
+# modified is set when a document is written, not when its transaction
+# commits. Rows are served once they are older than the longest write
+# transaction (a bulk chunk, a journal chunk, a month-close batch), so a row
+# can never commit behind a cursor already handed out.
+FEED_COMMIT_LAG = 5 * 60
+
+# Doctypes served by the feed, the condition that marks a document as created
+# through smartclaims.api.create and the fields returned when none are asked for
+FEED_DOCTYPES = {
+    "Purchase Invoice": {
+        "marker": "custom_invoice_type",
+        "fields": ["supplier", "custom_invoice_type", "custom_refund_id", "custom_claim_monthyear",
+                   "custom_member_number", "posting_date", "bill_no", "grand_total", "docstatus"]
+    },
+    "Sales Invoice": {
+        "marker": "custom_invoice_number",
+        "fields": ["customer", "custom_invoice_number", "custom_insurance_type", "posting_date",
+                   "custom_cover_period_start", "custom_cover_period_end", "grand_total", "docstatus"]
+    },
+    "Credit Note": {
+        "marker": None,
+        "fields": ["invoice_number", "sales_invoice", "insurance_type", "invoice_date",
+                   "current_invoice_amount", "docstatus"]
+    },
+    "Journal Entry": {
+        "marker": "custom_journal_type",
+        "fields": ["custom_type", "custom_journal_type", "custom_journal_number", "posting_date",
+                   "total_debit", "total_credit", "docstatus"]
+    }
+}
+
+
+# Change feed of documents created through the API
+# api/method/smartclaims.api.feed.get_changes
+@frappe.whitelist()
+def get_changes(doctype, cursor=None, fields=None, limit=None, format="ndjson"):
+    """
+    Returns documents of ``doctype`` modified after ``cursor``, oldest first,
+    ordered by (modified, name); changes show up FEED_COMMIT_LAG seconds after
+    they are made. Pass the returned next_cursor on the next poll.
+    The default NDJSON format returns one document per line and the cursor in
+    the X-Next-Cursor header.
+    """
+    try:
+        if doctype not in FEED_DOCTYPES:
+            frappe.local.response["http_status_code"] = 400
+            return {"status": "failed", "error": f"Change feed is not available for {doctype}"}
+
+        if not frappe.has_permission(doctype, "read"):
+            frappe.local.response["http_status_code"] = 403
+            return {"status": "failed", "error": f"Not permitted to read {doctype}"}
+
+        fields, invalid = _get_fields(doctype, fields)
+        if invalid:
+            frappe.local.response["http_status_code"] = 400
+            return {"status": "failed", "error": f"Unknown fields: {', '.join(invalid)}"}
+
+        limit = min(cint(limit) or DEFAULT_FEED_LIMIT, MAX_FEED_LIMIT)
+        rows = get_feed_rows(doctype, fields, decode_cursor(cursor), limit)
+        next_cursor = encode_cursor(rows[-1]) if rows else cursor
+
+        if format == "json":
+            frappe.local.response["http_status_code"] = 200
+            return {"status": "success", "rows": rows, "next_cursor": next_cursor, "has_more": len(rows) == limit}
+
+        body = "".join(frappe.as_json(row, indent=None) + "\n" for row in rows)
+        response = Response(body, status=200, mimetype="application/x-ndjson")
+        response.headers["X-Next-Cursor"] = next_cursor or ""
+        response.headers["X-Has-More"] = "1" if len(rows) == limit else "0"
+        return response
+
+    except frappe.ValidationError as e:
+        frappe.local.response["http_status_code"] = 400
+        return {"status": "failed", "error": str(e)}
+
+    except Exception as e:
+        frappe.log_error(frappe.get_traceback(), "get_changes error")
+        frappe.local.response["http_status_code"] = 500
+        return {"status": "failed", "error": str(e)}
+
+
+def get_feed_rows(doctype, fields, cursor, limit):
+    """Keyset page on (modified, name); uses the (modified, name) index, no offset."""
+    table = frappe.qb.DocType(doctype)
+    query = (
+        frappe.qb.from_(table)
+        .select(*[table[field] for field in fields])
+        .where(table.modified < add_to_date(now_datetime(), seconds=-FEED_COMMIT_LAG))
+        .orderby(table.modified)
+        .orderby(table.name)
+        .limit(limit)
+    )
+
+    marker = FEED_DOCTYPES[doctype]["marker"]
+    if marker:
+        query = query.where(table[marker].isnotnull() & (table[marker] != ""))
+
+    if cursor:
+        modified, name = cursor
+        query = query.where((table.modified > modified) | ((table.modified == modified) & (table.name > name)))
+
+    return query.run(as_dict=True)
+
+
+def encode_cursor(row):
+    return base64.urlsafe_b64encode(json.dumps([str(row.modified), row.name]).encode()).decode()
+
+
+def decode_cursor(cursor):
+    if not cursor:
+        return None
+
+    try:
+        modified, name = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        frappe.throw(f"Invalid cursor: {cursor}")
+
+    return modified, name
+
+
+def _get_fields(doctype, fields):
+    if isinstance(fields, str):
+        fields = frappe.parse_json(fields) if fields.lstrip().startswith("[") else fields.split(",")
+
+    fields = [field.strip() for field in fields or FEED_DOCTYPES[doctype]["fields"] if field.strip()]
+
+    meta = frappe.get_meta(doctype)
+    allowed = (set(default_fields) - {"doctype"}) | {
+        df.fieldname for df in meta.fields if df.fieldtype not in no_value_fields and df.fieldtype not in table_fields
+    }
+    invalid = [field for field in fields if field not in allowed]
+
+    # The cursor columns are always returned
+    return ["name", "modified", *[field for field in fields if field not in ("name", "modified")]], invalid
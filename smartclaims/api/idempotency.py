@@ -0,0 +1,163 @@
+import base64
+import functools
+import hashlib
+import json
+
+import frappe
+from frappe.utils import add_to_date, cint, now_datetime
+
+# Responses are looked up in Redis first and in the "Smartclaims Idempotency Key"
+# table when the cache has been flushed or evicted. A key that is being
+# processed is only held in Redis, with a short lock lifetime.
+RESPONSE_KEY_PREFIX = "smartclaims_idempotency|"
+IN_PROGRESS = "in_progress"
+IN_PROGRESS_TTL = 10 * 60
+
+
+def idempotent(fn):
+    """Replay the original response when a create endpoint is retried with the same key.
+
+    The key comes from the ``Idempotency-Key`` header or the ``idempotency_key``
+    payload field and is scoped to the caller (user and API key), so clients
+    that happen to pick the same key never see each other's responses. Server
+    errors are not stored, so those calls can be retried.
+    """
+
+    @functools.wraps(fn)
+    def wrapper(**kwargs):
+        key = kwargs.pop("idempotency_key", None) or _get_header_key()
+        if not key:
+            return fn(**kwargs)
+
+        endpoint, user = fn.__name__, frappe.session.user
+        key_hash = hashlib.sha256(f"{get_caller()}|{endpoint}|{key}".encode()).hexdigest()
+
+        stored = get_stored_response(key_hash, user)
+        if stored and stored["status"] != IN_PROGRESS:
+            frappe.local.response["http_status_code"] = stored["http_status_code"]
+            return stored["response"]
+
+        if stored or not _acquire(key_hash):
+            frappe.local.response["http_status_code"] = 409
+            return {"status": "failed", "error": f"A request with Idempotency-Key '{key}' is still in progress"}
+
+        try:
+            response = fn(**kwargs)
+        except Exception:
+            _release(key_hash)
+            raise
+
+        status_code = frappe.local.response.get("http_status_code") or 200
+        if status_code >= 500:
+            _release(key_hash)
+        else:
+            store_response(key_hash, endpoint, key, status_code, response, user)
+
+        return response
+
+    return wrapper
+
+
+def get_stored_response(key_hash, user):
+    try:
+        value = frappe.cache.get(_cache_key(key_hash))
+        if value:
+            return json.loads(value)
+    except Exception:
+        # Redis unavailable, fall back to the table
+        pass
+
+    row = frappe.db.get_value(
+        "Smartclaims Idempotency Key",
+        {"name": key_hash, "user": user, "expires_on": [">", now_datetime()]},
+        ["http_status_code", "response", "expires_on"],
+        as_dict=True
+    )
+    if not row:
+        return None
+
+    stored = {"status": "done", "http_status_code": row.http_status_code, "response": frappe.parse_json(row.response)}
+    ttl = int((row.expires_on - now_datetime()).total_seconds())
+    if ttl > 0:
+        _cache_set(key_hash, stored, ttl)
+    return stored
+
+
+def store_response(key_hash, endpoint, key, status_code, response, user):
+    ttl = _get_ttl()
+    stored = {"status": "done", "http_status_code": status_code, "response": response}
+    _cache_set(key_hash, stored, ttl)
+
+    frappe.db.delete("Smartclaims Idempotency Key", {"name": key_hash})
+    frappe.get_doc({
+        "doctype": "Smartclaims Idempotency Key",
+        "key_hash": key_hash,
+        "endpoint": endpoint,
+        "idempotency_key": key[:140],
+        "user": user,
+        "http_status_code": status_code,
+        "expires_on": add_to_date(now_datetime(), seconds=ttl),
+        "response": frappe.as_json(response, indent=None)
+    }).insert(ignore_permissions=True)
+    frappe.db.commit()
+
+
+def purge_expired_keys():
+    """Scheduler job: drop stored responses that are past their lifetime."""
+    frappe.db.delete("Smartclaims Idempotency Key", {"expires_on": ["<", now_datetime()]})
+    frappe.db.commit()
+
+
+def get_caller():
+    """The session user, and the API key when the call is authenticated with one."""
+    api_key = None
+    if getattr(frappe.local, "request", None):
+        # "token <key>:<secret>" or "Basic base64(<key>:<secret>)"
+        scheme, _, credentials = (frappe.get_request_header("Authorization") or "").partition(" ")
+        try:
+            if scheme.lower() == "basic":
+                credentials = base64.b64decode(credentials).decode()
+            if scheme.lower() in ("token", "basic") and ":" in credentials:
+                api_key = credentials.split(":", 1)[0]
+        except ValueError:
+            pass
+
+    return f"{frappe.session.user}|{api_key}" if api_key else frappe.session.user
+
+
+def _get_header_key():
+    if getattr(frappe.local, "request", None):
+        return frappe.get_request_header("Idempotency-Key")
+
+
+def _get_ttl():
+    return (cint(frappe.get_cached_doc("Smartclaims Settings").idempotency_ttl_hours) or 24) * 60 * 60
+
+
+def _acquire(key_hash):
+    try:
+        return bool(frappe.cache.set(
+            _cache_key(key_hash), json.dumps({"status": IN_PROGRESS}), nx=True, ex=IN_PROGRESS_TTL
+        ))
+    except Exception:
+        # Without Redis there is no in-flight lock; the stored response still
+        # protects against retries of completed calls
+        return True
+
+
+def _release(key_hash):
+    try:
+        frappe.cache.delete(_cache_key(key_hash))
+    except Exception:
+        pass
+
+
+def _cache_set(key_hash, stored, ttl):
+    try:
+        frappe.cache.setex(_cache_key(key_hash), ttl, frappe.as_json(stored, indent=None))
+    except Exception:
+        pass
+
+
+def _cache_key(key_hash):
+    return frappe.cache.make_key(RESPONSE_KEY_PREFIX + key_hash)
@@ -0,0 +1,205 @@
+import functools
+import json
+import time
+
+import frappe
+from frappe.utils import cint, flt, now
+
+from smartclaims.api.admission import get_admission_metrics
+from smartclaims.api.profiler import start_profile
+
+# Latency histograms live in Redis, one hash per endpoint, so every worker adds
+# to the same numbers. Buckets are stored non-cumulative and summed on read.
+METRICS_KEY_PREFIX = "smartclaims_metrics|"
+METRICS_ENDPOINTS_KEY = "smartclaims_metrics_endpoints"
+DURATION_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def instrumented(fn):
+    """Time a whitelisted endpoint: total and per-phase wall time, SQL count and time.
+
+    Every call feeds the Redis histograms behind ``get_metrics``; calls slower
+    than the ``slow_call_threshold_ms`` setting are also logged as a
+    "Smartclaims Slow Call". Calls matching an active profile capture are
+    profiled as well.
+    """
+
+    @functools.wraps(fn)
+    def wrapper(**kwargs):
+        call = CallTimer(fn.__name__)
+        previous = getattr(frappe.local, "smartclaims_call", None)
+        frappe.local.smartclaims_call = call
+        profile = start_profile(fn.__name__)
+
+        try:
+            with call.queries:
+                response = fn(**kwargs)
+        finally:
+            if profile:
+                profile.finish()
+            frappe.local.smartclaims_call = previous
+            call.finish()
+            _record(call, kwargs)
+
+        return response
+
+    return wrapper
+
+
+def record_phase(name):
+    """Book the time since the previous phase mark (or the call start) under ``name``."""
+    call = getattr(frappe.local, "smartclaims_call", None)
+    if call:
+        call.mark(name)
+
+
+class CallTimer:
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.queries = QueryTimer()
+        self.phases = {}
+        self.start = self.last_mark = time.perf_counter()
+        self.seconds = 0
+
+    def mark(self, name):
+        mark = time.perf_counter()
+        self.phases[name] = self.phases.get(name, 0) + mark - self.last_mark
+        self.last_mark = mark
+
+    def finish(self):
+        self.seconds = time.perf_counter() - self.start
+
+
+class QueryTimer:
+    """Count and time the SQL statements run through ``frappe.db.sql`` inside the block."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0
+
+    def __enter__(self):
+        self._sql = frappe.db.sql
+
+        def sql(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return self._sql(*args, **kwargs)
+            finally:
+                self.count += 1
+                self.seconds += time.perf_counter() - start
+
+        frappe.db.sql = sql
+        return self
+
+    def __exit__(self, *exc):
+        frappe.db.sql = self._sql
+
+
+def log_slow_call(**values):
+    """Background job: keep a slow call out of the API request's transaction."""
+    frappe.get_doc({"doctype": "Smartclaims Slow Call", **values}).insert(ignore_permissions=True)
+
+
+# Prometheus metrics of the create endpoints
+# api/method/smartclaims.api.instrumentation.get_metrics
+@frappe.whitelist()
+def get_metrics():
+    from werkzeug.wrappers import Response
+
+    frappe.only_for("System Manager")
+
+    endpoints = sorted(value.decode() for value in frappe.cache.smembers(_metrics_key(METRICS_ENDPOINTS_KEY)))
+    pipeline = frappe.cache.pipeline()
+    for endpoint in endpoints:
+        pipeline.hgetall(_metrics_key(METRICS_KEY_PREFIX + endpoint))
+    metrics = dict(zip(endpoints, pipeline.execute(), strict=True))
+
+    lines = [
+        "# HELP smartclaims_request_duration_seconds Wall time of smartclaims API calls.",
+        "# TYPE smartclaims_request_duration_seconds histogram"
+    ]
+    for endpoint, values in metrics.items():
+        values = {key.decode(): flt(value.decode()) for key, value in values.items()}
+        cumulative = 0
+        for bucket in (*DURATION_BUCKETS, "+Inf"):
+            cumulative += values.get(f"bucket:{bucket}", 0)
+            lines.append(f'smartclaims_request_duration_seconds_bucket{{endpoint="{endpoint}",le="{bucket}"}} {cint(cumulative)}')
+        lines.append(f'smartclaims_request_duration_seconds_sum{{endpoint="{endpoint}"}} {values.get("seconds", 0)}')
+        lines.append(f'smartclaims_request_duration_seconds_count{{endpoint="{endpoint}"}} {cint(values.get("count", 0))}')
+
+    for name, kind, help_text, prefix in (
+        ("smartclaims_requests_total", "counter", "API calls by HTTP status code.", "status:"),
+        ("smartclaims_phase_seconds_total", "counter", "Wall time spent in each phase of a call.", "phase:"),
+    ):
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        label = "status" if prefix == "status:" else "phase"
+        for endpoint, values in metrics.items():
+            for key, value in sorted(values.items()):
+                key = key.decode()
+                if key.startswith(prefix):
+                    lines.append(f'{name}{{endpoint="{endpoint}",{label}="{key[len(prefix):]}"}} {value.decode()}')
+
+    for name, help_text, field in (
+        ("smartclaims_sql_queries_total", "SQL statements run by API calls.", "queries"),
+        ("smartclaims_sql_seconds_total", "Time spent in SQL by API calls.", "query_seconds"),
+    ):
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        for endpoint, values in metrics.items():
+            value = values.get(field.encode(), b"0").decode()
+            lines.append(f'{name}{{endpoint="{endpoint}"}} {value}')
+
+    lines += get_admission_metrics()
+    return Response("\n".join(lines) + "\n", mimetype="text/plain; version=0.0.4")
+
+
+def _record(call, kwargs):
+    status_code = frappe.local.response.get("http_status_code") or 200
+    try:
+        _observe(call, status_code)
+    except Exception:
+        # Metrics must never fail the call
+        pass
+
+    threshold = cint(frappe.get_cached_doc("Smartclaims Settings").slow_call_threshold_ms)
+    if threshold and call.seconds * 1000 >= threshold:
+        frappe.enqueue(
+            "smartclaims.api.instrumentation.log_slow_call",
+            queue="short",
+            endpoint=call.endpoint,
+            call_time=now(),
+            user=frappe.session.user,
+            http_status_code=status_code,
+            duration_ms=flt(call.seconds * 1000, 1),
+            query_count=call.queries.count,
+            query_ms=flt(call.queries.seconds * 1000, 1),
+            payload_size=_get_payload_size(kwargs),
+            phases=json.dumps({name: flt(seconds * 1000, 1) for name, seconds in call.phases.items()}, indent=1)
+        )
+
+
+def _observe(call, status_code):
+    bucket = next((bucket for bucket in DURATION_BUCKETS if call.seconds <= bucket), "+Inf")
+    key = _metrics_key(METRICS_KEY_PREFIX + call.endpoint)
+
+    pipeline = frappe.cache.pipeline(transaction=False)
+    pipeline.sadd(_metrics_key(METRICS_ENDPOINTS_KEY), call.endpoint)
+    pipeline.hincrby(key, "count", 1)
+    pipeline.hincrby(key, f"bucket:{bucket}", 1)
+    pipeline.hincrby(key, f"status:{status_code}", 1)
+    pipeline.hincrbyfloat(key, "seconds", call.seconds)
+    pipeline.hincrby(key, "queries", call.queries.count)
+    pipeline.hincrbyfloat(key, "query_seconds", call.queries.seconds)
+    for name, seconds in call.phases.items():
+        pipeline.hincrbyfloat(key, f"phase:{name}", seconds)
+    pipeline.execute()
+
+
+def _get_payload_size(kwargs):
+    request = getattr(frappe.local, "request", None)
+    if request and request.content_length:
+        return request.content_length
+    return len(json.dumps(kwargs, default=str))
+
+
+def _metrics_key(key):
+    return frappe.cache.make_key(key)
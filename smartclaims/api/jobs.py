@@ -0,0 +1,119 @@
+import functools
+import inspect
+import json
+
+import frappe
+from frappe.utils import cint, now
+
+# Job state is kept in Redis (the site's cache instance) for a day, which is
+# plenty for upstream systems to poll for the result.
+JOB_KEY_PREFIX = "smartclaims_job|"
+JOB_TTL = 24 * 60 * 60
+
+
+def async_capable(fn=None, *, queue="default"):
+    """Let a whitelisted create endpoint run in the background when called with ``async=1``.
+
+    The call is enqueued with the remaining kwargs and answered with 202 and a
+    job id; the result is fetched later through ``get_job_status``.
+    """
+    if fn is None:
+        return functools.partial(async_capable, queue=queue)
+
+    @functools.wraps(fn)
+    def wrapper(**kwargs):
+        if cint(kwargs.pop("async", 0)):
+            return enqueue_api_call(f"{fn.__module__}.{fn.__name__}", kwargs, queue=queue)
+        return fn(**kwargs)
+
+    return wrapper
+
+
+def enqueue_api_call(method, kwargs, queue="default"):
+    job_id = frappe.generate_hash(length=20)
+    _set_job(job_id, {"job_id": job_id, "method": method, "status": "queued", "queued_at": now()})
+
+    frappe.enqueue(
+        "smartclaims.api.jobs.run_api_call",
+        queue=queue,
+        timeout=3000,
+        job_key=job_id,
+        api_method=method,
+        api_kwargs=kwargs,
+        enqueue_after_commit=True,
+        now=frappe.flags.in_test
+    )
+
+    frappe.local.response["http_status_code"] = 202
+    return {
+        "status": "queued",
+        "job_id": job_id,
+        "status_url": f"/api/method/smartclaims.api.jobs.get_job_status?job_ids={job_id}"
+    }
+
+
+def run_api_call(job_key, api_method, api_kwargs):
+    """Background job: run a create endpoint and keep its response and status code."""
+    job = _get_jobs([job_key]).get(job_key) or {"job_id": job_key, "method": api_method}
+    job.update({"status": "started", "started_at": now()})
+    _set_job(job_key, job)
+
+    frappe.local.response["http_status_code"] = None
+    try:
+        # The queued call already went through instrumentation and idempotency;
+        # run the endpoint body itself so it isn't counted or keyed twice
+        result = inspect.unwrap(frappe.get_attr(api_method))(**api_kwargs)
+        status_code = frappe.local.response.get("http_status_code") or 200
+        job.update({
+            "status": "finished" if status_code < 400 else "failed",
+            "http_status_code": status_code,
+            "result": result
+        })
+    except Exception as e:
+        frappe.log_error(frappe.get_traceback(), "Smartclaims background job error")
+        job.update({"status": "failed", "http_status_code": 500, "result": {"error": str(e)}})
+
+    job["finished_at"] = now()
+    _set_job(job_key, job)
+
+
+# Poll status and results of background create calls
+# api/method/smartclaims.api.jobs.get_job_status
+@frappe.whitelist()
+def get_job_status(job_ids):
+    """
+    Dummy JSON Input:
+    {
+        "job_ids": ["5d1c0c7e9f0a4c3b8e21", "a91e3e11d4d34a0f9c77"]
+    }
+    """
+    try:
+        if isinstance(job_ids, str):
+            job_ids = frappe.parse_json(job_ids) if job_ids.lstrip().startswith("[") else job_ids.split(",")
+
+        job_ids = [job_id.strip() for job_id in job_ids if job_id and job_id.strip()]
+        if not job_ids:
+            frappe.local.response["http_status_code"] = 400
+            return {"status": "failed", "error": "No job ids provided"}
+
+        jobs = _get_jobs(job_ids)
+        frappe.local.response["http_status_code"] = 200
+        return {
+            "status": "success",
+            "jobs": [jobs.get(job_id) or {"job_id": job_id, "status": "not_found"} for job_id in job_ids]
+        }
+
+    except Exception as e:
+        frappe.log_error(frappe.get_traceback(), "get_job_status error")
+        frappe.local.response["http_status_code"] = 500
+        return {"status": "failed", "error": str(e)}
+
+
+def _set_job(job_id, job):
+    frappe.cache.setex(frappe.cache.make_key(JOB_KEY_PREFIX + job_id), JOB_TTL, frappe.as_json(job, indent=None))
+
+
+def _get_jobs(job_ids):
+    # One MGET for the whole poll, however many jobs are asked for
+    values = frappe.cache.mget([frappe.cache.make_key(JOB_KEY_PREFIX + job_id) for job_id in job_ids])
+    return {job_id: json.loads(value) for job_id, value in zip(job_ids, values, strict=True) if value}
@@ -0,0 +1,201 @@
+import frappe
+from frappe.utils import cint, flt
+
+# Large journals are split into balanced Journal Entries that are posted by
+# background workers, one job per chunk. The payload's journal_number is kept on
+# a "Claims Journal Batch" header and on every Journal Entry of the batch.
+
+# Chunk size of journals sent with split=1 when the setting is 0
+DEFAULT_JOURNAL_CHUNK_ROWS = 500
+
+
+def get_journal_chunk_rows():
+    return cint(frappe.get_cached_doc("Smartclaims Settings").journal_chunk_rows)
+
+
+def split_account_pairs(account_pairs, chunk_rows):
+    """Split (party row, counter row) pairs into chunks of about ``chunk_rows`` rows.
+
+    A chunk is only closed where its debits equal its credits, so every chunk can
+    be posted as a balanced Journal Entry even when single entries are not.
+    """
+    chunks, current = [], []
+    difference = 0
+    for pair in account_pairs:
+        current.append(pair)
+        for row in pair:
+            difference += flt(row.get("debit_in_account_currency")) - flt(row.get("credit_in_account_currency"))
+
+        if len(current) * 2 >= chunk_rows and not flt(difference, 2):
+            chunks.append(current)
+            current, difference = [], 0
+
+    if current:
+        chunks.append(current)
+
+    return chunks
+
+
+def enqueue_journal_batch(kwargs, custom_type, journal_type, account_pairs, chunk_rows):
+    """Create the batch header and one queued chunk per Journal Entry, then enqueue them."""
+    chunks = split_account_pairs(account_pairs, chunk_rows)
+
+    batch = frappe.get_doc({
+        "doctype": "Claims Journal Batch",
+        "journal_number": kwargs.get("journal_number"),
+        "custom_type": custom_type,
+        "journal_type": journal_type,
+        "posting_date": kwargs.get("approval_date"),
+        "status": "Queued",
+        "total_rows": len(account_pairs) * 2,
+        "chunk_rows": chunk_rows,
+        "chunk_count": len(chunks)
+    })
+    batch.insert(ignore_permissions=True)
+
+    for index, pairs in enumerate(chunks, 1):
+        chunk = frappe.get_doc({
+            "doctype": "Claims Journal Chunk",
+            "batch": batch.name,
+            "chunk_index": index,
+            "row_count": len(pairs) * 2,
+            "status": "Queued",
+            "accounts": frappe.as_json([row for pair in pairs for row in pair], indent=None)
+        })
+        chunk.insert(ignore_permissions=True)
+        _enqueue_chunk(chunk.name)
+
+    return batch
+
+
+def _enqueue_chunk(chunk_name):
+    frappe.enqueue(
+        "smartclaims.api.journal_batch.post_journal_chunk",
+        queue="long",
+        chunk=chunk_name,
+        enqueue_after_commit=True
+    )
+
+
+def post_journal_chunk(chunk):
+    """Background job: post one chunk as its own Journal Entry."""
+    chunk = frappe.get_doc("Claims Journal Chunk", chunk)
+    if chunk.status == "Posted":
+        return
+
+    batch = frappe.get_doc("Claims Journal Batch", chunk.batch)
+    try:
+        je = frappe.new_doc("Journal Entry")
+        je.posting_date = batch.posting_date
+        je.custom_type = batch.custom_type
+        je.custom_journal_number = batch.journal_number
+        je.custom_journal_batch = batch.name
+        je.custom_journal_chunk = chunk.chunk_index
+        je.voucher_type = "Journal Entry"
+        je.custom_journal_type = batch.journal_type
+
+        for row in frappe.parse_json(chunk.accounts):
+            je.append("accounts", row)
+
+        je.insert(ignore_permissions=True)
+        je.submit()
+        chunk.db_set({"status": "Posted", "journal_entry": je.name, "error": None})
+        frappe.db.commit()
+
+    except Exception:
+        frappe.db.rollback()
+        frappe.log_error(frappe.get_traceback(), "Journal Chunk Posting Error")
+        chunk.db_set({"status": "Failed", "error": frappe.get_traceback()})
+        frappe.db.commit()
+
+    update_batch_status(batch.name)
+
+
+def update_batch_status(batch):
+    status = get_batch_progress(batch)["status"]
+    frappe.db.set_value("Claims Journal Batch", batch, "status", status, update_modified=False)
+    frappe.db.commit()
+
+
+def get_batch_progress(batch):
+    counts = {"Queued": 0, "Posted": 0, "Failed": 0}
+    posted_rows = 0
+    for row in frappe.get_all(
+        "Claims Journal Chunk",
+        filters={"batch": batch},
+        fields=["status", "count(name) as chunks", "sum(row_count) as posted_row_count"],
+        group_by="status"
+    ):
+        counts[row.status] = row.chunks
+        if row.status == "Posted":
+            posted_rows = cint(row.posted_row_count)
+
+    total = sum(counts.values())
+    if counts["Posted"] == total:
+        status = "Completed"
+    elif counts["Queued"]:
+        status = "In Progress" if counts["Posted"] or counts["Failed"] else "Queued"
+    elif counts["Posted"]:
+        status = "Partially Failed"
+    else:
+        status = "Failed"
+
+    return {
+        "status": status,
+        "chunks": total,
+        "queued": counts["Queued"],
+        "posted": counts["Posted"],
+        "failed": counts["Failed"],
+        "posted_rows": posted_rows
+    }
+
+
+# Journal batch progress
+# api/method/smartclaims.api.journal_batch.get_journal_batch_status
+@frappe.whitelist()
+def get_journal_batch_status(batch=None, journal_number=None):
+    try:
+        if not batch and journal_number:
+            batch = frappe.db.get_value(
+                "Claims Journal Batch", {"journal_number": journal_number}, "name", order_by="creation desc"
+            )
+
+        if not batch or not frappe.db.exists("Claims Journal Batch", batch):
+            frappe.local.response["http_status_code"] = 404
+            return {"success": False, "message": "Journal batch not found"}
+
+        header = frappe.db.get_value(
+            "Claims Journal Batch", batch, ["name", "journal_number", "custom_type", "total_rows"], as_dict=True
+        )
+        progress = get_batch_progress(batch)
+        progress["progress"] = flt(progress["posted_rows"] * 100 / header.total_rows, 2) if header.total_rows else 0
+        progress["chunk_details"] = frappe.get_all(
+            "Claims Journal Chunk",
+            filters={"batch": batch},
+            fields=["chunk_index", "status", "row_count", "journal_entry", "error"],
+            order_by="chunk_index asc"
+        )
+
+        frappe.local.response["http_status_code"] = 200
+        return {"success": True, "batch": header.name, "journal_number": header.journal_number,
+                "type": header.custom_type, "total_rows": header.total_rows, **progress}
+
+    except Exception as e:
+        frappe.log_error(frappe.get_traceback(), "Journal Batch Status API Error")
+        frappe.local.response["http_status_code"] = 500
+        return {"success": False, "message": str(e)}
+
+
+# Re-queue failed chunks of a journal batch
+# api/method/smartclaims.api.journal_batch.retry_failed_chunks
+@frappe.whitelist()
+def retry_failed_chunks(batch):
+    frappe.only_for("System Manager")
+
+    failed = frappe.get_all("Claims Journal Chunk", filters={"batch": batch, "status": "Failed"}, pluck="name")
+    for chunk in failed:
+        frappe.db.set_value("Claims Journal Chunk", chunk, "status", "Queued")
+        _enqueue_chunk(chunk)
+
+    update_batch_status(batch)
+    return {"success": True, "requeued": len(failed)}
@@ -0,0 +1,120 @@
+from dataclasses import dataclass
+from types import MappingProxyType
+
+import frappe
+from frappe.model import no_value_fields, table_fields
+from frappe.utils import cint, flt
+
+from smartclaims.api.worker_cache import WorkerCache
+
+# How each create endpoint maps its payload onto a doctype. Aliases are the
+# API's own key names; a tuple target fills several fields from one key.
+MAPPING_SPECS = {
+    "Customer": {
+        "doctype": "Customer",
+        "aliases": {"company_id": "customer_name"}
+    },
+    "Supplier": {
+        "doctype": "Supplier",
+        "aliases": {"custom_provider_id": "supplier_name"},
+        "skip": ("supplier_name",)
+    },
+    "Claim": {
+        "doctype": "Purchase Invoice",
+        "aliases": {"provider_id": "supplier", "invoice_date": "posting_date", "supplier_invoice_no": "bill_no"},
+        "skip": ("custom_refund_id", "total_amount", "default_item_code")
+    },
+    "Medical Refund": {
+        "doctype": "Purchase Invoice",
+        "aliases": {
+            "refund_id": ("supplier", "custom_refund_id"),
+            "request_date": "posting_date",
+            "supplier_invoice_no": "bill_no"
+        },
+        "skip": ("total_amount", "default_item_code")
+    },
+    "Credit Note": {
+        "doctype": "Credit Note"
+    }
+}
+
+COERCERS = {
+    "Int": cint,
+    "Check": cint,
+    "Float": flt,
+    "Currency": flt,
+    "Percent": flt
+}
+
+# Compiled plans of this worker
+_plans = WorkerCache("smartclaims_mapping_version")
+
+
+@dataclass(frozen=True)
+class MappingPlan:
+    doctype: str
+    fields: frozenset
+    aliases: MappingProxyType
+    coercers: MappingProxyType
+    skip: frozenset
+
+    def map(self, kwargs):
+        """Return ``{fieldname: value}`` for every payload key the doctype accepts.
+
+        Aliased keys win over a field of the same name sent directly.
+        """
+        values, aliased = {}, {}
+        for key, value in kwargs.items():
+            if key in self.skip:
+                continue
+
+            targets = self.aliases.get(key)
+            if targets:
+                for target in targets:
+                    aliased[target] = self._coerce(target, value)
+            elif key in self.fields:
+                values[key] = self._coerce(key, value)
+
+        values.update(aliased)
+        return values
+
+    def _coerce(self, fieldname, value):
+        coercer = self.coercers.get(fieldname)
+        return coercer(value) if coercer and value is not None else value
+
+
+def get_mapping_plan(name):
+    plan = _plans.get(name)
+    if not plan:
+        plan = _compile_plan(MAPPING_SPECS[name])
+        _plans.set(name, plan)
+
+    return plan
+
+
+def _compile_plan(spec):
+    meta = frappe.get_meta(spec["doctype"])
+    fields = {
+        df.fieldname: df.fieldtype
+        for df in meta.fields
+        if df.fieldtype not in no_value_fields and df.fieldtype not in table_fields
+    }
+    aliases = {
+        key: (target,) if isinstance(target, str) else tuple(target)
+        for key, target in spec.get("aliases", {}).items()
+    }
+
+    return MappingPlan(
+        doctype=spec["doctype"],
+        fields=frozenset(fields),
+        aliases=MappingProxyType(aliases),
+        coercers=MappingProxyType({
+            fieldname: COERCERS[fieldtype] for fieldname, fieldtype in fields.items() if fieldtype in COERCERS
+        }),
+        skip=frozenset(spec.get("skip", ()))
+    )
+
+
+def clear_mapping_plans(doc=None, method=None):
+    """doc_events hook: schema changes invalidate the plans of every worker."""
+    _plans.invalidate()
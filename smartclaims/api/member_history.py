@@ -0,0 +1,332 @@
+import functools
+import json
+
+import frappe
+from frappe.utils import cint, flt, getdate, now_datetime, nowdate
+
+# Per-member summary of claims and refunds, kept in Redis as one JSON value per
+# member. Purchase Invoice events patch a cached summary in place after the
+# transaction commits; members that aren't cached are left alone and built on
+# their next read. Claims of consolidated invoices are read from their item
+# lines. A sorted set of last-access times bounds the cache: once it
+# holds more than MAX_CACHED_MEMBERS, the least recently read are evicted.
+HISTORY_KEY_PREFIX = "smartclaims_member_history|"
+HISTORY_LRU_KEY = "smartclaims_member_history_lru"
+HISTORY_TTL = 7 * 24 * 60 * 60
+MAX_CACHED_MEMBERS = 50000
+
+RECENT_CLAIMS = 20
+# A few more than served, so cancelling a recent claim doesn't leave a gap
+RECENT_CLAIMS_KEPT = 2 * RECENT_CLAIMS
+
+REFUND_INVOICE_TYPE = "Medical Refunds"
+CLAIM_FIELDS = ("name", "claim_number", "posting_date", "supplier", "invoice_type", "amount", "outstanding_amount",
+                "status", "docstatus")
+
+
+# Claims, year-to-date totals and open refunds of a member
+# api/method/smartclaims.api.member_history.get_member_claim_history
+@frappe.whitelist()
+def get_member_claim_history(member_number):
+    """
+    Dummy JSON Input:
+    {
+        "member_number": "26405474"
+    }
+    """
+    try:
+        if not member_number:
+            frappe.local.response["http_status_code"] = 400
+            return {"status": "failed", "error": "member_number is required"}
+
+        if not frappe.has_permission("Purchase Invoice", "read"):
+            frappe.local.response["http_status_code"] = 403
+            return {"status": "failed", "error": "Not permitted to read Purchase Invoice"}
+
+        history = get_member_history(member_number)
+
+        frappe.local.response["http_status_code"] = 200
+        return {
+            "status": "success",
+            "member_number": member_number,
+            "year": history["year"],
+            "recent_claims": history["recent_claims"][:RECENT_CLAIMS],
+            "ytd_by_provider": history["ytd_by_provider"],
+            "open_refunds": sorted(history["open_refunds"].values(), key=lambda claim: claim["posting_date"])
+        }
+
+    except Exception as e:
+        frappe.log_error(frappe.get_traceback(), "get_member_claim_history error")
+        frappe.local.response["http_status_code"] = 500
+        return {"status": "failed", "error": str(e)}
+
+
+def get_member_history(member_number):
+    history = _get_cached(member_number)
+    if history and history["year"] == getdate().year:
+        return history
+
+    history = build_member_history(member_number)
+    _set_cached(member_number, history)
+    return history
+
+
+def build_member_history(member_number):
+    """Summary of one member from a single round trip: newest claims, YTD totals and open refunds."""
+    year = getdate().year
+    history = {"year": year, "recent_claims": [], "ytd_by_provider": {}, "open_refunds": {}}
+
+    for row in frappe.db.sql("""
+        (select 'recent' as part, name, bill_no as claim_number, posting_date, supplier,
+            custom_invoice_type as invoice_type, grand_total as amount, outstanding_amount, status, docstatus,
+            1 as count
+        from `tabPurchase Invoice`
+        where custom_member_number = %(member_number)s and docstatus < 2
+        order by posting_date desc, name desc
+        limit %(recent)s)
+        union all
+        (select 'recent', pi.name, item.custom_claim_number, pi.posting_date, pi.supplier, pi.custom_invoice_type,
+            sum(item.amount), 0, pi.status, pi.docstatus, 1
+        from `tabPurchase Invoice Item` item
+        join `tabPurchase Invoice` pi on pi.name = item.parent
+        where item.custom_member_number = %(member_number)s and item.parenttype = 'Purchase Invoice'
+            and pi.docstatus < 2 and pi.custom_consolidated = 1
+        group by pi.name, item.custom_claim_number
+        order by pi.posting_date desc, pi.name desc
+        limit %(recent)s)
+        union all
+        (select 'ytd', null, null, null, supplier, custom_invoice_type,
+            sum(grand_total), sum(outstanding_amount), null, 1, count(*)
+        from `tabPurchase Invoice`
+        where custom_member_number = %(member_number)s and docstatus = 1 and posting_date >= %(year_start)s
+        group by supplier, custom_invoice_type)
+        union all
+        (select 'ytd', null, null, null, pi.supplier, pi.custom_invoice_type,
+            sum(item.amount), 0, null, 1, count(distinct item.parent, item.custom_claim_number)
+        from `tabPurchase Invoice Item` item
+        join `tabPurchase Invoice` pi on pi.name = item.parent
+        where item.custom_member_number = %(member_number)s and item.parenttype = 'Purchase Invoice'
+            and pi.docstatus = 1 and pi.custom_consolidated = 1 and pi.posting_date >= %(year_start)s
+        group by pi.supplier, pi.custom_invoice_type)
+        union all
+        (select 'refund', name, bill_no, posting_date, supplier, custom_invoice_type,
+            grand_total, outstanding_amount, status, docstatus, 1
+        from `tabPurchase Invoice`
+        where custom_member_number = %(member_number)s and docstatus = 1
+            and custom_invoice_type = %(refund_type)s and outstanding_amount > 0)
+    """, {
+        "member_number": member_number,
+        "recent": RECENT_CLAIMS_KEPT,
+        "year_start": f"{year}-01-01",
+        "refund_type": REFUND_INVOICE_TYPE
+    }, as_dict=True):
+        if row.part == "ytd":
+            _add_ytd(history, row.supplier, row.invoice_type, cint(row["count"]), flt(row.amount))
+        elif row.part == "refund":
+            history["open_refunds"][row.name] = _get_claim(row)
+        else:
+            history["recent_claims"].append(_get_claim(row))
+
+    _sort_recent(history, history["recent_claims"])
+    return history
+
+
+def update_member_history(doc, method=None):
+    """doc_events hook for Purchase Invoice after_insert / on_submit / on_cancel / on_trash."""
+    if doc.get("is_return"):
+        # A debit note moves the outstanding of the claim it returns against
+        if method != "after_insert":
+            members = {
+                doc.get("custom_member_number"),
+                frappe.db.get_value("Purchase Invoice", doc.return_against, "custom_member_number")
+            } - {None, ""}
+            if members:
+                frappe.db.after_commit.add(functools.partial(_delete_cached, list(members)))
+        return
+
+    if doc.get("custom_consolidated"):
+        # Claims are added through add_consolidated_claim; later events rebuild their members
+        members = {row.custom_member_number for row in doc.items if row.get("custom_member_number")}
+        if members and method != "after_insert":
+            frappe.db.after_commit.add(functools.partial(_delete_cached, list(members)))
+        return
+
+    member_number = doc.get("custom_member_number")
+    if not member_number:
+        return
+
+    claim = _get_claim(frappe._dict(
+        name=doc.name,
+        claim_number=doc.get("bill_no"),
+        posting_date=doc.posting_date,
+        supplier=doc.supplier,
+        invoice_type=doc.get("custom_invoice_type"),
+        amount=doc.grand_total,
+        outstanding_amount=doc.outstanding_amount,
+        status=doc.status,
+        docstatus=doc.docstatus
+    ))
+    frappe.db.after_commit.add(functools.partial(_update_cached, member_number, method, claim))
+
+
+def add_consolidated_claim(invoice, values, claim_number, amount):
+    """Record a claim added to a consolidated invoice, which fires no after_insert for it."""
+    member_number = values.get("custom_member_number")
+    if not member_number:
+        return
+
+    claim = _get_claim(frappe._dict(
+        name=invoice.name,
+        claim_number=claim_number,
+        posting_date=invoice.posting_date,
+        supplier=values.get("supplier"),
+        invoice_type=values.get("custom_invoice_type"),
+        amount=amount,
+        outstanding_amount=0,
+        status=invoice.status,
+        docstatus=0
+    ))
+    frappe.db.after_commit.add(functools.partial(_update_cached, member_number, "after_insert", claim))
+
+
+def clear_member_history(doc, method=None):
+    """doc_events hook for Journal Entry and Payment Entry on_submit / on_cancel.
+
+    Journals and payments change the outstanding of the claims they reference.
+    """
+    if doc.doctype == "Payment Entry":
+        references = [(row.reference_doctype, row.reference_name) for row in doc.references]
+    else:
+        references = [(row.reference_type, row.reference_name) for row in doc.accounts]
+
+    invoices = {name for doctype, name in references if doctype == "Purchase Invoice" and name}
+    if not invoices:
+        return
+
+    members = frappe.get_all(
+        "Purchase Invoice",
+        filters={"name": ["in", list(invoices)], "custom_member_number": ["is", "set"]},
+        pluck="custom_member_number",
+        distinct=True
+    )
+    if members:
+        frappe.db.after_commit.add(functools.partial(_delete_cached, members))
+
+
+def _update_cached(member_number, method, claim):
+    key = _history_key(member_number)
+
+    def update(pipeline):
+        value = pipeline.get(key)
+        if not value:
+            return
+
+        history = json.loads(value)
+        pipeline.multi()
+        if history["year"] != getdate().year:
+            pipeline.delete(key)
+            return
+
+        _apply_event(history, method, claim)
+        pipeline.setex(key, HISTORY_TTL, json.dumps(history))
+
+    try:
+        # Optimistic: retried if another worker changes the member meanwhile
+        frappe.cache.transaction(update, key)
+    except Exception:
+        frappe.log_error(frappe.get_traceback(), "Member claim history cache update error")
+        _delete_cached([member_number])
+
+
+def _apply_event(history, method, claim):
+    recent = [
+        row for row in history["recent_claims"]
+        if (row["name"], row.get("claim_number")) != (claim["name"], claim["claim_number"])
+    ]
+
+    if method in ("after_insert", "on_submit"):
+        recent.append(claim)
+
+    if method in ("on_submit", "on_cancel") and claim["posting_date"] >= f"{history['year']}-01-01":
+        sign = -1 if method == "on_cancel" else 1
+        _add_ytd(history, claim["supplier"], claim["invoice_type"], sign, sign * claim["amount"])
+
+    if method == "on_submit" and claim["invoice_type"] == REFUND_INVOICE_TYPE and claim["outstanding_amount"] > 0:
+        history["open_refunds"][claim["name"]] = claim
+    elif method in ("on_cancel", "on_trash"):
+        history["open_refunds"].pop(claim["name"], None)
+
+    _sort_recent(history, recent)
+
+
+def _sort_recent(history, recent):
+    recent.sort(key=lambda row: (row["posting_date"], row["name"], row.get("claim_number") or ""), reverse=True)
+    history["recent_claims"] = recent[:RECENT_CLAIMS_KEPT]
+
+
+def _add_ytd(history, supplier, invoice_type, count, amount):
+    totals = history["ytd_by_provider"].setdefault(supplier, {}).setdefault(
+        invoice_type or "", {"count": 0, "amount": 0}
+    )
+    totals["count"] += count
+    totals["amount"] = flt(totals["amount"] + amount, 2)
+
+
+def _get_claim(row):
+    claim = {field: row.get(field) for field in CLAIM_FIELDS}
+    claim.update({
+        "posting_date": str(getdate(row.posting_date or nowdate())),
+        "amount": flt(row.amount),
+        "outstanding_amount": flt(row.outstanding_amount),
+        "docstatus": cint(row.docstatus)
+    })
+    return claim
+
+
+def _get_cached(member_number):
+    try:
+        value = frappe.cache.get(_history_key(member_number))
+        if value:
+            _touch([member_number])
+            return json.loads(value)
+    except Exception:
+        # Redis unavailable, read from the database
+        pass
+
+
+def _set_cached(member_number, history):
+    try:
+        frappe.cache.setex(_history_key(member_number), HISTORY_TTL, json.dumps(history))
+        _touch([member_number])
+        _evict()
+    except Exception:
+        pass
+
+
+def _delete_cached(members):
+    try:
+        pipeline = frappe.cache.pipeline(transaction=False)
+        pipeline.delete(*[_history_key(member_number) for member_number in members])
+        pipeline.zrem(_lru_key(), *members)
+        pipeline.execute()
+    except Exception:
+        pass
+
+
+def _touch(members):
+    frappe.cache.zadd(_lru_key(), {member_number: now_datetime().timestamp() for member_number in members})
+
+
+def _evict():
+    excess = frappe.cache.zcard(_lru_key()) - MAX_CACHED_MEMBERS
+    if excess > 0:
+        evicted = [member.decode() for member, score in frappe.cache.zpopmin(_lru_key(), excess)]
+        frappe.cache.delete(*[_history_key(member_number) for member_number in evicted])
+
+
+def _history_key(member_number):
+    return frappe.cache.make_key(HISTORY_KEY_PREFIX + member_number)
+
+
+def _lru_key():
+    return frappe.cache.make_key(HISTORY_LRU_KEY)
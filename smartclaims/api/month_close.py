@@ -0,0 +1,300 @@
+import frappe
+from frappe.utils import cint, flt, getdate, now, nowdate
+from frappe.utils.background_jobs import is_job_enqueued
+
+from smartclaims.api.consolidation import submit_consolidated_invoices
+from smartclaims.api.duplicates import get_claim_month, parse_claim_month
+
+# Journal rows sent with mode=pending are staged as "Pending Claim Adjustment"
+# instead of being posted. The month-end close submits the month's consolidated
+# claim invoices, then aggregates the staged rows per provider and account and
+# posts them as a few consolidated Journal Entries: one party row per Purchase
+# Invoice, referencing it so its outstanding moves, and one counter row per
+# provider and account. Every staged row keeps the Journal Entry it ended up in.
+ADJUSTMENT_DOCTYPE = "Pending Claim Adjustment"
+ADJUSTMENT_FIELDS = (
+    "claim_month", "custom_type", "journal_type", "journal_number", "approval_date", "supplier",
+    "purchase_invoice", "status", "party_account", "party_debit", "party_credit",
+    "counter_account", "counter_debit", "counter_credit"
+)
+
+
+def stage_pending_adjustments(kwargs, custom_type, journal_type, account_pairs):
+    """Stage the resolved journal rows for the month-end close.
+
+    The claim month is the payload's ``claim_month`` or the referenced Purchase
+    Invoice's ``custom_claim_monthyear``, stored as MM-YYYY so the close of the
+    month finds it. Returns ``(staged count, errors)``.
+    """
+    invoice_names = {party_row["reference_name"] for party_row, counter_row in account_pairs}
+    claim_months = {
+        d.name: d.custom_claim_monthyear
+        for d in frappe.get_all(
+            "Purchase Invoice",
+            filters={"name": ["in", list(invoice_names)]},
+            fields=["name", "custom_claim_monthyear"]
+        )
+    }
+
+    timestamp, user = now(), frappe.session.user
+    values, errors = [], []
+    for row, (party_row, counter_row) in enumerate(account_pairs, 1):
+        invoice = party_row["reference_name"]
+        claim_month = kwargs.get("claim_month") or claim_months.get(invoice)
+        if not claim_month:
+            errors.append({"row": row, "purchase_invoice": invoice, "error": "No claim month to close it in"})
+            continue
+        if not (normalized := parse_claim_month(claim_month)):
+            errors.append({
+                "row": row, "purchase_invoice": invoice,
+                "error": f"Invalid claim month {claim_month!r}, expected MM-YYYY"
+            })
+            continue
+        claim_month = normalized
+
+        values.append((
+            claim_month, custom_type, journal_type, kwargs.get("journal_number"),
+            getdate(kwargs.get("approval_date") or nowdate()), party_row["party"], invoice, "Pending",
+            party_row["account"],
+            flt(party_row["debit_in_account_currency"]), flt(party_row["credit_in_account_currency"]),
+            counter_row["account"],
+            flt(counter_row["debit_in_account_currency"]), flt(counter_row["credit_in_account_currency"]),
+            timestamp, timestamp, user, user
+        ))
+
+    if errors:
+        return 0, errors
+
+    frappe.db.bulk_insert(
+        ADJUSTMENT_DOCTYPE,
+        fields=[*ADJUSTMENT_FIELDS, "creation", "modified", "owner", "modified_by"],
+        values=values
+    )
+    return len(values), []
+
+
+def enqueue_month_close(month_close):
+    # One close of a month at a time, so a close can take over rows left "Closing"
+    job_id = f"smartclaims_month_close|{month_close.claim_month}"
+    if is_job_enqueued(job_id):
+        frappe.throw(f"A close of {month_close.claim_month} is already queued or running")
+
+    month_close.db_set({"status": "Queued", "error": None})
+    frappe.enqueue(
+        "smartclaims.api.month_close.run_month_close",
+        queue="long",
+        timeout=6 * 60 * 60,
+        month_close=month_close.name,
+        job_id=job_id,
+        enqueue_after_commit=True
+    )
+
+
+# Close a claim month
+# api/method/smartclaims.api.month_close.start_month_close
+@frappe.whitelist()
+def start_month_close(claim_month, posting_date=None, group_by="Provider", chunk_rows=None):
+    """
+    Dummy JSON Input:
+    {
+        "claim_month": "09-2025",
+        "posting_date": "2025-09-30",
+        "group_by": "Provider"
+    }
+    """
+    try:
+        # Same MM-YYYY as the staged rows, the job id and the close's queries
+        month_close = frappe.get_doc({
+            "doctype": "Claims Month Close",
+            "claim_month": claim_month and get_claim_month({"custom_claim_monthyear": claim_month}),
+            "posting_date": posting_date or nowdate(),
+            "group_by": group_by,
+            "chunk_rows": cint(chunk_rows)
+        })
+        month_close.insert(ignore_permissions=True)
+        enqueue_month_close(month_close)
+        frappe.db.commit()
+
+        frappe.local.response["http_status_code"] = 202
+        return {"status": "queued", "name": month_close.name}
+
+    except frappe.ValidationError as e:
+        frappe.local.response["http_status_code"] = 400
+        return {"status": "failed", "error": str(e)}
+
+    except Exception as e:
+        frappe.log_error(frappe.get_traceback(), "start_month_close error")
+        frappe.local.response["http_status_code"] = 500
+        return {"status": "failed", "error": str(e)}
+
+
+def run_month_close(month_close):
+    """Background job: post the staged adjustments of a claim month as consolidated journals."""
+    month_close = frappe.get_doc("Claims Month Close", month_close)
+    month_close.db_set({"status": "In Progress", "error": None})
+
+    # The month's consolidated claim invoices are final from here on
+    invoices_submitted, invoices_failed = submit_consolidated_invoices(month_close.claim_month)
+
+    # Claim the month's pending rows for this close; rows staged from now on
+    # wait for the next one. Rows a failed or killed close left "Closing" were
+    # never posted (posting and marking them Posted commit together) and are
+    # taken over too.
+    frappe.db.sql(f"""
+        update `tab{ADJUSTMENT_DOCTYPE}` set status = 'Closing', month_close = %s
+        where claim_month = %s and status in ('Pending', 'Closing')
+    """, (month_close.name, month_close.claim_month))
+    frappe.db.commit()
+
+    groups = frappe.db.sql(f"""
+        select custom_type, journal_type, supplier, party_account, counter_account,
+            sum(party_debit) - sum(party_credit) as party_amount,
+            sum(counter_debit) - sum(counter_credit) as counter_amount,
+            count(*) as adjustments, count(distinct purchase_invoice) as invoices
+        from `tab{ADJUSTMENT_DOCTYPE}`
+        where month_close = %s and status = 'Closing'
+        group by custom_type, journal_type, supplier, party_account, counter_account
+        order by custom_type, journal_type, supplier
+    """, month_close.name, as_dict=True)
+
+    posted = failed = adjustments = 0
+    for journal in get_consolidated_journals(groups, month_close.group_by, cint(month_close.chunk_rows)):
+        if post_consolidated_journal(month_close, journal):
+            posted += 1
+            adjustments += sum(group.adjustments for group in journal)
+        else:
+            failed += 1
+
+    failed += invoices_failed
+    month_close.db_set({
+        "status": "Failed" if failed and not (posted or invoices_submitted) else "Partially Completed" if failed else "Completed",
+        "invoices_submitted": invoices_submitted,
+        "journal_count": posted,
+        "failed_journals": failed,
+        "adjustment_count": adjustments
+    })
+    frappe.db.commit()
+
+
+def get_consolidated_journals(groups, group_by="Provider", chunk_rows=0):
+    """Split the aggregated groups into the Journal Entries to post.
+
+    Every journal has a single type and never splits a provider; in Chunk mode
+    providers are packed up to ``chunk_rows`` rows, cutting only where the
+    journal balances. A group posts a party row per invoice and one counter row.
+    """
+    chunk_rows = chunk_rows or 500
+    journals, current, rows, difference = [], [], 0, 0
+
+    for index, group in enumerate(groups):
+        current.append(group)
+        rows += (cint(group.invoices) or 1) + 1
+        difference += flt(group.party_amount) + flt(group.counter_amount)
+
+        following = groups[index + 1] if index + 1 < len(groups) else None
+        if following and (following.custom_type, following.journal_type) == (group.custom_type, group.journal_type):
+            if following.supplier == group.supplier:
+                continue
+            if group_by == "Chunk" and (rows < chunk_rows or flt(difference, 2)):
+                continue
+
+        journals.append(current)
+        current, rows, difference = [], 0, 0
+
+    return journals
+
+
+def post_consolidated_journal(month_close, groups):
+    first = groups[0]
+    suppliers = tuple({group.supplier for group in groups})
+    conditions = {
+        "month_close": month_close.name,
+        "custom_type": first.custom_type,
+        "journal_type": first.journal_type,
+        "suppliers": suppliers
+    }
+
+    try:
+        invoice_amounts = {}
+        for row in get_invoice_amounts(conditions):
+            invoice_amounts.setdefault((row.supplier, row.party_account, row.counter_account), []).append(row)
+
+        rows = []
+        for group in groups:
+            for invoice in invoice_amounts.get((group.supplier, group.party_account, group.counter_account), []):
+                rows.append(_get_account_row({
+                    "account": group.party_account,
+                    "party_type": "Supplier",
+                    "party": group.supplier,
+                    "reference_type": "Purchase Invoice",
+                    "reference_name": invoice.purchase_invoice
+                }, invoice.party_amount))
+            rows.append(_get_account_row({"account": group.counter_account}, group.counter_amount))
+        rows = [row for row in rows if row]
+
+        journal_entry = None
+        if rows:
+            je = frappe.new_doc("Journal Entry")
+            je.posting_date = month_close.posting_date
+            je.custom_type = first.custom_type
+            je.custom_journal_type = first.journal_type
+            je.custom_journal_number = f"CLOSE-{month_close.claim_month}"
+            je.custom_month_close = month_close.name
+            je.voucher_type = "Journal Entry"
+            for row in rows:
+                je.append("accounts", row)
+            je.insert(ignore_permissions=True)
+            journal_entry = je.name
+
+        # Drill-down link first, submit hooks read the journal's adjustments
+        frappe.db.sql(f"""
+            update `tab{ADJUSTMENT_DOCTYPE}` set journal_entry = %(journal_entry)s
+            where month_close = %(month_close)s and status = 'Closing' and custom_type = %(custom_type)s
+                and journal_type = %(journal_type)s and supplier in %(suppliers)s
+        """, {**conditions, "journal_entry": journal_entry})
+
+        if journal_entry:
+            je.submit()
+
+        frappe.db.sql(f"""
+            update `tab{ADJUSTMENT_DOCTYPE}` set status = 'Posted'
+            where month_close = %(month_close)s and status = 'Closing' and custom_type = %(custom_type)s
+                and journal_type = %(journal_type)s and supplier in %(suppliers)s
+        """, conditions)
+        frappe.db.commit()
+        return True
+
+    except Exception:
+        frappe.db.rollback()
+        frappe.log_error(frappe.get_traceback(), "Month Close Journal Error")
+        month_close.db_set("error", frappe.get_traceback())
+        frappe.db.commit()
+        return False
+
+    finally:
+        frappe.clear_messages()
+
+
+def get_invoice_amounts(conditions):
+    """Party amount (debit - credit) per Purchase Invoice of the groups a journal posts."""
+    return frappe.db.sql(f"""
+        select supplier, party_account, counter_account, purchase_invoice,
+            sum(party_debit) - sum(party_credit) as party_amount
+        from `tab{ADJUSTMENT_DOCTYPE}`
+        where month_close = %(month_close)s and status = 'Closing' and custom_type = %(custom_type)s
+            and journal_type = %(journal_type)s and supplier in %(suppliers)s
+        group by supplier, party_account, counter_account, purchase_invoice
+        order by supplier, purchase_invoice
+    """, conditions, as_dict=True)
+
+
+def _get_account_row(row, amount):
+    amount = flt(amount, 2)
+    if not amount:
+        return None
+
+    return {
+        **row,
+        "debit_in_account_currency": amount if amount > 0 else 0,
+        "credit_in_account_currency": -amount if amount < 0 else 0
+    }
@@ -0,0 +1,190 @@
+import hashlib
+
+import frappe
+from frappe.utils import cint, flt, now
+
+# Provider Payables Summary holds one row per (supplier, claim month, invoice
+# type). Submits and cancels add signed deltas with a single upsert, so
+# concurrent postings for the same provider never overwrite each other.
+SUMMARY_DOCTYPE = "Provider Payables Summary"
+AMOUNT_FIELDS = ("invoice_count", "total_claims", "rejections", "withholdings", "adjustments", "net_payable")
+
+JOURNAL_AMOUNT_FIELDS = {
+    "Rejection Journal": "rejections",
+    "Withholding Journal": "withholdings",
+    "Adjustment Journal": "adjustments"
+}
+
+DEFAULT_SUMMARY_LIMIT = 500
+MAX_SUMMARY_LIMIT = 5000
+
+
+def update_from_purchase_invoice(doc, method=None):
+    """doc_events hook for Purchase Invoice on_submit / on_cancel."""
+    if not doc.get("custom_invoice_type"):
+        return
+
+    sign = -1 if method == "on_cancel" else 1
+    key = (doc.supplier, doc.get("custom_claim_monthyear") or "", doc.custom_invoice_type)
+    _apply_deltas({
+        key: {
+            "invoice_count": sign,
+            "total_claims": sign * flt(doc.grand_total),
+            "net_payable": sign * flt(doc.grand_total)
+        }
+    })
+
+
+def update_from_journal_entry(doc, method=None):
+    """doc_events hook for Journal Entry on_submit / on_cancel."""
+    amount_field = JOURNAL_AMOUNT_FIELDS.get(doc.get("custom_type"))
+    if not amount_field:
+        return
+
+    # Payable movement per referenced invoice: credits raise it, debits reduce it
+    movements = {}
+    for row in doc.accounts:
+        if row.reference_type == "Purchase Invoice" and row.reference_name and row.party_type == "Supplier":
+            movements[row.reference_name] = (
+                movements.get(row.reference_name, 0) + flt(row.credit) - flt(row.debit)
+            )
+
+    if not movements:
+        return
+
+    sign = -1 if method == "on_cancel" else 1
+    deltas = {}
+    for invoice in frappe.get_all(
+        "Purchase Invoice",
+        filters={"name": ["in", list(movements)], "custom_invoice_type": ["is", "set"]},
+        fields=["name", "supplier", "custom_claim_monthyear", "custom_invoice_type"]
+    ):
+        key = (invoice.supplier, invoice.custom_claim_monthyear or "", invoice.custom_invoice_type)
+        movement = sign * movements[invoice.name]
+        delta = deltas.setdefault(key, {amount_field: 0, "net_payable": 0})
+        # Rejections and withholdings are reported as the amount they took off
+        delta[amount_field] += movement if amount_field == "adjustments" else -movement
+        delta["net_payable"] += movement
+
+    _apply_deltas(deltas)
+
+
+def rebuild_payables_summary():
+    """Recompute the whole summary from submitted documents with two grouped queries."""
+    totals = {}
+
+    for row in frappe.db.sql("""
+        select supplier, ifnull(custom_claim_monthyear, '') as claim_month, custom_invoice_type as invoice_type,
+            count(*) as invoice_count, sum(grand_total) as total
+        from `tabPurchase Invoice`
+        where docstatus = 1 and ifnull(custom_invoice_type, '') != ''
+        group by supplier, claim_month, invoice_type
+    """, as_dict=True):
+        totals[(row.supplier, row.claim_month, row.invoice_type)] = {
+            "invoice_count": row.invoice_count,
+            "total_claims": flt(row.total),
+            "net_payable": flt(row.total)
+        }
+
+    for row in frappe.db.sql("""
+        select pi.supplier, ifnull(pi.custom_claim_monthyear, '') as claim_month,
+            pi.custom_invoice_type as invoice_type, je.custom_type,
+            sum(jea.credit - jea.debit) as movement
+        from `tabJournal Entry Account` jea
+        join `tabJournal Entry` je on je.name = jea.parent
+        join `tabPurchase Invoice` pi on pi.name = jea.reference_name
+        where je.docstatus = 1 and je.custom_type in %(types)s
+            and jea.reference_type = 'Purchase Invoice' and jea.party_type = 'Supplier'
+            and ifnull(pi.custom_invoice_type, '') != ''
+        group by pi.supplier, claim_month, invoice_type, je.custom_type
+    """, {"types": tuple(JOURNAL_AMOUNT_FIELDS)}, as_dict=True):
+        amount_field = JOURNAL_AMOUNT_FIELDS[row.custom_type]
+        movement = flt(row.movement)
+        total = totals.setdefault((row.supplier, row.claim_month, row.invoice_type), {})
+        total[amount_field] = total.get(amount_field, 0) + (movement if amount_field == "adjustments" else -movement)
+        total["net_payable"] = total.get("net_payable", 0) + movement
+
+    frappe.db.delete(SUMMARY_DOCTYPE)
+    keys = list(totals)
+    for start in range(0, len(keys), 1000):
+        _apply_deltas({key: totals[key] for key in keys[start:start + 1000]})
+    frappe.db.commit()
+
+    return len(totals)
+
+
+# Provider payables per claim month and invoice type
+# api/method/smartclaims.api.payables.get_provider_payables
+@frappe.whitelist()
+def get_provider_payables(supplier=None, claim_month=None, invoice_type=None, limit=None, start=0):
+    """
+    Dummy JSON Input:
+    {
+        "supplier": "01-02-00269 SUNYANI MUNICIPAL HOSPITAL",
+        "claim_month": "09-2025",
+        "invoice_type": "Claims"
+    }
+    """
+    try:
+        filters = {}
+        for fieldname, value in (("supplier", supplier), ("claim_month", claim_month), ("invoice_type", invoice_type)):
+            if isinstance(value, str) and value.lstrip().startswith("["):
+                value = frappe.parse_json(value)
+            if value:
+                filters[fieldname] = ["in", value] if isinstance(value, list) else value
+
+        limit = min(cint(limit) or DEFAULT_SUMMARY_LIMIT, MAX_SUMMARY_LIMIT)
+        rows = frappe.get_all(
+            SUMMARY_DOCTYPE,
+            filters=filters,
+            fields=["supplier", "claim_month", "invoice_type", *AMOUNT_FIELDS],
+            order_by="supplier asc, claim_month asc, invoice_type asc",
+            limit_start=cint(start),
+            limit_page_length=limit
+        )
+        totals = frappe.get_all(
+            SUMMARY_DOCTYPE,
+            filters=filters,
+            fields=[f"sum({fieldname}) as {fieldname}" for fieldname in AMOUNT_FIELDS]
+        )[0]
+
+        frappe.local.response["http_status_code"] = 200
+        return {
+            "status": "success",
+            "rows": rows,
+            "totals": {fieldname: flt(totals.get(fieldname)) for fieldname in AMOUNT_FIELDS},
+            "has_more": len(rows) == limit
+        }
+
+    except Exception as e:
+        frappe.log_error(frappe.get_traceback(), "get_provider_payables error")
+        frappe.local.response["http_status_code"] = 500
+        return {"status": "failed", "error": str(e)}
+
+
+def _apply_deltas(deltas):
+    if not deltas:
+        return
+
+    timestamp, user = now(), frappe.session.user
+    values, params = [], []
+    for (supplier, claim_month, invoice_type), delta in deltas.items():
+        values.append("(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)")
+        params += [
+            _get_summary_name(supplier, claim_month, invoice_type), supplier, claim_month, invoice_type,
+            *(flt(delta.get(fieldname)) for fieldname in AMOUNT_FIELDS),
+            timestamp, timestamp, user, user
+        ]
+
+    updates = ", ".join(f"`{fieldname}` = `{fieldname}` + values(`{fieldname}`)" for fieldname in AMOUNT_FIELDS)
+    frappe.db.sql(f"""
+        insert into `tab{SUMMARY_DOCTYPE}`
+            (name, supplier, claim_month, invoice_type, {", ".join(f"`{f}`" for f in AMOUNT_FIELDS)},
+            creation, modified, owner, modified_by)
+        values {", ".join(values)}
+        on duplicate key update {updates}, modified = values(modified), modified_by = values(modified_by)
+    """, params)
+
+
+def _get_summary_name(supplier, claim_month, invoice_type):
+    return hashlib.md5(f"{supplier}\n{claim_month}\n{invoice_type}".encode()).hexdigest()
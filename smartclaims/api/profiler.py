@@ -0,0 +1,229 @@
+import cProfile
+import io
+import json
+import marshal
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+
+import frappe
+from frappe.utils import cint, flt, now
+
+# Enabled "Smartclaims Profile Capture" rules are published to Redis; every
+# worker re-reads them at most once per CAPTURE_POLL_SECONDS, so with capture
+# off a call costs one clock comparison.
+ACTIVE_CAPTURES_KEY = "smartclaims_profile_captures"
+CAPTURE_CALLS_KEY_PREFIX = "smartclaims_profile_calls|"
+CAPTURE_POLL_SECONDS = 5
+PROFILE_HEADER = "X-Smartclaims-Profile"
+TOP_FUNCTIONS = 40
+
+# site -> (checked at, captures)
+_captures = {}
+
+
+def start_profile(endpoint):
+    """Start profiling this call if an active capture matches it, else return None."""
+    captures = _get_active_captures()
+    if not captures:
+        return None
+
+    capture = _match_capture(captures, endpoint)
+    if not capture:
+        return None
+
+    # Calls are counted in Redis so N calls are captured across all workers
+    taken = frappe.cache.incr(frappe.cache.make_key(CAPTURE_CALLS_KEY_PREFIX + str(capture["name"])))
+    if taken > capture["max_calls"]:
+        return None
+
+    if capture["profiler"] == "Deterministic":
+        profile = DeterministicProfile(capture, endpoint)
+    else:
+        profile = SamplingProfile(capture, endpoint)
+    # The caller's frame bounds the sampled stacks, request handling is left out
+    profile.start(sys._getframe(1))
+    return profile
+
+
+def refresh_captures():
+    """Publish the enabled capture rules; called whenever a capture changes."""
+    captures = frappe.get_all(
+        "Smartclaims Profile Capture",
+        filters={"enabled": 1},
+        fields=["name", "endpoint", "header_value", "profiler", "sample_interval_ms", "max_calls", "captured_calls"]
+    )
+    for capture in captures:
+        frappe.cache.set(frappe.cache.make_key(CAPTURE_CALLS_KEY_PREFIX + str(capture.name)), capture.captured_calls)
+
+    frappe.cache.set(frappe.cache.make_key(ACTIVE_CAPTURES_KEY), frappe.as_json(captures, indent=None))
+    _captures.pop(frappe.local.site, None)
+
+
+class SamplingProfile:
+    """Sample the calling thread's stack from a helper thread every few milliseconds."""
+
+    def __init__(self, capture, endpoint):
+        self.capture = capture
+        self.endpoint = endpoint
+        self.interval = (cint(capture["sample_interval_ms"]) or 5) / 1000
+        self.stacks = Counter()
+        self._thread_id = threading.get_ident()
+        self._done = threading.Event()
+
+    def start(self, root):
+        self._root = root
+        self._start = time.perf_counter()
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+        self._sampler.start()
+
+    def _sample(self):
+        while not self._done.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            stack, code = [], None
+            while frame and frame is not self._root:
+                code = frame.f_code
+                stack.append(f"{code.co_filename}:{code.co_name}")
+                frame = frame.f_back
+
+            # Skip a sample that caught the call already stopping the profiler
+            if stack and code is not SamplingProfile.finish.__code__:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def finish(self):
+        self._done.set()
+        self._sampler.join()
+
+        folded = "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+        _enqueue_store(
+            self,
+            duration=time.perf_counter() - self._start,
+            samples=sum(self.stacks.values()),
+            top_functions=self.get_top_functions(),
+            file_name=f"{self.endpoint}.folded",
+            content=folded.encode()
+        )
+
+    def get_top_functions(self):
+        own, total = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            own[frames[-1]] += count
+            for frame in set(frames):
+                total[frame] += count
+
+        samples = sum(self.stacks.values()) or 1
+        lines = [f"{'own %':>7} {'total %':>8}  function"]
+        for frame, count in own.most_common(TOP_FUNCTIONS):
+            lines.append(f"{count * 100 / samples:7.1f} {total[frame] * 100 / samples:8.1f}  {frame}")
+        return "\n".join(lines)
+
+
+class DeterministicProfile:
+    """cProfile the call; exact call counts at a higher overhead."""
+
+    def __init__(self, capture, endpoint):
+        self.capture = capture
+        self.endpoint = endpoint
+        self.profile = cProfile.Profile()
+
+    def start(self, root):
+        self._start = time.perf_counter()
+        self.profile.enable()
+
+    def finish(self):
+        self.profile.disable()
+
+        summary = io.StringIO()
+        stats = pstats.Stats(self.profile, stream=summary)
+        stats.sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+
+        _enqueue_store(
+            self,
+            duration=time.perf_counter() - self._start,
+            samples=sum(call_count for _, call_count, _, _, _ in stats.stats.values()),
+            top_functions=summary.getvalue(),
+            file_name=f"{self.endpoint}.prof",
+            content=marshal.dumps(stats.stats)
+        )
+
+
+def store_profile(capture, endpoint, call_time, duration_ms, profiler, samples, top_functions, file_name, content):
+    """Background job: keep a captured profile with its attachment."""
+    profile = frappe.get_doc({
+        "doctype": "Smartclaims Profile",
+        "capture": capture,
+        "endpoint": endpoint,
+        "call_time": call_time,
+        "profiler": profiler,
+        "duration_ms": duration_ms,
+        "samples": samples,
+        "top_functions": top_functions
+    }).insert(ignore_permissions=True)
+
+    profile_file = frappe.get_doc({
+        "doctype": "File",
+        "file_name": f"{profile.name}-{file_name}",
+        "attached_to_doctype": "Smartclaims Profile",
+        "attached_to_name": profile.name,
+        "attached_to_field": "profile_file",
+        "is_private": 1,
+        "content": content
+    }).insert(ignore_permissions=True)
+    profile.db_set("profile_file", profile_file.file_url)
+
+    capture = frappe.get_doc("Smartclaims Profile Capture", capture)
+    capture.captured_calls = frappe.db.count("Smartclaims Profile", {"capture": capture.name})
+    if capture.captured_calls >= capture.max_calls:
+        # Saving runs validate (marks it Completed) and republishes the rules
+        capture.save(ignore_permissions=True)
+    else:
+        capture.db_set("captured_calls", capture.captured_calls)
+
+
+def _enqueue_store(profile, duration, samples, top_functions, file_name, content):
+    frappe.enqueue(
+        "smartclaims.api.profiler.store_profile",
+        queue="short",
+        capture=profile.capture["name"],
+        endpoint=profile.endpoint,
+        call_time=now(),
+        duration_ms=flt(duration * 1000, 1),
+        profiler=profile.capture["profiler"],
+        samples=samples,
+        top_functions=top_functions,
+        file_name=file_name,
+        content=content
+    )
+
+
+def _get_active_captures():
+    site = frappe.local.site
+    checked_at, captures = _captures.get(site, (0, None))
+    if time.monotonic() - checked_at < CAPTURE_POLL_SECONDS:
+        return captures
+
+    try:
+        value = frappe.cache.get(frappe.cache.make_key(ACTIVE_CAPTURES_KEY))
+        captures = json.loads(value) if value else []
+    except Exception:
+        captures = []
+
+    _captures[site] = (time.monotonic(), captures)
+    return captures
+
+
+def _match_capture(captures, endpoint):
+    header = None
+    request = getattr(frappe.local, "request", None)
+    if request:
+        header = frappe.get_request_header(PROFILE_HEADER)
+
+    for capture in captures:
+        if capture.get("endpoint") and capture["endpoint"] != endpoint:
+            continue
+        if capture.get("header_value") and capture["header_value"] != header:
+            continue
+        return capture
@@ -0,0 +1,93 @@
+import frappe
+
+from smartclaims.api.worker_cache import WorkerCache
+
+# Sales Invoices are looked up by the upstream invoice number (custom_invoice_number)
+SALES_INVOICE_FIELDS = [
+    "name",
+    "custom_invoice_number",
+    "docstatus",
+    "customer",
+    "custom_insurance_type",
+    "custom_cover_period_start",
+    "custom_cover_period_end",
+    "custom_current_invoice_amount",
+    "grand_total"
+]
+
+# Resolved invoices of this worker; only hits are cached, so an invoice that
+# is created later is still found on the next lookup
+_invoices = WorkerCache("smartclaims_sales_invoice_version", maxsize=10000)
+
+
+def resolve_invoice_numbers(invoice_numbers):
+    """Return ``{invoice number: Sales Invoice key fields or None}``.
+
+    Misses are fetched in one indexed query; a submitted invoice wins over a
+    draft with the same number, cancelled invoices are ignored.
+    """
+    resolved, missing = {}, []
+    for invoice_number in dict.fromkeys(invoice_numbers):
+        invoice = _invoices.get(invoice_number)
+        if invoice:
+            resolved[invoice_number] = invoice
+        else:
+            missing.append(invoice_number)
+
+    if missing:
+        for invoice in frappe.get_all(
+            "Sales Invoice",
+            filters={"custom_invoice_number": ["in", missing], "docstatus": ["<", 2]},
+            fields=SALES_INVOICE_FIELDS,
+            order_by="docstatus desc, creation desc"
+        ):
+            if invoice.custom_invoice_number not in resolved:
+                resolved[invoice.custom_invoice_number] = invoice
+                _invoices.set(invoice.custom_invoice_number, invoice)
+
+    return {invoice_number: resolved.get(invoice_number) for invoice_number in invoice_numbers}
+
+
+def resolve_invoice_number(invoice_number):
+    return resolve_invoice_numbers([invoice_number])[invoice_number]
+
+
+def clear_invoice_cache(doc=None, method=None):
+    """doc_events hook on Sales Invoice submit / cancel / delete: evict the invoice's number."""
+    if doc and doc.get("custom_invoice_number"):
+        _invoices.evict(doc.custom_invoice_number)
+    else:
+        _invoices.invalidate()
+
+
+# Resolve upstream invoice numbers to Sales Invoices
+# api/method/smartclaims.api.resolver.resolve_sales_invoices
+@frappe.whitelist()
+def resolve_sales_invoices(invoice_numbers):
+    """
+    Dummy JSON Input:
+    {
+        "invoice_numbers": ["INV-2025-0001", "INV-2025-0002"]
+    }
+    """
+    try:
+        if isinstance(invoice_numbers, str):
+            invoice_numbers = frappe.parse_json(invoice_numbers) if invoice_numbers.lstrip().startswith("[") else invoice_numbers.split(",")
+
+        invoice_numbers = [invoice_number.strip() for invoice_number in invoice_numbers if invoice_number and invoice_number.strip()]
+        if not invoice_numbers:
+            frappe.local.response["http_status_code"] = 400
+            return {"status": "failed", "error": "No invoice numbers provided"}
+
+        resolved = resolve_invoice_numbers(invoice_numbers)
+        frappe.local.response["http_status_code"] = 200
+        return {
+            "status": "success",
+            "invoices": resolved,
+            "not_found": [invoice_number for invoice_number, invoice in resolved.items() if not invoice]
+        }
+
+    except Exception as e:
+        frappe.log_error(frappe.get_traceback(), "resolve_sales_invoices error")
+        frappe.local.response["http_status_code"] = 500
+        return {"status": "failed", "error": str(e)}
@@ -0,0 +1,122 @@
+import frappe
+from frappe.utils import cint, now_datetime, time_diff_in_seconds
+
+# Drafts created with defer_submit=1 are queued here and submitted in batches
+# by the scheduler, outside the API request.
+SUBMITTER_LOCK_KEY = "smartclaims_submission_lock"
+SUBMITTER_LOCK_TTL = 30 * 60
+
+QUEUE_ORDER = {
+    "Oldest First": "name asc",
+    "Posting Date": "posting_date asc, name asc"
+}
+
+
+def queue_for_submission(doc):
+    frappe.get_doc({
+        "doctype": "Smartclaims Submission Queue",
+        "reference_doctype": doc.doctype,
+        "reference_name": doc.name,
+        "posting_date": doc.get("posting_date") or doc.get("invoice_date"),
+        "status": "Queued"
+    }).insert(ignore_permissions=True)
+
+
+def submit_queued_documents():
+    """Scheduler job: submit the next batch of queued drafts, one commit per document."""
+    lock_key = frappe.cache.make_key(SUBMITTER_LOCK_KEY)
+    if not frappe.cache.set(lock_key, 1, nx=True, ex=SUBMITTER_LOCK_TTL):
+        # Previous run is still going
+        return
+
+    try:
+        settings = frappe.get_cached_doc("Smartclaims Settings")
+        queued = frappe.get_all(
+            "Smartclaims Submission Queue",
+            filters={"status": "Queued"},
+            fields=["name", "reference_doctype", "reference_name", "attempts"],
+            order_by=QUEUE_ORDER.get(settings.submission_order, QUEUE_ORDER["Oldest First"]),
+            limit=cint(settings.submission_batch_size) or 200
+        )
+        max_attempts = cint(settings.max_submission_attempts) or 3
+
+        for row in queued:
+            _submit_queued_document(row, max_attempts)
+    finally:
+        frappe.cache.delete(lock_key)
+
+
+def _submit_queued_document(row, max_attempts):
+    try:
+        doc = frappe.get_doc(row.reference_doctype, row.reference_name)
+        if doc.docstatus == 0:
+            doc.submit()
+
+        frappe.db.set_value("Smartclaims Submission Queue", row.name, {
+            "status": "Submitted" if doc.docstatus == 1 else "Failed",
+            "attempts": row.attempts + 1,
+            "submitted_on": now_datetime(),
+            "error": None if doc.docstatus == 1 else f"{row.reference_doctype} {row.reference_name} is cancelled"
+        })
+        frappe.db.commit()
+
+    except Exception:
+        frappe.db.rollback()
+        attempts = row.attempts + 1
+        frappe.db.set_value("Smartclaims Submission Queue", row.name, {
+            "status": "Failed" if attempts >= max_attempts else "Queued",
+            "attempts": attempts,
+            "error": frappe.get_traceback()
+        })
+        frappe.db.commit()
+
+    finally:
+        frappe.clear_messages()
+
+
+# Depth of the deferred submission queue
+# api/method/smartclaims.api.submission.get_submission_queue_depth
+@frappe.whitelist()
+def get_submission_queue_depth():
+    try:
+        depth = {}
+        for row in frappe.get_all(
+            "Smartclaims Submission Queue",
+            filters={"status": ["in", ["Queued", "Failed"]]},
+            fields=["reference_doctype", "status", "count(name) as count", "min(creation) as oldest"],
+            group_by="reference_doctype, status"
+        ):
+            entry = depth.setdefault(row.reference_doctype, {"queued": 0, "failed": 0, "oldest_queued_seconds": 0})
+            entry[row.status.lower()] = row.count
+            if row.status == "Queued":
+                entry["oldest_queued_seconds"] = cint(time_diff_in_seconds(now_datetime(), row.oldest))
+
+        frappe.local.response["http_status_code"] = 200
+        return {
+            "status": "success",
+            "queued": sum(entry["queued"] for entry in depth.values()),
+            "failed": sum(entry["failed"] for entry in depth.values()),
+            "by_doctype": depth
+        }
+
+    except Exception as e:
+        frappe.log_error(frappe.get_traceback(), "get_submission_queue_depth error")
+        frappe.local.response["http_status_code"] = 500
+        return {"status": "failed", "error": str(e)}
+
+
+# Put failed documents back in the queue
+# api/method/smartclaims.api.submission.requeue_failed_submissions
+@frappe.whitelist()
+def requeue_failed_submissions(reference_doctype=None):
+    frappe.only_for("System Manager")
+
+    filters = {"status": "Failed"}
+    if reference_doctype:
+        filters["reference_doctype"] = reference_doctype
+
+    failed = frappe.get_all("Smartclaims Submission Queue", filters=filters, pluck="name")
+    for name in failed:
+        frappe.db.set_value("Smartclaims Submission Queue", name, {"status": "Queued", "attempts": 0})
+
+    return {"status": "success", "requeued": len(failed)}
@@ -0,0 +1,146 @@
+import hashlib
+import json
+
+import frappe
+
+from smartclaims.api.jobs import async_capable
+from smartclaims.api.mapping import get_mapping_plan
+
+SYNC_CHUNK_SIZE = 500
+SYNC_ROW_SAVEPOINT = "sync_row"
+
+# Master data kinds that can be synced: the payload key identifying a record
+# and the field it is looked up by
+SYNC_TARGETS = {
+    "Supplier": {"id_key": "custom_provider_id", "lookup_field": "supplier_name"},
+    "Customer": {"id_key": "company_id", "lookup_field": "customer_name"}
+}
+
+
+def get_content_hash(values):
+    """Stable hash of mapped field values, independent of key order."""
+    return hashlib.sha256(
+        json.dumps(values, sort_keys=True, default=str, separators=(",", ":")).encode()
+    ).hexdigest()
+
+
+# Sync provider registry
+# api/method/smartclaims.api.sync.sync_providers
+@frappe.whitelist()
+@async_capable(queue="long")
+def sync_providers(**kwargs):
+    """
+    Dummy JSON Input:
+    {
+        "records": [
+            {
+                "custom_provider_id": "01-02-00269 SUNYANI MUNICIPAL HOSPITAL",
+                "custom_provider_name": "Sunyani Municipal Hospital",
+                "custom_tin": "C0001234567"
+            }
+        ]
+    }
+    """
+    return _sync_records(kwargs, "Supplier")
+
+
+# Sync company registry
+# api/method/smartclaims.api.sync.sync_companies
+@frappe.whitelist()
+@async_capable(queue="long")
+def sync_companies(**kwargs):
+    """
+    Dummy JSON Input:
+    {
+        "records": [
+            {
+                "company_id": "COMP-0001",
+                "custom_company_id": "COMP-0001",
+                "custom_company_name": "Acme Ghana Ltd"
+            }
+        ]
+    }
+    """
+    return _sync_records(kwargs, "Customer")
+
+
+def _sync_records(kwargs, doctype):
+    try:
+        records = kwargs.get("records")
+        if isinstance(records, str):
+            records = frappe.parse_json(records)
+
+        if not records or not isinstance(records, list):
+            frappe.local.response["http_status_code"] = 400
+            return {"status": "failed", "error": "Invalid JSON : No records provided"}
+
+        target = SYNC_TARGETS[doctype]
+        plan = get_mapping_plan(doctype)
+        errors = []
+
+        # Map and hash every record in one pass; a record sent twice keeps its last version
+        incoming = {}
+        for row, record in enumerate(records):
+            record_id = record.get(target["id_key"])
+            if not record_id:
+                errors.append({"row": row, "status": 400, "error": f"{target['id_key']} is required"})
+                continue
+
+            values = plan.map(record)
+            incoming[record_id] = (row, values, get_content_hash(values))
+
+        existing = {
+            d[target["lookup_field"]]: d
+            for d in frappe.get_all(
+                doctype,
+                filters={target["lookup_field"]: ["in", list(incoming)]},
+                fields=["name", target["lookup_field"], "custom_content_hash"]
+            )
+        }
+
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+        pending = 0
+        for record_id, (row, values, content_hash) in incoming.items():
+            current = existing.get(record_id)
+            if current and current.custom_content_hash == content_hash:
+                counts["unchanged"] += 1
+                continue
+
+            frappe.db.savepoint(SYNC_ROW_SAVEPOINT)
+            try:
+                if current:
+                    doc = frappe.get_doc(doctype, current.name)
+                    doc.update(values)
+                    doc.custom_content_hash = content_hash
+                    doc.save(ignore_permissions=True)
+                    counts["updated"] += 1
+                else:
+                    doc = frappe.get_doc({"doctype": doctype, **values, "custom_content_hash": content_hash})
+                    doc.insert(ignore_permissions=True)
+                    counts["inserted"] += 1
+
+            except Exception as e:
+                frappe.db.rollback(save_point=SYNC_ROW_SAVEPOINT)
+                errors.append({"row": row, target["id_key"]: record_id, "status": 400, "error": str(e)})
+
+            finally:
+                frappe.clear_messages()
+
+            pending += 1
+            if pending >= SYNC_CHUNK_SIZE:
+                frappe.db.commit()
+                pending = 0
+
+        frappe.db.commit()
+
+        frappe.local.response["http_status_code"] = 207 if errors else 200
+        return {"status": "partial" if errors else "success", **counts, "failed": len(errors), "errors": errors}
+
+    except frappe.PermissionError as e:
+        frappe.local.response["http_status_code"] = 403
+        return {"status": "failed", "error": str(e)}
+
+    except Exception as e:
+        frappe.log_error(frappe.get_traceback(), f"{doctype} sync error")
+        frappe.local.response["http_status_code"] = 500
+        return {"status": "failed", "error": str(e)}
@@ -0,0 +1,98 @@
+# Copyright (c) 2026, riddhi and contributors
+# For license information, please see license.txt
+
+import base64
+import json
+from unittest.mock import MagicMock, patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from smartclaims.api import admission
+
+
+class TestAdmission(FrappeTestCase):
+	def acquire(self, results, waiting=1, max_queue=2):
+		script = MagicMock(side_effect=results)
+		pipeline = MagicMock()
+		pipeline.execute.return_value = [0, 1, True, waiting]
+
+		with (
+			patch.object(frappe, "conf", frappe._dict(http_timeout=300)),
+			patch.object(frappe, "generate_hash", return_value="slot-token"),
+			patch.object(frappe.cache, "make_key", side_effect=lambda key: key),
+			patch.object(frappe.cache, "pipeline", return_value=pipeline),
+			patch.object(frappe.cache, "zrem") as zrem,
+			patch.object(admission, "_get_acquire_script", return_value=script),
+			patch.object(admission.time, "sleep"),
+		):
+			slot = admission.AdmissionSlot("create_purchase_invoice", "api-key", 4, 2)
+			acquired = slot.acquire(max_queue, max_wait=1)
+			slot.release()
+
+		return acquired, script, pipeline, zrem
+
+	def test_free_slot_is_taken_and_released(self):
+		acquired, script, pipeline, _ = self.acquire([1])
+
+		self.assertTrue(acquired)
+		keys, args = script.call_args.kwargs["keys"], script.call_args.kwargs["args"]
+		self.assertEqual(keys, [
+			admission.SLOTS_KEY_PREFIX + "create_purchase_invoice",
+			admission.SLOTS_KEY_PREFIX + "create_purchase_invoice|api-key"
+		])
+		# Slots outlive the HTTP timeout, so a running call never loses its slot
+		token, started, stale_before, endpoint_cap, client_cap, ttl = args
+		self.assertEqual((token, endpoint_cap, client_cap, ttl), ("slot-token", 4, 2, 300 + admission.SLOT_TTL_MARGIN))
+		self.assertEqual(started - stale_before, ttl)
+		for key in keys:
+			pipeline.zrem.assert_any_call(key, "slot-token")
+
+	def test_waiting_call_gets_a_freed_slot(self):
+		acquired, script, _, zrem = self.acquire([0, 0, 1])
+
+		self.assertTrue(acquired)
+		self.assertEqual(script.call_count, 3)
+		zrem.assert_called_once_with(admission.WAITING_KEY_PREFIX + "create_purchase_invoice", "slot-token")
+
+	def test_full_queue_is_rejected(self):
+		acquired, script, pipeline, zrem = self.acquire([0], waiting=3)
+
+		self.assertFalse(acquired)
+		self.assertEqual(script.call_count, 1)
+		zrem.assert_called_once_with(admission.WAITING_KEY_PREFIX + "create_purchase_invoice", "slot-token")
+		pipeline.zrem.assert_not_called()
+
+	def test_rejected_call_gets_429_with_retry_after(self):
+		settings = frappe._dict(max_concurrent_per_endpoint=4, max_concurrent_per_client=2,
+			max_admission_queue=10, max_admission_wait_ms=1500)
+		endpoint = MagicMock(__name__="create_purchase_invoice")
+
+		with (
+			patch.object(frappe.local, "request", object(), create=True),
+			patch.object(frappe, "get_cached_doc", return_value=settings),
+			patch.object(admission, "_get_client", return_value="api-key"),
+			patch.object(admission.AdmissionSlot, "acquire", return_value=False),
+		):
+			response = admission.admission_controlled(endpoint)(supplier="Provider A")
+
+		endpoint.assert_not_called()
+		self.assertEqual(response.status_code, 429)
+		self.assertEqual(response.headers["Retry-After"], "2")
+		self.assertEqual(json.loads(response.get_data(as_text=True))["retry_after"], 2)
+		self.assertEqual(frappe.local.response["http_status_code"], 429)
+
+	def test_client_is_the_api_key_or_the_user(self):
+		basic = "Basic " + base64.b64encode(b"basic-key:secret").decode()
+		for authorization, client in (
+			("token token-key:secret", "token-key"),
+			(basic, "basic-key"),
+			("Basic not-base64", "Administrator"),
+			("Bearer oauth-token", "Administrator"),
+			(None, "Administrator"),
+		):
+			with (
+				patch.object(frappe, "get_request_header", return_value=authorization),
+				patch.object(frappe, "session", frappe._dict(user="Administrator")),
+			):
+				self.assertEqual(admission._get_client(), client, authorization)
@@ -0,0 +1,39 @@
+# Copyright (c) 2026, riddhi and contributors
+# For license information, please see license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from smartclaims.api import balances
+
+PAYABLE = "Creditors - SC"
+EXPENSE = "Claims Expense - SC"
+
+
+def _row(account, party=None, debit=0, credit=0):
+	return frappe._dict(
+		account=account, party_type="Supplier" if party else None, party=party, debit=debit, credit=credit,
+		precision=lambda fieldname: 2
+	)
+
+
+class TestBalances(FrappeTestCase):
+	def test_party_on_several_lines_carries_its_balance(self):
+		doc = frappe._dict(custom_type="Rejection Journal", accounts=[
+			_row(PAYABLE, "Provider A", debit=100),
+			_row(PAYABLE, "Provider B", debit=40),
+			_row(PAYABLE, "Provider A", debit=25),
+			_row(EXPENSE, credit=165),
+			_row(PAYABLE, "Provider A", credit=10),
+		])
+		opening = {(PAYABLE, "Supplier", "Provider A"): -500, (EXPENSE, None, None): 1000}
+
+		with patch.object(balances, "get_opening_balances", return_value=opening):
+			balances.set_running_balances(doc)
+
+		self.assertEqual(
+			[row.custom_account_balance for row in doc.accounts],
+			[-400, 40, -375, 835, -385]
+		)
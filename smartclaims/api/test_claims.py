@@ -0,0 +1,58 @@
+# Copyright (c) 2026, riddhi and contributors
+# For license information, please see license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from smartclaims.api import claims
+
+RESTRICTED = " and (`tabPurchase Invoice`.`company` in ('_Test Company'))"
+
+
+def _row(name, posting_date):
+	return frappe._dict(name=name, posting_date=posting_date)
+
+
+class TestClaims(FrappeTestCase):
+	def test_view_and_filters_are_validated(self):
+		self.assertEqual(claims.get_claims("everything")["status"], "failed")
+		self.assertEqual(frappe.local.response["http_status_code"], 400)
+
+		response = claims.get_claims("provider", claim_month="09-2026")
+		self.assertIn("provider", response["error"])
+		self.assertEqual(frappe.local.response["http_status_code"], 400)
+
+	def test_next_page_starts_after_the_cursor(self):
+		pages = [[_row("PINV-3", "2026-09-03"), _row("PINV-2", "2026-09-02"), _row("PINV-1", "2026-09-01")], []]
+
+		with patch.object(claims, "get_claim_rows", side_effect=pages) as get_claim_rows:
+			first = claims.get_claims("provider", provider="Provider A", limit=2)
+			second = claims.get_claims("provider", provider="Provider A", limit=2, cursor=first["next_cursor"])
+
+		self.assertEqual([row.name for row in first["rows"]], ["PINV-3", "PINV-2"])
+		self.assertTrue(first["has_more"])
+		self.assertEqual(get_claim_rows.call_args_list[1].args[2], ["2026-09-02", "PINV-2"])
+		self.assertFalse(second["has_more"])
+		self.assertIsNone(second["next_cursor"])
+
+	def test_provider_view_is_newest_first(self):
+		with patch.object(frappe.db, "sql", return_value=[]) as sql:
+			claims.get_claim_rows(claims.CLAIM_VIEWS["provider"], {"supplier": "Provider A"}, None, 10)
+
+		query = sql.call_args.args[0]
+		self.assertLess(query.index("`posting_date` DESC"), query.index("`name` DESC"))
+
+	def test_user_permissions_apply_to_every_view(self):
+		with (
+			patch.object(claims, "get_match_cond", return_value=RESTRICTED),
+			patch.object(frappe.db, "sql", return_value=[]) as sql,
+		):
+			claims.get_claim_rows(claims.CLAIM_VIEWS["member"], {"custom_member_number": "26405474"}, None, 10)
+			claims.get_claim_rows(claims.CLAIM_VIEWS["member_lines"], {"custom_member_number": "26405474"}, None, 10)
+
+		member, member_lines = (call.args[0] for call in sql.call_args_list)
+		self.assertIn("`tabPurchase Invoice`.`company` in ('_Test Company')", member)
+		self.assertIn("`tabPurchase Invoice`.`company` in ('_Test Company')", member_lines)
+		self.assertIn("JOIN `tabPurchase Invoice`", member_lines)
@@ -0,0 +1,95 @@
+# Copyright (c) 2026, riddhi and contributors
+# For license information, please see license.txt
+
+from unittest.mock import MagicMock, patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from smartclaims.api import consolidation, member_history
+
+VALUES = {
+	"supplier": "Provider A", "custom_claim_monthyear": "09-2026", "custom_invoice_type": "Claims",
+	"custom_member_number": "26405474", "posting_date": "2026-09-30"
+}
+ITEMS = [{"item_code": "Consultation", "qty": 1, "rate": 100}, {"item_code": "Drugs", "qty": 2, "rate": 25}]
+
+
+class TestConsolidation(FrappeTestCase):
+	def add_claim(self, draft, line_count):
+		settings = frappe._dict(max_lines_per_invoice=200)
+		queries, docs = [], []
+
+		def sql(query, values=None, *args, **kwargs):
+			queries.append((query, values))
+			return [(line_count, line_count)] if "count(*)" in query else []
+
+		def get_doc(values):
+			doc = MagicMock(status="Draft", posting_date="2026-09-30")
+			doc.name = "ACC-PINV-NEW"
+			docs.append((values, doc))
+			return doc
+
+		with (
+			patch.object(frappe, "get_cached_doc", return_value=settings),
+			patch.object(frappe, "get_all", return_value=["Consultation", "Drugs"]),
+			patch.object(frappe, "get_doc", side_effect=get_doc),
+			patch.object(frappe.db, "get_value", return_value=draft),
+			patch.object(frappe.db, "sql", side_effect=sql),
+			patch.object(consolidation, "add_consolidated_claim") as add_consolidated_claim,
+		):
+			name = consolidation.add_claim_to_invoice({"claim_number": "CLM-9", **VALUES}, dict(VALUES), ITEMS)
+
+		return name, queries, docs, add_consolidated_claim
+
+	def test_claim_is_appended_to_the_draft_without_saving_it(self):
+		draft = frappe._dict(name="ACC-PINV-1", posting_date="2026-09-01", status="Draft")
+
+		name, queries, docs, add_consolidated_claim = self.add_claim(draft, line_count=3)
+
+		self.assertEqual(name, "ACC-PINV-1")
+		self.assertEqual([values["idx"] for values, doc in docs], [4, 5])
+		self.assertEqual([values["amount"] for values, doc in docs], [100, 50])
+		self.assertTrue(all(values["parent"] == "ACC-PINV-1" for values, doc in docs))
+		self.assertTrue(all(values["custom_claim_number"] == "CLM-9" for values, doc in docs))
+		for _values, doc in docs:
+			doc.db_insert.assert_called_once()
+			doc.save.assert_not_called()
+
+		query, params = queries[-1]
+		self.assertIn("custom_claim_count = custom_claim_count + 1", query)
+		self.assertIn("grand_total = grand_total + %(amount)s", query)
+		self.assertEqual((params["name"], params["amount"], params["total_qty"]), ("ACC-PINV-1", 150, 3))
+		self.assertEqual(add_consolidated_claim.call_args.args[2:], ("CLM-9", 150))
+
+	def test_full_draft_starts_a_new_invoice(self):
+		draft = frappe._dict(name="ACC-PINV-1", posting_date="2026-09-01", status="Draft")
+
+		name, _queries, docs, add_consolidated_claim = self.add_claim(draft, line_count=199)
+
+		self.assertEqual(name, "ACC-PINV-NEW")
+		(values, doc), = docs
+		self.assertEqual(values["doctype"], "Purchase Invoice")
+		self.assertEqual(values["custom_claim_count"], 1)
+		self.assertNotIn("custom_member_number", values)
+		self.assertEqual([line["custom_member_number"] for line in values["items"]], ["26405474", "26405474"])
+		doc.insert.assert_called_once()
+		add_consolidated_claim.assert_called_once()
+
+	def test_claims_of_one_draft_are_kept_apart_in_member_history(self):
+		history = {"year": 2026, "recent_claims": [], "ytd_by_provider": {}, "open_refunds": {}}
+		invoice = frappe._dict(name="ACC-PINV-1", posting_date="2026-09-01", status="Draft")
+		scheduled = []
+
+		with patch.object(frappe.db, "after_commit", MagicMock(add=scheduled.append)):
+			member_history.add_consolidated_claim(invoice, VALUES, "CLM-1", 100)
+			member_history.add_consolidated_claim(invoice, VALUES, "CLM-2", 40)
+
+		for callback in scheduled:
+			self.assertEqual(callback.args[:2], ("26405474", "after_insert"))
+			member_history._apply_event(history, "after_insert", callback.args[2])
+
+		self.assertEqual(
+			[(claim["name"], claim["claim_number"], claim["amount"]) for claim in history["recent_claims"]],
+			[("ACC-PINV-1", "CLM-2", 40), ("ACC-PINV-1", "CLM-1", 100)]
+		)
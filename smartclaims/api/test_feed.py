@@ -0,0 +1,53 @@
+# Copyright (c) 2026, riddhi and contributors
+# For license information, please see license.txt
+
+import datetime
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from smartclaims.api import feed
+
+
+class TestFeed(FrappeTestCase):
+	def test_cursor_round_trip(self):
+		row = frappe._dict(modified="2026-10-01 09:30:00.123456", name="ACC-PINV-2026-00001")
+		self.assertEqual(feed.decode_cursor(feed.encode_cursor(row)), (row.modified, row.name))
+		self.assertIsNone(feed.decode_cursor(None))
+		self.assertRaises(frappe.ValidationError, feed.decode_cursor, "not a cursor")
+
+	def test_next_poll_resumes_after_last_row(self):
+		pages = [
+			[
+				frappe._dict(name="PINV-1", modified="2026-10-01 09:00:00"),
+				frappe._dict(name="PINV-2", modified="2026-10-01 09:00:00")
+			],
+			[]
+		]
+		fields = (["name", "modified"], [])
+
+		with (
+			patch.object(feed, "_get_fields", return_value=fields),
+			patch.object(feed, "get_feed_rows", side_effect=pages) as get_feed_rows,
+		):
+			first = feed.get_changes("Purchase Invoice", limit=2, format="json")
+			second = feed.get_changes("Purchase Invoice", cursor=first["next_cursor"], limit=2, format="json")
+
+		self.assertTrue(first["has_more"])
+		self.assertEqual(get_feed_rows.call_args_list[0].args[2], None)
+		self.assertEqual(get_feed_rows.call_args_list[1].args[2], ("2026-10-01 09:00:00", "PINV-2"))
+		# An empty page hands the same cursor back
+		self.assertEqual(second["next_cursor"], first["next_cursor"])
+		self.assertFalse(second["has_more"])
+
+	def test_recent_changes_wait_for_the_commit_lag(self):
+		with (
+			patch.object(feed, "now_datetime", return_value=datetime.datetime(2026, 10, 1, 9, 30)),
+			patch.object(frappe.db, "sql", return_value=[]) as sql,
+		):
+			feed.get_feed_rows("Credit Note", ["name", "modified"], None, 10)
+
+		query, params = sql.call_args.args[0], str(sql.call_args.args[1:])
+		self.assertIn("`modified`<", query.replace(" ", ""))
+		self.assertIn("2026-10-01 09:25:00", query + params)
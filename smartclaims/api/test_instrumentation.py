@@ -0,0 +1,45 @@
+# Copyright (c) 2026, riddhi and contributors
+# For license information, please see license.txt
+
+from unittest.mock import MagicMock, patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from smartclaims.api import instrumentation
+
+
+class TestInstrumentation(FrappeTestCase):
+	def test_metrics_are_cumulative_prometheus_histograms(self):
+		stored = {
+			b"count": b"3", b"seconds": b"0.7", b"bucket:0.05": b"1", b"bucket:0.25": b"2",
+			b"status:201": b"2", b"status:409": b"1", b"phase:insert": b"0.5", b"queries": b"12"
+		}
+		pipeline = MagicMock()
+		pipeline.execute.return_value = [stored]
+
+		with (
+			patch.object(frappe, "only_for"),
+			patch.object(frappe.cache, "make_key", side_effect=lambda key: key),
+			patch.object(frappe.cache, "smembers", return_value={b"create_purchase_invoice"}),
+			patch.object(frappe.cache, "pipeline", return_value=pipeline),
+			patch.object(instrumentation, "get_admission_metrics", return_value=[]),
+		):
+			lines = instrumentation.get_metrics().get_data(as_text=True).splitlines()
+
+		labels = 'endpoint="create_purchase_invoice"'
+		for line in (
+			f'smartclaims_request_duration_seconds_bucket{{{labels},le="0.025"}} 0',
+			f'smartclaims_request_duration_seconds_bucket{{{labels},le="0.05"}} 1',
+			f'smartclaims_request_duration_seconds_bucket{{{labels},le="0.1"}} 1',
+			f'smartclaims_request_duration_seconds_bucket{{{labels},le="0.25"}} 3',
+			f'smartclaims_request_duration_seconds_bucket{{{labels},le="+Inf"}} 3',
+			f"smartclaims_request_duration_seconds_sum{{{labels}}} 0.7",
+			f"smartclaims_request_duration_seconds_count{{{labels}}} 3",
+			f'smartclaims_requests_total{{{labels},status="409"}} 1',
+			f'smartclaims_phase_seconds_total{{{labels},phase="insert"}} 0.5',
+			f"smartclaims_sql_queries_total{{{labels}}} 12",
+			f"smartclaims_sql_seconds_total{{{labels}}} 0",
+		):
+			self.assertIn(line, lines)
+		self.assertIn("# TYPE smartclaims_request_duration_seconds histogram", lines)
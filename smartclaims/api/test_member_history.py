@@ -0,0 +1,89 @@
+# Copyright (c) 2026, riddhi and contributors
+# For license information, please see license.txt
+
+import json
+from unittest.mock import MagicMock, patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import getdate
+
+from smartclaims.api import member_history
+
+
+def _claim(name="ACC-PINV-1", amount=100, docstatus=0):
+	return member_history._get_claim(frappe._dict(
+		name=name, claim_number="CLM-1", posting_date=f"{getdate().year}-02-10", supplier="Provider A",
+		invoice_type="Claims", amount=amount, outstanding_amount=amount, status="Draft", docstatus=docstatus
+	))
+
+
+def _history(year=None):
+	return {"year": year or getdate().year, "recent_claims": [], "ytd_by_provider": {}, "open_refunds": {}}
+
+
+class TestMemberHistory(FrappeTestCase):
+	def test_insert_submit_cancel(self):
+		history = _history()
+
+		member_history._apply_event(history, "after_insert", _claim())
+		self.assertEqual([claim["docstatus"] for claim in history["recent_claims"]], [0])
+		self.assertEqual(history["ytd_by_provider"], {})
+
+		member_history._apply_event(history, "on_submit", _claim(docstatus=1))
+		self.assertEqual([claim["docstatus"] for claim in history["recent_claims"]], [1])
+		self.assertEqual(history["ytd_by_provider"]["Provider A"]["Claims"], {"count": 1, "amount": 100})
+
+		member_history._apply_event(history, "on_cancel", _claim(docstatus=2))
+		self.assertEqual(history["recent_claims"], [])
+		self.assertEqual(history["ytd_by_provider"]["Provider A"]["Claims"], {"count": 0, "amount": 0})
+
+	def test_history_of_last_year_is_dropped(self):
+		pipeline = MagicMock()
+		pipeline.get.return_value = json.dumps(_history(getdate().year - 1))
+
+		with patch.object(frappe.cache, "transaction", side_effect=lambda update, key: update(pipeline)):
+			member_history._update_cached("26405474", "on_submit", _claim(docstatus=1))
+
+		pipeline.delete.assert_called_once()
+		pipeline.setex.assert_not_called()
+
+		built = _history()
+		with (
+			patch.object(member_history, "_get_cached", return_value=_history(getdate().year - 1)),
+			patch.object(member_history, "build_member_history", return_value=built),
+			patch.object(member_history, "_set_cached") as set_cached,
+		):
+			self.assertIs(member_history.get_member_history("26405474"), built)
+		set_cached.assert_called_once_with("26405474", built)
+
+	def test_least_recently_read_members_are_evicted(self):
+		with (
+			patch.object(frappe.cache, "make_key", side_effect=lambda key: key),
+			patch.object(frappe.cache, "zcard", return_value=member_history.MAX_CACHED_MEMBERS + 2),
+			patch.object(frappe.cache, "zpopmin", return_value=[(b"111", 1.0), (b"222", 2.0)]) as zpopmin,
+			patch.object(frappe.cache, "delete") as delete,
+		):
+			member_history._evict()
+
+		zpopmin.assert_called_once_with(member_history.HISTORY_LRU_KEY, 2)
+		delete.assert_called_once_with(
+			member_history.HISTORY_KEY_PREFIX + "111", member_history.HISTORY_KEY_PREFIX + "222"
+		)
+
+	def test_payments_clear_the_members_of_their_invoices(self):
+		payment = frappe._dict(doctype="Payment Entry", references=[
+			frappe._dict(reference_doctype="Purchase Invoice", reference_name="ACC-PINV-1"),
+			frappe._dict(reference_doctype="Journal Entry", reference_name="ACC-JV-1")
+		])
+		scheduled = []
+
+		with (
+			patch.object(frappe, "get_all", return_value=["26405474"]) as get_all,
+			patch.object(frappe.db, "after_commit", MagicMock(add=scheduled.append)),
+		):
+			member_history.clear_member_history(payment, "on_submit")
+
+		self.assertEqual(get_all.call_args.kwargs["filters"]["name"], ["in", ["ACC-PINV-1"]])
+		(callback,) = scheduled
+		self.assertEqual((callback.func, callback.args), (member_history._delete_cached, (["26405474"],)))
@@ -0,0 +1,56 @@
+# Copyright (c) 2026, riddhi and contributors
+# For license information, please see license.txt
+
+from unittest.mock import MagicMock, patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from smartclaims.api import sync
+
+
+class TestSync(FrappeTestCase):
+	def test_content_hash_ignores_key_order(self):
+		self.assertEqual(
+			sync.get_content_hash({"supplier_name": "A", "custom_tin": "1"}),
+			sync.get_content_hash({"custom_tin": "1", "supplier_name": "A"})
+		)
+		self.assertNotEqual(
+			sync.get_content_hash({"supplier_name": "A", "custom_tin": "1"}),
+			sync.get_content_hash({"supplier_name": "A", "custom_tin": "2"})
+		)
+
+	def test_only_new_and_changed_records_are_written(self):
+		unchanged = {"supplier_name": "P1", "custom_tin": "1"}
+		existing = [
+			frappe._dict(name="SUP-1", supplier_name="P1", custom_content_hash=sync.get_content_hash(unchanged)),
+			frappe._dict(name="SUP-2", supplier_name="P2", custom_content_hash="stale")
+		]
+		records = [
+			{"custom_provider_id": "P1", "custom_tin": "1"},
+			{"custom_provider_id": "P2", "custom_tin": "2"},
+			{"custom_provider_id": "P3", "custom_tin": "3"},
+			{"custom_tin": "4"}
+		]
+		plan = MagicMock()
+		plan.map.side_effect = lambda record: {"supplier_name": record["custom_provider_id"], "custom_tin": record["custom_tin"]}
+		updated, inserted = MagicMock(), MagicMock()
+
+		with (
+			patch.object(sync, "get_mapping_plan", return_value=plan),
+			patch.object(frappe, "get_all", return_value=existing) as get_all,
+			patch.object(frappe, "get_doc", side_effect=lambda *args: updated if len(args) == 2 else inserted) as get_doc,
+			patch.object(frappe.db, "commit"),
+		):
+			response = sync._sync_records({"records": records}, "Supplier")
+
+		self.assertEqual(get_all.call_args.kwargs["filters"], {"supplier_name": ["in", ["P1", "P2", "P3"]]})
+		self.assertEqual(
+			(response["inserted"], response["updated"], response["unchanged"], response["failed"]), (1, 1, 1, 1)
+		)
+		self.assertEqual(response["errors"][0]["row"], 3)
+		get_doc.assert_any_call("Supplier", "SUP-2")
+		self.assertEqual(updated.custom_content_hash, sync.get_content_hash({"supplier_name": "P2", "custom_tin": "2"}))
+		updated.save.assert_called_once()
+		self.assertEqual(get_doc.call_args.args[0]["supplier_name"], "P3")
+		inserted.insert.assert_called_once()
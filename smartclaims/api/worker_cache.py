@@ -0,0 +1,86 @@
+from collections import OrderedDict
+
+import frappe
+from frappe.utils import cint
+
+# Keys evicted one by one are kept in a Redis list this long; a worker that
+# fell further behind drops all its entries instead
+MAX_EVICTIONS = 1000
+
+# Numbers the eviction and appends it to the list in one step, so a worker
+# never sees the counter move without the key that moved it
+EVICT_SCRIPT = """
+local sequence = redis.call('incr', KEYS[1])
+redis.call('rpush', KEYS[2], sequence .. '|' .. ARGV[1])
+redis.call('ltrim', KEYS[2], -tonumber(ARGV[2]), -1)
+return sequence
+"""
+
+
+class WorkerCache:
+    """In-memory cache of one worker process, optionally bounded as an LRU.
+
+    Invalidation is shared through Redis: ``invalidate`` bumps a version counter
+    and every worker drops all its entries on its next request, ``evict`` does
+    the same for a single key. The counters are read at most once per request / job.
+    """
+
+    def __init__(self, version_key, maxsize=None):
+        self.version_key = version_key
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._version = None
+        self._evictions = None
+
+    def get(self, key, default=None):
+        self._sync()
+        if key not in self._data:
+            return default
+
+        self._data.move_to_end(key)
+        return self._data[key]
+
+    def set(self, key, value):
+        self._sync()
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if self.maxsize and len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self):
+        frappe.cache.incr(frappe.cache.make_key(self.version_key))
+        frappe.local.cache.pop(self.version_key, None)
+
+    def evict(self, key):
+        frappe.cache.register_script(EVICT_SCRIPT)(
+            keys=[self._make_key("evictions"), self._make_key("evicted")], args=[key, MAX_EVICTIONS]
+        )
+        frappe.local.cache.pop(self.version_key, None)
+
+    def _sync(self):
+        if self.version_key not in frappe.local.cache:
+            frappe.local.cache[self.version_key] = tuple(
+                cint(value) for value in frappe.cache.mget([self._make_key(), self._make_key("evictions")])
+            )
+
+        version, evictions = frappe.local.cache[self.version_key]
+        if version != self._version:
+            self._data.clear()
+        elif evictions != self._evictions:
+            self._apply_evictions()
+
+        self._version, self._evictions = version, evictions
+
+    def _apply_evictions(self):
+        evicted = [value.decode().split("|", 1) for value in frappe.cache.lrange(self._make_key("evicted"), 0, -1)]
+        if not evicted or cint(evicted[0][0]) > self._evictions + 1:
+            # Trimmed past what this worker has applied
+            self._data.clear()
+            return
+
+        for sequence, key in evicted:
+            if cint(sequence) > self._evictions:
+                self._data.pop(key, None)
+
+    def _make_key(self, suffix=None):
+        return frappe.cache.make_key(f"{self.version_key}|{suffix}" if suffix else self.version_key)
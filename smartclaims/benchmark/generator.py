@@ -0,0 +1,198 @@
+import random
+from datetime import date, timedelta
+
+# Synthetic insurance data for the benchmark runner. Everything is derived from
+# the seed, so the same (scale, seed) always produces the same payloads; the
+# prefix only namespaces the ids so repeated runs don't collide on one site.
+SCALES = {
+	"small": {
+		"companies": 10,
+		"providers": 20,
+		"members": 20,
+		"claims": 200,
+		"claim_batches": 2,
+		"claims_per_batch": 100,
+		"refunds": 50,
+		"premium_invoices": 50,
+		"credit_notes": 10,
+		"journals": 5,
+		"journal_rows": 10,
+	},
+	"medium": {
+		"companies": 50,
+		"providers": 200,
+		"members": 200,
+		"claims": 2000,
+		"claim_batches": 10,
+		"claims_per_batch": 200,
+		"refunds": 500,
+		"premium_invoices": 500,
+		"credit_notes": 100,
+		"journals": 20,
+		"journal_rows": 50,
+	},
+	"large": {
+		"companies": 200,
+		"providers": 1000,
+		"members": 1000,
+		"claims": 20000,
+		"claim_batches": 50,
+		"claims_per_batch": 500,
+		"refunds": 5000,
+		"premium_invoices": 5000,
+		"credit_notes": 1000,
+		"journals": 50,
+		"journal_rows": 200,
+	},
+}
+
+# Journal endpoint -> (journal type, payload "type")
+JOURNAL_ENDPOINTS = {
+	"create_rejected_journal_entry": ("Claims", "Rejection Journal"),
+	"create_withholding_journal_entry": ("Claims", "Withholding Journal"),
+	"create_adjustment_journal_entry": ("Claims", "Adjustment Journal"),
+	"create_refund_rejected_journal_entry": ("Refund", "Rejection Journal"),
+	"create_refund_withholding_journal_entry": ("Refund", "Withholding Journal"),
+	"create_refund_adjustment_journal_entry": ("Refund", "Adjustment Journal"),
+}
+
+BASE_DATE = date(2025, 1, 1)
+PLANS = ("Gold", "Silver", "Bronze", "Platinum")
+
+
+def generate_dataset(scale="small", seed=42, prefix="BENCH", item_code="Item-Default"):
+	"""Return ``{dataset: [payload, ...]}`` for every create endpoint.
+
+	Journal rows reference their Purchase Invoice by position in the
+	``create_purchase_invoice`` dataset (``invoice``); the runner swaps that for
+	the name the invoice was created with.
+	"""
+	sizes = SCALES[scale] if isinstance(scale, str) else scale
+	rng = random.Random(seed)
+
+	companies = [f"{prefix}-COMP-{i:05d}" for i in range(sizes["companies"])]
+	providers = [f"{prefix}-PROV-{i:05d}" for i in range(sizes["providers"])]
+	members = [f"{prefix}-MBR-{i:06d}" for i in range(sizes["members"])]
+
+	claims = [_claim(rng, prefix, i, providers, item_code) for i in range(sizes["claims"])]
+	refunds = [_refund(rng, prefix, i, members, item_code) for i in range(sizes["refunds"])]
+	premium_invoices = [
+		_premium_invoice(rng, prefix, i, companies, item_code) for i in range(sizes["premium_invoices"])
+	]
+
+	claim_batches = [
+		{
+			"claims": [
+				_claim(rng, prefix, f"B{batch:03d}-{i:05d}", providers, item_code)
+				for i in range(sizes["claims_per_batch"])
+			]
+		}
+		for batch in range(sizes["claim_batches"])
+	]
+
+	credit_notes = [
+		{
+			"invoice_number": invoice["invoice_number"],
+			"insurance_type": invoice["insurance_type"],
+			"invoice_date": _date(rng, 300, 365),
+			"deactivation__termination_date": _date(rng, 300, 365),
+		}
+		for invoice in rng.sample(premium_invoices, min(sizes["credit_notes"], len(premium_invoices)))
+	]
+
+	invoices = claims + refunds
+	journals = {
+		endpoint: [
+			_journal(rng, prefix, endpoint, i, journal_type, payload_type, invoices, sizes["journal_rows"])
+			for i in range(sizes["journals"])
+		]
+		for endpoint, (journal_type, payload_type) in JOURNAL_ENDPOINTS.items()
+	}
+
+	return {
+		"create_company": [{"company_id": company, "customer_group": "Commercial"} for company in companies],
+		"create_provider": [
+			{"custom_provider_id": provider, "supplier_group": "Services"} for provider in providers + members
+		],
+		"create_purchase_invoice": invoices,
+		"create_purchase_invoice_bulk": claim_batches,
+		"create_sales_invoice": premium_invoices,
+		"create_credit_note": credit_notes,
+		**journals,
+	}
+
+
+def _claim(rng, prefix, index, providers, item_code):
+	qty = rng.randint(1, 5)
+	return {
+		"custom_invoice_type": "Claims",
+		"provider_id": rng.choice(providers),
+		"invoice_date": _date(rng, 0, 365),
+		"supplier_invoice_no": f"{prefix}-CLM-{index}",
+		"total_qty": qty,
+		"total_amount": round(qty * rng.uniform(50, 5000), 2),
+		"default_item_code": item_code,
+	}
+
+
+def _refund(rng, prefix, index, members, item_code):
+	return {
+		"custom_invoice_type": "Medical Refunds",
+		"refund_id": rng.choice(members),
+		"request_date": _date(rng, 0, 365),
+		"supplier_invoice_no": f"{prefix}-RFD-{index}",
+		"total_qty": 1,
+		"total_amount": round(rng.uniform(20, 2000), 2),
+		"default_item_code": item_code,
+	}
+
+
+def _premium_invoice(rng, prefix, index, companies, item_code):
+	start = BASE_DATE + timedelta(days=rng.randrange(0, 365))
+	items = [
+		{
+			"plan": item_code,
+			"description": rng.choice(PLANS),
+			"members": (members := rng.randint(1, 500)),
+			"premium_amount": round(members * rng.uniform(100, 1500), 2),
+		}
+		for _ in range(rng.randint(1, len(PLANS)))
+	]
+	return {
+		"invoice_number": f"{prefix}-INV-{index:06d}",
+		"company_id": rng.choice(companies),
+		"invoice_date": start.isoformat(),
+		"cover_period_start": start.isoformat(),
+		"cover_period_end": (start + timedelta(days=364)).isoformat(),
+		"next_invoice_date": (start + timedelta(days=365)).isoformat(),
+		"insurance_type": rng.choice(("TPA", "Pure Insurance")),
+		"card_option": rng.choice(("E-card", "Physical card")),
+		"current_invoice_amount": round(sum(item["premium_amount"] for item in items), 2),
+		"items": items,
+	}
+
+
+def _journal(rng, prefix, endpoint, index, journal_type, payload_type, invoices, row_count):
+	invoice_type = "Claims" if journal_type == "Claims" else "Medical Refunds"
+	positions = [i for i, invoice in enumerate(invoices) if invoice["custom_invoice_type"] == invoice_type]
+
+	accounts = []
+	for position in rng.sample(positions, min(row_count, len(positions))):
+		invoice = invoices[position]
+		amount = round(invoice["total_amount"] * rng.uniform(0.05, 0.5), 2)
+		if journal_type == "Claims":
+			row = {"invoice": position, "provider_id": invoice["provider_id"]}
+		else:
+			row = {"invoice": position, "member_number": invoice["refund_id"]}
+		accounts.append({**row, "debit": amount, "credit": amount})
+
+	return {
+		"type": payload_type,
+		"approval_date": _date(rng, 0, 365),
+		"journal_number": f"{prefix}-{endpoint.removeprefix('create_').removesuffix('_journal_entry').upper()}-{index:04d}",
+		"accounts": accounts,
+	}
+
+
+def _date(rng, start_day, end_day):
+	return (BASE_DATE + timedelta(days=rng.randrange(start_day, end_day))).isoformat()
@@ -0,0 +1,187 @@
+import json
+import os
+import subprocess
+import time
+
+import frappe
+from frappe.utils import flt, now
+
+from smartclaims.api.instrumentation import QueryTimer
+from smartclaims.benchmark.generator import JOURNAL_ENDPOINTS, generate_dataset
+
+# Endpoints in dependency order: parties first, then the invoices that
+# reference them, then the journals that reference those invoices
+ENDPOINTS = (
+	"create_company",
+	"create_provider",
+	"create_purchase_invoice",
+	"create_purchase_invoice_bulk",
+	"create_sales_invoice",
+	"create_credit_note",
+	*JOURNAL_ENDPOINTS,
+)
+
+
+def run_benchmark(scale="small", seed=42, endpoints=None, prefix=None):
+	"""Create the generated dataset through the ``create_*`` endpoints and time every call.
+
+	Endpoints are called in-process, exactly as the request handler calls them,
+	so the numbers exclude HTTP and auth overhead.
+	"""
+	prefix = prefix or f"BENCH-{seed}-{frappe.generate_hash(length=6).upper()}"
+	dataset = generate_dataset(scale, seed, prefix)
+	selected = [endpoint for endpoint in ENDPOINTS if not endpoints or endpoint in endpoints]
+
+	invoice_names = []
+	results = {}
+	for endpoint in selected:
+		payloads = dataset[endpoint]
+		if endpoint in JOURNAL_ENDPOINTS:
+			payloads = _resolve_journal_invoices(payloads, JOURNAL_ENDPOINTS[endpoint][0], invoice_names)
+
+		calls, responses = _run_endpoint(endpoint, payloads)
+		results[endpoint] = summarize(calls)
+
+		if endpoint == "create_purchase_invoice":
+			invoice_names = [response.get("name") for response in responses]
+
+	return {
+		"scale": scale,
+		"seed": seed,
+		"prefix": prefix,
+		"site": frappe.local.site,
+		"commit": _get_commit(),
+		"finished_at": now(),
+		"endpoints": results,
+	}
+
+
+def summarize(calls):
+	latencies = sorted(call["seconds"] for call in calls)
+	queries = sorted(call["queries"] for call in calls)
+	wall_time = sum(latencies)
+	rows = sum(call["rows"] for call in calls)
+
+	status_codes = {}
+	for call in calls:
+		status_codes[str(call["status"])] = status_codes.get(str(call["status"]), 0) + 1
+
+	return {
+		"calls": len(calls),
+		"rows": rows,
+		"errors": sum(1 for call in calls if not call["status"] or call["status"] >= 400),
+		"status_codes": status_codes,
+		"calls_per_second": flt(len(calls) / wall_time, 2) if wall_time else 0,
+		"rows_per_second": flt(rows / wall_time, 2) if wall_time else 0,
+		"latency_ms": {
+			"mean": flt(wall_time * 1000 / len(latencies), 2) if latencies else 0,
+			"p50": flt(percentile(latencies, 50) * 1000, 2),
+			"p95": flt(percentile(latencies, 95) * 1000, 2),
+			"p99": flt(percentile(latencies, 99) * 1000, 2),
+			"max": flt(latencies[-1] * 1000, 2) if latencies else 0,
+		},
+		"queries_per_call": {
+			"mean": flt(sum(queries) / len(queries), 2) if queries else 0,
+			"p95": percentile(queries, 95),
+			"max": queries[-1] if queries else 0,
+		},
+	}
+
+
+def percentile(sorted_values, pct):
+	"""Nearest-rank percentile of an already sorted list."""
+	if not sorted_values:
+		return 0
+	rank = max(0, min(len(sorted_values) - 1, -(-pct * len(sorted_values) // 100) - 1))
+	return sorted_values[int(rank)]
+
+
+def compare_results(baseline, current, threshold=10):
+	"""Return one row per endpoint with the p95 latency and throughput change in percent.
+
+	``regression`` is set when p95 grew or throughput dropped by more than ``threshold``.
+	"""
+	rows = []
+	for endpoint, result in current["endpoints"].items():
+		before = baseline["endpoints"].get(endpoint)
+		if not before:
+			continue
+
+		p95_change = _change(before["latency_ms"]["p95"], result["latency_ms"]["p95"])
+		throughput_change = _change(before["calls_per_second"], result["calls_per_second"])
+		rows.append({
+			"endpoint": endpoint,
+			"p95_ms": result["latency_ms"]["p95"],
+			"p95_change": p95_change,
+			"calls_per_second": result["calls_per_second"],
+			"throughput_change": throughput_change,
+			"queries_per_call": result["queries_per_call"]["mean"],
+			"queries_change": _change(before["queries_per_call"]["mean"], result["queries_per_call"]["mean"]),
+			"regression": p95_change > threshold or throughput_change < -threshold,
+		})
+
+	return rows
+
+
+def write_results(results, path):
+	with open(path, "w") as f:
+		json.dump(results, f, indent=1)
+
+
+def _run_endpoint(endpoint, payloads):
+	method = frappe.get_attr(f"smartclaims.api.create.{endpoint}")
+	calls, responses = [], []
+
+	for payload in payloads:
+		frappe.local.response["http_status_code"] = None
+		with QueryTimer() as queries:
+			start = time.perf_counter()
+			response = method(**payload)
+			seconds = time.perf_counter() - start
+
+		calls.append({
+			"seconds": seconds,
+			"queries": queries.count,
+			"status": frappe.local.response.get("http_status_code"),
+			"rows": len(payload.get("claims") or payload.get("accounts") or [payload]),
+		})
+		responses.append(response or {})
+		frappe.clear_messages()
+
+	return calls, responses
+
+
+def _resolve_journal_invoices(journals, journal_type, invoice_names):
+	invoice_key = "invoice_number" if journal_type == "Claims" else "refund_id"
+	resolved = []
+	for journal in journals:
+		accounts = [
+			{**{key: value for key, value in row.items() if key != "invoice"}, invoice_key: name}
+			for row in journal["accounts"]
+			if (name := _get_name(invoice_names, row["invoice"]))
+		]
+		if accounts:
+			resolved.append({**journal, "accounts": accounts})
+
+	return resolved
+
+
+def _get_name(names, position):
+	return names[position] if position < len(names) else None
+
+
+def _change(before, after):
+	return flt((after - before) * 100 / before, 1) if before else 0
+
+
+def _get_commit():
+	try:
+		return subprocess.check_output(
+			["git", "rev-parse", "--short", "HEAD"],
+			cwd=os.path.dirname(frappe.get_app_path("smartclaims")),
+			stderr=subprocess.DEVNULL,
+			text=True,
+		).strip()
+	except Exception:
+		return None
+
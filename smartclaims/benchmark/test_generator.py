@@ -0,0 +1,26 @@
+# Copyright (c) 2026, riddhi and contributors
+# For license information, please see license.txt
+
+from frappe.tests.utils import FrappeTestCase
+
+from smartclaims.benchmark.generator import generate_dataset
+from smartclaims.benchmark.runner import percentile
+
+
+class TestBenchmarkGenerator(FrappeTestCase):
+	def test_same_seed_same_dataset(self):
+		self.assertEqual(generate_dataset("small", 7, "T"), generate_dataset("small", 7, "T"))
+		self.assertNotEqual(generate_dataset("small", 7, "T"), generate_dataset("small", 8, "T"))
+
+	def test_journals_reference_matching_invoices(self):
+		dataset = generate_dataset("small", 7, "T")
+		invoices = dataset["create_purchase_invoice"]
+		for row in dataset["create_refund_rejected_journal_entry"][0]["accounts"]:
+			self.assertEqual(invoices[row["invoice"]]["custom_invoice_type"], "Medical Refunds")
+			self.assertEqual(invoices[row["invoice"]]["refund_id"], row["member_number"])
+
+	def test_percentile(self):
+		values = list(range(1, 101))
+		self.assertEqual(percentile(values, 50), 50)
+		self.assertEqual(percentile(values, 99), 99)
+		self.assertEqual(percentile([], 95), 0)
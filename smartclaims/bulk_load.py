@@ -0,0 +1,235 @@
+import json
+import multiprocessing
+import os
+import zlib
+from itertools import islice
+
+import frappe
+
+from smartclaims.api.claims_import import read_rows
+
+# Rows are first sharded by supplier (claims) or customer (premium invoices)
+# into one NDJSON file per worker, so documents of the same party are always
+# created by the same process and never compete for its ledger rows. Each
+# worker keeps a checkpoint of the shard lines it has committed.
+INPUT_EXTENSIONS = (".csv", ".ndjson", ".jsonl")
+SHARD_KEYS = {
+	"claims": ("provider_id", "refund_id"),
+	"sales-invoices": ("company_id",),
+}
+
+
+def run_bulk_load(site, path, kind="claims", workers=4, chunk_size=200, work_dir=None):
+	if workers < 1:
+		raise ValueError("workers must be at least 1")
+
+	work_dir = os.path.abspath(work_dir or f"{path.rstrip(os.sep)}.smartclaims-load")
+	os.makedirs(work_dir, exist_ok=True)
+
+	manifest = _load_manifest(work_dir)
+	if not manifest:
+		manifest = _shard_inputs(path, kind, workers, work_dir)
+
+	jobs = [
+		(site, os.getcwd(), kind, shard, chunk_size)
+		for shard in manifest["shards"]
+	]
+
+	# spawn: workers must not inherit the parent's sockets or DB state
+	with multiprocessing.get_context("spawn").Pool(processes=len(jobs)) as pool:
+		results = pool.starmap(load_shard, jobs)
+
+	return {
+		"created": sum(r["created"] for r in results),
+		"failed": sum(r["failed"] for r in results) + manifest["parse_errors"],
+		"work_dir": work_dir,
+	}
+
+
+def load_shard(site, sites_path, kind, shard, chunk_size):
+	frappe.init(site=site, sites_path=sites_path)
+	frappe.connect()
+	frappe.set_user("Administrator")
+
+	try:
+		checkpoint = _read_checkpoint(shard)
+		with open(shard["path"]) as rows, open(shard["errors"], "a") as errors:
+			lines = islice(rows, checkpoint["lines"], None)
+			while chunk := [json.loads(line) for line in islice(lines, chunk_size)]:
+				if kind == "claims":
+					results = _load_claims(chunk)
+				else:
+					results = _load_sales_invoices(chunk)
+
+				for row, result in zip(chunk, results, strict=True):
+					if result["status"] in (200, 201):
+						checkpoint["created"] += 1
+					else:
+						checkpoint["failed"] += 1
+						errors.write(json.dumps({**row, **result}, default=str) + "\n")
+
+				errors.flush()
+				checkpoint["lines"] += len(chunk)
+				_write_checkpoint(shard, checkpoint)
+
+		return checkpoint
+	finally:
+		frappe.destroy()
+
+
+def _load_claims(chunk):
+	from smartclaims.api.create import insert_purchase_invoice_chunk
+
+	# a chunk is committed before its checkpoint is written, so a resumed shard
+	# can start with claims that are already stored: those are reported as
+	# created instead of inserted again
+	existing = _get_stored_claims([row["payload"] for row in chunk])
+	results = [None] * len(chunk)
+	pending = []
+	for position, row in enumerate(chunk):
+		if name := existing.get(_get_claim_key(row["payload"])):
+			results[position] = {"status": 200, "name": name, "error": None}
+		else:
+			pending.append(position)
+
+	for position, result in zip(
+		pending, insert_purchase_invoice_chunk([chunk[position]["payload"] for position in pending]), strict=True
+	):
+		results[position] = result
+	frappe.db.commit()
+	return results
+
+
+def _get_stored_claims(payloads):
+	"""Return ``{(supplier, claim number): invoice}`` of the payloads' claims already stored."""
+	keys = {_get_claim_key(payload) for payload in payloads} - {None}
+	if not keys:
+		return {}
+
+	# Standalone claims keep their number in bill_no, consolidated ones on their lines
+	rows = frappe.db.sql("""
+		select supplier, bill_no, name from `tabPurchase Invoice`
+		where supplier in %(suppliers)s and bill_no in %(numbers)s and docstatus < 2
+		union all
+		select pi.supplier, item.custom_claim_number, pi.name
+		from `tabPurchase Invoice Item` item
+		join `tabPurchase Invoice` pi on pi.name = item.parent
+		where item.custom_claim_number in %(numbers)s and item.parenttype = 'Purchase Invoice'
+			and pi.supplier in %(suppliers)s and pi.docstatus < 2
+	""", {
+		"suppliers": tuple({supplier for supplier, number in keys}),
+		"numbers": tuple({number for supplier, number in keys}),
+	})
+	return {(supplier, number): name for supplier, number, name in rows if (supplier, number) in keys}
+
+
+def _get_claim_key(payload):
+	# Claims are billed to the provider, medical refunds to the refund id;
+	# claims sent without a number can't be recognised
+	supplier = payload.get("provider_id") if payload.get("custom_invoice_type") == "Claims" else payload.get("refund_id")
+	number = payload.get("claim_number") or payload.get("supplier_invoice_no")
+	return (supplier, number) if supplier and number else None
+
+
+def _load_sales_invoices(chunk):
+	from smartclaims.api.create import create_sales_invoice
+
+	# create_sales_invoice inserts, submits and commits one invoice per call, so
+	# a chunk interrupted midway is partly committed: on resume, invoice numbers
+	# that already exist are reported as created instead of inserted again
+	existing = dict(frappe.get_all(
+		"Sales Invoice",
+		filters={
+			"custom_invoice_number": ["in", [row["payload"].get("invoice_number") for row in chunk]],
+			"docstatus": ["<", 2],
+		},
+		fields=["custom_invoice_number", "name"],
+		as_list=True,
+	))
+
+	results = []
+	for row in chunk:
+		if name := existing.get(row["payload"].get("invoice_number")):
+			results.append({"status": 200, "name": name, "error": None})
+			continue
+
+		frappe.local.response["http_status_code"] = None
+		response = create_sales_invoice(**row["payload"])
+		results.append({
+			"status": frappe.local.response.get("http_status_code"),
+			"name": response.get("name"),
+			"error": response.get("error"),
+		})
+	return results
+
+
+def _shard_inputs(path, kind, workers, work_dir):
+	shards = [
+		{
+			"index": index,
+			"path": os.path.join(work_dir, f"shard-{index}.ndjson"),
+			"errors": os.path.join(work_dir, f"shard-{index}.errors.ndjson"),
+			"checkpoint": os.path.join(work_dir, f"shard-{index}.checkpoint.json"),
+		}
+		for index in range(workers)
+	]
+	parse_errors = 0
+
+	outputs = [open(shard["path"], "w") for shard in shards]
+	try:
+		with open(os.path.join(work_dir, "parse-errors.ndjson"), "w") as errors:
+			for file_path in _get_input_files(path):
+				file_format = "CSV" if file_path.lower().endswith(".csv") else "NDJSON"
+				for row, payload, error in read_rows(file_path, file_format):
+					source = f"{os.path.basename(file_path)}:{row}"
+					if error:
+						parse_errors += 1
+						errors.write(json.dumps({"source": source, "error": error, "payload": payload}) + "\n")
+						continue
+
+					shard_key = next((payload.get(key) for key in SHARD_KEYS[kind] if payload.get(key)), "")
+					shard = zlib.crc32(str(shard_key).encode()) % workers
+					outputs[shard].write(json.dumps({"source": source, "payload": payload}) + "\n")
+	finally:
+		for output in outputs:
+			output.close()
+
+	manifest = {"kind": kind, "source": os.path.abspath(path), "shards": shards, "parse_errors": parse_errors}
+	with open(os.path.join(work_dir, "manifest.json"), "w") as f:
+		json.dump(manifest, f, indent=1)
+
+	return manifest
+
+
+def _get_input_files(path):
+	if os.path.isfile(path):
+		return [path]
+
+	return sorted(
+		os.path.join(path, file_name)
+		for file_name in os.listdir(path)
+		if file_name.lower().endswith(INPUT_EXTENSIONS)
+	)
+
+
+def _load_manifest(work_dir):
+	path = os.path.join(work_dir, "manifest.json")
+	if os.path.exists(path):
+		with open(path) as f:
+			return json.load(f)
+
+
+def _read_checkpoint(shard):
+	if os.path.exists(shard["checkpoint"]):
+		with open(shard["checkpoint"]) as f:
+			return json.load(f)
+
+	return {"lines": 0, "created": 0, "failed": 0}
+
+
+def _write_checkpoint(shard, checkpoint):
+	# Write then rename, so an interrupted run never leaves a torn checkpoint
+	tmp_path = f"{shard['checkpoint']}.tmp"
+	with open(tmp_path, "w") as f:
+		json.dump(checkpoint, f)
+	os.replace(tmp_path, shard["checkpoint"])
@@ -0,0 +1,99 @@
+import click
+from frappe.commands import get_site, pass_context
+
+
+@click.command("smartclaims-bulk-load")
+@click.argument("path", type=click.Path(exists=True))
+@click.option(
+	"--kind",
+	type=click.Choice(["claims", "sales-invoices"]),
+	default="claims",
+	help="Purchase Invoice claims/refunds or premium Sales Invoices",
+)
+@click.option("--workers", type=click.IntRange(min=1), default=4, help="Worker processes, one DB connection each")
+@click.option("--chunk-size", type=int, default=200, help="Claims per commit")
+@click.option(
+	"--work-dir",
+	type=click.Path(),
+	help="Where shards and checkpoints are kept. Re-run with the same directory to resume.",
+)
+@pass_context
+def bulk_load(context, path, kind, workers, chunk_size, work_dir=None):
+	"""Load a CSV/NDJSON file, or a directory of them, through the create API logic in parallel."""
+	from smartclaims.bulk_load import run_bulk_load
+
+	site = get_site(context)
+	summary = run_bulk_load(site, path, kind=kind, workers=workers, chunk_size=chunk_size, work_dir=work_dir)
+	click.echo(
+		f"Loaded {summary['created']} documents, {summary['failed']} failed "
+		f"(errors in {summary['work_dir']})"
+	)
+
+
+@click.command("smartclaims-benchmark")
+@click.option("--scale", type=click.Choice(["small", "medium", "large"]), default="small")
+@click.option("--seed", type=int, default=42)
+@click.option("--endpoint", "endpoints", multiple=True, help="Only benchmark these create_* endpoints")
+@click.option("--output", type=click.Path(), help="Write the results JSON here")
+@click.option("--compare", type=click.Path(exists=True), help="Results JSON of an earlier run to compare with")
+@click.option("--threshold", type=float, default=10, help="Regression threshold in percent")
+@pass_context
+def benchmark(context, scale, seed, endpoints, output=None, compare=None, threshold=10):
+	"""Generate a synthetic dataset and benchmark every create_* endpoint on a test site."""
+	import json
+
+	import frappe
+
+	from smartclaims.benchmark.runner import compare_results, run_benchmark, write_results
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	frappe.set_user("Administrator")
+
+	try:
+		results = run_benchmark(scale=scale, seed=seed, endpoints=endpoints)
+	finally:
+		frappe.destroy()
+
+	if output:
+		write_results(results, output)
+	else:
+		click.echo(json.dumps(results, indent=1))
+
+	if compare:
+		with open(compare) as f:
+			baseline = json.load(f)
+
+		regressions = 0
+		for row in compare_results(baseline, results, threshold):
+			regressions += row["regression"]
+			click.echo(
+				f"{'REGRESSION ' if row['regression'] else ''}{row['endpoint']}: "
+				f"p95 {row['p95_ms']}ms ({row['p95_change']:+}%), "
+				f"{row['calls_per_second']}/s ({row['throughput_change']:+}%), "
+				f"{row['queries_per_call']} queries/call ({row['queries_change']:+}%)"
+			)
+
+		if regressions:
+			raise SystemExit(1)
+
+
+@click.command("smartclaims-rebuild-payables-summary")
+@pass_context
+def rebuild_payables_summary(context):
+	"""Recompute Provider Payables Summary from all submitted invoices and journals."""
+	import frappe
+
+	from smartclaims.api.payables import rebuild_payables_summary
+
+	for site in context.sites:
+		frappe.init(site=site)
+		frappe.connect()
+		try:
+			click.echo(f"{site}: {rebuild_payables_summary()} summary rows rebuilt")
+		finally:
+			frappe.destroy()
+
+
+commands = [bulk_load, benchmark, rebuild_payables_summary]
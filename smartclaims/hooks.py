@@ -86,6 +86,8 @@ doctype_js = {"Purchase Invoice" : "public/js/purchase_invoice.js"}
 # before_install = "smartclaims.install.before_install"
 # after_install = "smartclaims.install.after_install"
 
+after_migrate = ["smartclaims.indexes.ensure_indexes"]
+
 # Uninstallation
 # ------------
 
@@ -138,6 +140,52 @@ doctype_js = {"Purchase Invoice" : "public/js/purchase_invoice.js"}
 # ---------------
 # Hook on document methods and events
 
+doc_events = {
+	"Custom Field": {
+		"on_update": "smartclaims.api.mapping.clear_mapping_plans",
+		"on_trash": "smartclaims.api.mapping.clear_mapping_plans"
+	},
+	"Property Setter": {
+		"on_update": "smartclaims.api.mapping.clear_mapping_plans",
+		"on_trash": "smartclaims.api.mapping.clear_mapping_plans"
+	},
+	"DocType": {
+		"on_update": "smartclaims.api.mapping.clear_mapping_plans"
+	},
+	"Sales Invoice": {
+		"on_submit": "smartclaims.api.resolver.clear_invoice_cache",
+		"on_cancel": "smartclaims.api.resolver.clear_invoice_cache",
+		"on_trash": "smartclaims.api.resolver.clear_invoice_cache"
+	},
+	"Purchase Invoice": {
+		"after_insert": "smartclaims.api.member_history.update_member_history",
+		"on_submit": [
+			"smartclaims.api.payables.update_from_purchase_invoice",
+			"smartclaims.api.member_history.update_member_history"
+		],
+		"on_cancel": [
+			"smartclaims.api.payables.update_from_purchase_invoice",
+			"smartclaims.api.member_history.update_member_history"
+		],
+		"on_trash": "smartclaims.api.member_history.update_member_history"
+	},
+	"Journal Entry": {
+		"before_submit": "smartclaims.api.balances.set_running_balances",
+		"on_submit": [
+			"smartclaims.api.payables.update_from_journal_entry",
+			"smartclaims.api.member_history.clear_member_history"
+		],
+		"on_cancel": [
+			"smartclaims.api.payables.update_from_journal_entry",
+			"smartclaims.api.member_history.clear_member_history"
+		]
+	},
+	"Payment Entry": {
+		"on_submit": "smartclaims.api.member_history.clear_member_history",
+		"on_cancel": "smartclaims.api.member_history.clear_member_history"
+	}
+}
+
 # doc_events = {
 # 	"*": {
 # 		"on_update": "method",
@@ -149,6 +197,16 @@ doctype_js = {"Purchase Invoice" : "public/js/purchase_invoice.js"}
 # Scheduled Tasks
 # ---------------
 
+scheduler_events = {
+	"all": [
+		"smartclaims.api.submission.submit_queued_documents"
+	],
+	"daily": [
+		"smartclaims.api.idempotency.purge_expired_keys",
+		"smartclaims.api.duplicates.scan_recent_duplicate_claims"
+	],
+}
+
 # scheduler_events = {
 # 	"all": [
 # 		"smartclaims.tasks.all"
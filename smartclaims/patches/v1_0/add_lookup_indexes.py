@@ -0,0 +1,5 @@
+from smartclaims.indexes import ensure_indexes
+
+
+def execute():
+	ensure_indexes()
@@ -0,0 +1,30 @@
+import re
+
+import frappe
+from frappe.utils import cint, flt
+
+
+def execute():
+	"""Clean the Data values of the breakdown so the columns can become Int / Currency.
+
+	Runs before model sync: the column type change fails on values such as
+	"1,200" or "GHS 450.00", so every value is reduced to a plain number first.
+	"""
+	if not frappe.db.table_exists("Invoice Breakdown for Appropriaton"):
+		return
+
+	for row in frappe.db.sql(
+		"""select name, number_of_members_per_plan, premium_amount_per_plan
+		from `tabInvoice Breakdown for Appropriaton`""",
+		as_dict=True,
+	):
+		frappe.db.sql(
+			"""update `tabInvoice Breakdown for Appropriaton`
+			set number_of_members_per_plan = %s, premium_amount_per_plan = %s
+			where name = %s""",
+			(cint(_to_number(row.number_of_members_per_plan)), flt(_to_number(row.premium_amount_per_plan)), row.name),
+		)
+
+
+def _to_number(value):
+	return re.sub(r"[^0-9.\-]", "", str(value or "")) or 0
@@ -0,0 +1,35 @@
+import frappe
+
+from smartclaims.api.duplicates import parse_claim_month
+from smartclaims.api.payables import rebuild_payables_summary
+
+CLAIM_MONTH_FIELDS = (
+	("Purchase Invoice", "custom_claim_monthyear"),
+	("Pending Claim Adjustment", "claim_month"),
+)
+
+
+def execute():
+	"""Store every claim month as MM-YYYY, the format new claims are saved in.
+
+	Claim months are compared as strings by the duplicate scan, the month close
+	and the payables summary, so "9/2025" and "2025-09" rows were never found
+	under "09-2025". Values that aren't a month are left for manual review.
+	"""
+	for doctype, fieldname in CLAIM_MONTH_FIELDS:
+		if not frappe.db.table_exists(doctype) or not frappe.db.has_column(doctype, fieldname):
+			continue
+
+		for claim_month in frappe.db.sql_list(
+			f"select distinct `{fieldname}` from `tab{doctype}` where ifnull(`{fieldname}`, '') != ''"
+		):
+			normalized = parse_claim_month(claim_month)
+			if normalized and normalized != claim_month:
+				frappe.db.sql(
+					f"update `tab{doctype}` set `{fieldname}` = %s where `{fieldname}` = %s",
+					(normalized, claim_month),
+				)
+
+	# The summary is keyed by claim month, so its rows are regrouped
+	if frappe.db.table_exists("Provider Payables Summary"):
+		rebuild_payables_summary()
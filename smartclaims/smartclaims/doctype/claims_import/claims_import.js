@@ -0,0 +1,28 @@
+// Copyright (c) 2026, riddhi and contributors
+// For license information, please see license.txt
+
+frappe.ui.form.on("Claims Import", {
+	setup(frm) {
+		frappe.realtime.on("claims_import_progress", (data) => {
+			if (data.name !== frm.doc.name) return;
+			frm.dashboard.show_progress(
+				__("Importing Claims"),
+				data.progress,
+				__("{0} rows processed, {1} failed", [data.processed_rows, data.failed_rows])
+			);
+			if (data.done) frm.reload_doc();
+		});
+	},
+
+	refresh(frm) {
+		if (frm.is_new()) return;
+
+		// Failed runs resume after the rows they committed
+		const resume = frm.doc.status === "Failed" && frm.doc.error;
+		if (frm.doc.status === "Pending" || resume) {
+			frm.add_custom_button(resume ? __("Resume Import") : __("Start Import"), () =>
+				frm.call("start_import").then(() => frm.reload_doc())
+			);
+		}
+	},
+});
@@ -0,0 +1,21 @@
+# Copyright (c) 2026, riddhi and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+from smartclaims.api.claims_import import enqueue_claims_import
+
+
+class ClaimsImport(Document):
+	@frappe.whitelist()
+	def start_import(self):
+		# A failed run resumes after its committed rows; finished imports are not run again
+		if not self.can_resume() and self.status != "Pending":
+			frappe.throw(f"An import that is {self.status} cannot be started again")
+
+		enqueue_claims_import(self, resume=self.can_resume())
+
+	def can_resume(self):
+		# Failed with a traceback: the job stopped, as opposed to every row being rejected
+		return self.status == "Failed" and bool(self.error)
@@ -0,0 +1,35 @@
+# Copyright (c) 2026, riddhi and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from smartclaims.api import claims_import
+
+
+class TestClaimsImport(FrappeTestCase):
+	def start(self, can_create=True, can_read=True, file_name="file-1"):
+		def has_permission(doctype, ptype="read", doc=None, *args, **kwargs):
+			return can_create if doctype == "Purchase Invoice" else can_read
+
+		with (
+			patch.object(frappe, "has_permission", side_effect=has_permission),
+			patch.object(frappe.db, "get_value", return_value=file_name),
+			patch.object(frappe, "get_doc") as get_doc,
+		):
+			response = claims_import.start_claims_import("/private/files/claims.csv")
+
+		return response, get_doc
+
+	def test_import_needs_create_and_file_permission(self):
+		for kwargs, status in (
+			({"can_create": False}, 403),
+			({"file_name": None}, 400),
+			({"can_read": False}, 403),
+		):
+			response, get_doc = self.start(**kwargs)
+			self.assertEqual(response["status"], "failed")
+			self.assertEqual(frappe.local.response["http_status_code"], status, kwargs)
+			get_doc.assert_not_called()
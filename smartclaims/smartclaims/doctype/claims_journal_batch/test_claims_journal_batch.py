@@ -0,0 +1,48 @@
+# Copyright (c) 2026, riddhi and Contributors
+# See license.txt
+
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import flt
+
+from smartclaims.api.journal_batch import split_account_pairs
+
+
+def _pair(party_debit, party_credit):
+	# Party row and its counter row, each pair balanced on its own
+	return (
+		{"debit_in_account_currency": party_debit, "credit_in_account_currency": party_credit},
+		{"debit_in_account_currency": party_credit, "credit_in_account_currency": party_debit},
+	)
+
+
+def _difference(pairs):
+	return flt(sum(
+		flt(row.get("debit_in_account_currency")) - flt(row.get("credit_in_account_currency"))
+		for pair in pairs for row in pair
+	), 2)
+
+
+class TestClaimsJournalBatch(FrappeTestCase):
+	def test_chunks_balance_and_keep_every_pair(self):
+		pairs = [_pair(100.25 * i, 0) for i in range(1, 26)]
+		chunks = split_account_pairs(pairs, 10)
+
+		self.assertEqual(len(chunks), 5)
+		self.assertEqual([pair for chunk in chunks for pair in chunk], pairs)
+		for chunk in chunks:
+			self.assertEqual(_difference(chunk), 0)
+			self.assertLessEqual(len(chunk) * 2, 10)
+
+	def test_chunk_is_only_closed_where_it_balances(self):
+		# One-sided rows that only net out in threes: debit 30, then two credits of 15
+		unbalanced = (
+			({"debit_in_account_currency": 30, "credit_in_account_currency": 0}, {}),
+			({"debit_in_account_currency": 0, "credit_in_account_currency": 15}, {}),
+			({"debit_in_account_currency": 0, "credit_in_account_currency": 15}, {}),
+		)
+		chunks = split_account_pairs(list(unbalanced) * 4, 2)
+
+		self.assertEqual(len(chunks), 4)
+		for chunk in chunks:
+			self.assertEqual(len(chunk), 3)
+			self.assertEqual(_difference(chunk), 0)
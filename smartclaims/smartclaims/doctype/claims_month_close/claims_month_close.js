@@ -0,0 +1,17 @@
+// Copyright (c) 2026, riddhi and contributors
+// For license information, please see license.txt
+
+frappe.ui.form.on("Claims Month Close", {
+	refresh(frm) {
+		if (!frm.is_new() && !["Queued", "In Progress"].includes(frm.doc.status)) {
+			frm.add_custom_button(__("Close Month"), () =>
+				frm.call("start_close").then(() => frm.reload_doc())
+			);
+		}
+		if (!frm.is_new()) {
+			frm.add_custom_button(__("Adjustments"), () =>
+				frappe.set_route("List", "Pending Claim Adjustment", { month_close: frm.doc.name })
+			);
+		}
+	},
+});
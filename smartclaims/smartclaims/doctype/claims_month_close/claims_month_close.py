@@ -0,0 +1,22 @@
+# Copyright (c) 2026, riddhi and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+from smartclaims.api.duplicates import get_claim_month
+from smartclaims.api.month_close import enqueue_month_close
+
+
+class ClaimsMonthClose(Document):
+	def validate(self):
+		# Staged adjustments are stored as MM-YYYY
+		if self.claim_month:
+			self.claim_month = get_claim_month({"custom_claim_monthyear": self.claim_month})
+
+	@frappe.whitelist()
+	def start_close(self):
+		if self.status in ("Queued", "In Progress"):
+			frappe.throw("This month close is already running")
+
+		enqueue_month_close(self)
@@ -0,0 +1,50 @@
+# Copyright (c) 2026, riddhi and Contributors
+# See license.txt
+
+from unittest.mock import MagicMock, patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from smartclaims.api import month_close
+
+
+def _pair(invoice):
+	return (
+		{"reference_name": invoice, "party": "Provider A", "account": "Creditors",
+			"debit_in_account_currency": 10, "credit_in_account_currency": 0},
+		{"account": "Claims Expense", "debit_in_account_currency": 0, "credit_in_account_currency": 10},
+	)
+
+
+class TestClaimsMonthClose(FrappeTestCase):
+	def stage(self, kwargs, invoice_months):
+		with patch.object(month_close.frappe, "get_all", return_value=[
+			frappe._dict(name=name, custom_claim_monthyear=claim_month) for name, claim_month in invoice_months.items()
+		]), patch.object(month_close.frappe.db, "bulk_insert") as bulk_insert:
+			staged, errors = month_close.stage_pending_adjustments(
+				kwargs, "Claim Rejection", "Journal Entry", [_pair(name) for name in invoice_months]
+			)
+		values = bulk_insert.call_args.kwargs["values"] if bulk_insert.called else []
+		return staged, errors, [row[0] for row in values]
+
+	def test_staged_claim_month_is_normalised(self):
+		self.assertEqual(self.stage({"claim_month": "2025/9"}, {"PI-1": "10-2025"}), (1, [], ["09-2025"]))
+		self.assertEqual(self.stage({}, {"PI-1": "9/2025", "PI-2": "2025-10"}), (2, [], ["09-2025", "10-2025"]))
+
+		staged, errors, values = self.stage({"claim_month": "September"}, {"PI-1": "09-2025"})
+		self.assertEqual((staged, values), (0, []))
+		self.assertIn("Invalid claim month", errors[0]["error"])
+
+	def test_start_month_close_normalises_the_claim_month(self):
+		inserted = MagicMock()
+		inserted.name = "CMC-1"
+		with patch.object(month_close.frappe, "get_doc", return_value=inserted) as get_doc, \
+				patch.object(month_close, "enqueue_month_close") as enqueue, \
+				patch.object(month_close.frappe.db, "commit"):
+			self.assertEqual(month_close.start_month_close("2025-9")["status"], "queued")
+			self.assertEqual(get_doc.call_args.args[0]["claim_month"], "09-2025")
+			enqueue.assert_called_once_with(inserted)
+
+			self.assertEqual(month_close.start_month_close("13-2025")["status"], "failed")
+			self.assertEqual(frappe.local.response["http_status_code"], 400)
@@ -0,0 +1,147 @@
+# Copyright (c) 2026, riddhi and Contributors
+# See license.txt
+
+import inspect
+from unittest.mock import MagicMock, patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from smartclaims.api import create, duplicates
+
+CLAIM = {
+	"supplier": "Provider A", "custom_member_number": "264-054/74", "custom_claim_monthyear": "09-2026",
+	"custom_invoice_type": "Claims", "posting_date": "2026-09-30", "bill_no": "CLM-1"
+}
+ITEMS = [{"item_code": "Consultation", "qty": 2, "rate": 50}]
+PAYLOAD = {
+	"provider_id": "Provider A", "invoice_date": "2026-09-30", "custom_member_number": "26405474",
+	"custom_claim_monthyear": "09-2026", "custom_invoice_type": "Claims", "total_qty": 2, "total_amount": 100
+}
+
+
+def _map_claim(kwargs):
+	return {
+		"supplier": kwargs["provider_id"], "posting_date": kwargs["invoice_date"],
+		**{key: kwargs[key] for key in ("custom_member_number", "custom_claim_monthyear", "custom_invoice_type")}
+	}
+
+
+def _month_claim(name, member_number, amount, invoice_type="Claims", fingerprint=None):
+	return frappe._dict(
+		purchase_invoice=name, claim_number=None, member_number=member_number, supplier="Provider A",
+		invoice_type=invoice_type, amount=amount, fingerprint=fingerprint
+	)
+
+
+class TestDuplicateClaimCandidate(FrappeTestCase):
+	def test_fingerprint_ignores_formatting(self):
+		fingerprint = duplicates.get_claim_fingerprint(CLAIM, ITEMS, ["J45.0", "r05"])
+
+		self.assertEqual(fingerprint, duplicates.get_claim_fingerprint(
+			{**CLAIM, "supplier": " provider  a ", "custom_member_number": "26405474", "custom_claim_monthyear": "2026-9"},
+			[{"item_code": "Drugs", "qty": 1, "rate": 100}],
+			["R05", "j450", ""]
+		))
+		self.assertNotEqual(fingerprint, duplicates.get_claim_fingerprint({**CLAIM, "custom_claim_monthyear": "10-2026"}, ITEMS))
+		self.assertNotEqual(fingerprint, duplicates.get_claim_fingerprint(CLAIM, [{**ITEMS[0], "rate": 51}]))
+		self.assertIsNone(duplicates.get_claim_fingerprint({**CLAIM, "custom_member_number": " - "}, ITEMS))
+
+	def test_claim_month_is_normalised(self):
+		for claim_month, expected in (
+			("09-2026", "09-2026"), ("9/2026", "09-2026"), ("2026-09", "09-2026"), ("2026/9", "09-2026"),
+			("", "02-2026"), (" ", "02-2026"),
+		):
+			self.assertEqual(
+				duplicates.get_claim_month({"custom_claim_monthyear": claim_month, "posting_date": "2026-02-15"}),
+				expected,
+				claim_month
+			)
+
+		for claim_month in ("September", "13-2026", "00-2026", "2026-13", "9-26"):
+			self.assertIsNone(duplicates.parse_claim_month(claim_month), claim_month)
+			with self.assertRaises(frappe.ValidationError, msg=claim_month):
+				duplicates.get_claim_month({"custom_claim_monthyear": claim_month, "posting_date": "2026-02-15"})
+			self.assertIn(
+				"Invalid claim month",
+				create.get_purchase_invoice_payload_error({**PAYLOAD, "custom_claim_monthyear": claim_month})
+			)
+		self.assertIsNone(create.get_purchase_invoice_payload_error(PAYLOAD))
+
+		plan = MagicMock(map=lambda kwargs: dict(kwargs))
+		with patch.object(create, "get_mapping_plan", return_value=plan):
+			values = create._get_purchase_invoice_values({**CLAIM, "custom_claim_monthyear": "2026-9"})
+		self.assertEqual(values["custom_claim_monthyear"], "09-2026")
+
+	def run_create(self, call, existing=None, action="Reject"):
+		settings = frappe._dict(duplicate_claim_action=action, consolidate_claims=0)
+		plan = MagicMock(map=_map_claim)
+		inserted = []
+
+		def build(values, items):
+			doc = MagicMock(values=values)
+			doc.name = f"ACC-PINV-{len(inserted) + 1}"
+			inserted.append(doc)
+			return doc
+
+		with (
+			patch.object(frappe, "get_cached_doc", return_value=settings),
+			patch.object(create, "get_mapping_plan", return_value=plan),
+			patch.object(create, "_build_purchase_invoice", side_effect=build),
+			patch.object(duplicates, "find_claim_by_fingerprint", return_value=existing),
+			patch.object(frappe.db, "rollback") as rollback,
+		):
+			response = call()
+
+		return response, inserted, rollback
+
+	def test_resubmitted_claim_is_rejected_with_409(self):
+		create_purchase_invoice = inspect.unwrap(create.create_purchase_invoice)
+
+		response, inserted, _ = self.run_create(lambda: create_purchase_invoice(**PAYLOAD), existing="ACC-PINV-9")
+
+		self.assertEqual(frappe.local.response["http_status_code"], 409)
+		self.assertIn("ACC-PINV-9", response["error"])
+		self.assertEqual(inserted, [])
+
+		response, inserted, _ = self.run_create(
+			lambda: create_purchase_invoice(**PAYLOAD), existing="ACC-PINV-9", action="Flag"
+		)
+		self.assertEqual(frappe.local.response["http_status_code"], 201)
+		self.assertEqual(inserted[0].values["custom_duplicate_of"], "ACC-PINV-9")
+
+	def test_duplicate_within_one_bulk_call(self):
+		other = {**PAYLOAD, "custom_member_number": "11111111"}
+
+		results, inserted, rollback = self.run_create(
+			lambda: create.insert_purchase_invoice_chunk([PAYLOAD, other, dict(PAYLOAD)])
+		)
+
+		self.assertEqual([result["status"] for result in results], [201, 201, 409])
+		self.assertIn("ACC-PINV-1", results[2]["error"])
+		self.assertEqual(len(inserted), 2)
+		rollback.assert_called_once_with(save_point=create.CLAIM_ROW_SAVEPOINT)
+
+	def test_scan_compares_neighbours_of_one_member_and_type(self):
+		month_claims = [
+			_month_claim("PINV-1", "111", 100, fingerprint="f1"),
+			_month_claim("PINV-2", "111", 100.5, fingerprint="f1"),
+			_month_claim("PINV-3", "111", 130),
+			_month_claim("PINV-4", "111", 100, invoice_type="Medical Refunds"),
+			_month_claim("PINV-5", "222", 100),
+		]
+		settings = frappe._dict(near_duplicate_tolerance=1)
+
+		with (
+			patch.object(frappe, "get_cached_doc", return_value=settings),
+			patch.object(duplicates, "get_month_claims", return_value=month_claims) as get_month_claims,
+			patch.object(frappe.db, "bulk_insert") as bulk_insert,
+			patch.object(frappe.db, "commit"),
+		):
+			self.assertEqual(duplicates.find_duplicate_claims("09-2026"), 1)
+
+		get_month_claims.assert_called_once_with("09-2026")
+		(candidate,) = bulk_insert.call_args.kwargs["values"]
+		candidate = dict(zip(bulk_insert.call_args.kwargs["fields"], candidate, strict=True))
+		self.assertEqual(candidate["match_type"], "Exact")
+		self.assertEqual((candidate["duplicate_of"], candidate["purchase_invoice"]), ("PINV-1", "PINV-2"))
@@ -4,6 +4,13 @@
 # import frappe
 from frappe.tests.utils import FrappeTestCase
 
+from smartclaims.api.appropriation import allocate
+
 
 class TestInvoiceBreakdownforAppropriaton(FrappeTestCase):
-	pass
+	def test_allocation_adds_up_per_invoice(self):
+		# 100.00 over three equal plans, 10.07 over 3:1 plans
+		self.assertEqual(list(allocate([10000, 1007], [1, 1, 1, 3, 1], [0, 0, 0, 1, 1])), [3334, 3333, 3333, 755, 252])
+
+	def test_unweighted_invoice_is_split_evenly(self):
+		self.assertEqual(list(allocate([7], [0, 0], [0, 0])), [4, 3])
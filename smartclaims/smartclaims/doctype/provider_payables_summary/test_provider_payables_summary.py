@@ -0,0 +1,43 @@
+# Copyright (c) 2026, riddhi and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from smartclaims.api import payables
+
+SUPPLIER = "_Test Payables Supplier"
+
+
+def _claim(amount):
+	return frappe._dict(
+		supplier=SUPPLIER, custom_claim_monthyear="09-2026", custom_invoice_type="Claims", grand_total=amount
+	)
+
+
+class TestProviderPayablesSummary(FrappeTestCase):
+	def get_summary(self):
+		return frappe.db.get_value(
+			payables.SUMMARY_DOCTYPE,
+			payables._get_summary_name(SUPPLIER, "09-2026", "Claims"),
+			["invoice_count", "total_claims", "rejections", "net_payable"],
+			as_dict=True
+		)
+
+	def test_signed_deltas_accumulate_on_one_row(self):
+		payables.update_from_purchase_invoice(_claim(100), "on_submit")
+		payables.update_from_purchase_invoice(_claim(250), "on_submit")
+		payables._apply_deltas({(SUPPLIER, "09-2026", "Claims"): {"rejections": 30, "net_payable": -30}})
+
+		summary = self.get_summary()
+		self.assertEqual(summary.invoice_count, 2)
+		self.assertEqual(summary.total_claims, 350)
+		self.assertEqual(summary.rejections, 30)
+		self.assertEqual(summary.net_payable, 320)
+
+		payables.update_from_purchase_invoice(_claim(100), "on_cancel")
+
+		summary = self.get_summary()
+		self.assertEqual(summary.invoice_count, 1)
+		self.assertEqual(summary.total_claims, 250)
+		self.assertEqual(summary.net_payable, 220)
@@ -0,0 +1,8 @@
+// Copyright (c) 2026, riddhi and contributors
+// For license information, please see license.txt
+
+// frappe.ui.form.on("Smartclaims Profile Capture", {
+// 	refresh(frm) {
+
+// 	},
+// });
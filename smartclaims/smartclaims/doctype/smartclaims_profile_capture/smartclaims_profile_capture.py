@@ -0,0 +1,23 @@
+# Copyright (c) 2026, riddhi and contributors
+# For license information, please see license.txt
+
+from frappe.model.document import Document
+
+from smartclaims.api.profiler import refresh_captures
+
+
+class SmartclaimsProfileCapture(Document):
+	def validate(self):
+		if not self.enabled:
+			self.status = "Completed" if self.captured_calls >= self.max_calls else "Disabled"
+		elif self.captured_calls >= self.max_calls:
+			self.enabled = 0
+			self.status = "Completed"
+		else:
+			self.status = "Active"
+
+	def on_update(self):
+		refresh_captures()
+
+	def after_delete(self):
+		refresh_captures()
@@ -0,0 +1,68 @@
+# Copyright (c) 2026, riddhi and Contributors
+# See license.txt
+
+from unittest.mock import MagicMock, patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from smartclaims.api import submission
+
+
+def _queued(name, attempts=0):
+	return frappe._dict(
+		name=name, reference_doctype="Sales Invoice", reference_name=f"SINV-{name}", attempts=attempts
+	)
+
+
+class TestSmartclaimsSubmissionQueue(FrappeTestCase):
+	def run_submitter(self, queued, doc, max_attempts=3, locked=False):
+		settings = frappe._dict(submission_batch_size=10, submission_order="Oldest First",
+			max_submission_attempts=max_attempts)
+		updates = {}
+
+		with (
+			patch.object(frappe.cache, "set", return_value=not locked),
+			patch.object(frappe.cache, "delete"),
+			patch.object(frappe, "get_cached_doc", return_value=settings),
+			patch.object(frappe, "get_all", return_value=queued) as get_all,
+			patch.object(frappe, "get_doc", return_value=doc),
+			patch.object(frappe.db, "set_value", side_effect=lambda dt, name, values: updates.update({name: values})),
+			patch.object(frappe.db, "commit"),
+			patch.object(frappe.db, "rollback"),
+		):
+			submission.submit_queued_documents()
+
+		return updates, get_all
+
+	def test_queued_draft_is_submitted(self):
+		doc = MagicMock(docstatus=0)
+		doc.submit.side_effect = lambda: setattr(doc, "docstatus", 1)
+
+		updates, get_all = self.run_submitter([_queued("1")], doc)
+
+		doc.submit.assert_called_once()
+		self.assertEqual(get_all.call_args.kwargs["order_by"], "name asc")
+		self.assertEqual(get_all.call_args.kwargs["limit"], 10)
+		self.assertEqual(updates["1"]["status"], "Submitted")
+		self.assertEqual(updates["1"]["attempts"], 1)
+
+	def test_failed_submission_is_retried_until_max_attempts(self):
+		doc = MagicMock(docstatus=0)
+		doc.submit.side_effect = frappe.ValidationError("Missing account")
+
+		updates, _ = self.run_submitter([_queued("1"), _queued("2", attempts=2)], doc)
+
+		self.assertEqual(updates["1"]["status"], "Queued")
+		self.assertEqual(updates["1"]["attempts"], 1)
+		self.assertEqual(updates["2"]["status"], "Failed")
+		self.assertEqual(updates["2"]["attempts"], 3)
+
+	def test_nothing_runs_while_another_submitter_holds_the_lock(self):
+		doc = MagicMock(docstatus=0)
+
+		updates, get_all = self.run_submitter([_queued("1")], doc, locked=True)
+
+		get_all.assert_not_called()
+		doc.submit.assert_not_called()
+		self.assertEqual(updates, {})